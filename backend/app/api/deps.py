@@ -1,12 +1,15 @@
-from typing import Generator
+import time
+from typing import Any, Dict, Generator
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from jose import jwt, JWTError
 
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, ReadSessionLocal
 from app.core.config import settings
 from app.models.user import User, RoleEnum
+from app.schemas.auth import CurrentUser
+from app.services.user_cache import user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
@@ -17,7 +20,24 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+def get_read_db() -> Generator[Session, None, None]:
+    """Session sur le réplica de lecture (DATABASE_READ_URL), sinon la base principale."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def _fresh_claims(payload: Dict[str, Any]) -> bool:
+    # claims pris tels quels seulement sur un token récent: borne la fenêtre de révocation
+    iat = payload.get("iat")
+    return (
+        "uid" in payload and "role" in payload and isinstance(iat, (int, float))
+        and time.time() - iat < settings.AUTH_STATELESS_MAX_AGE_MINUTES * 60
+    )
+
+def authenticate_token(db: Session, token: str) -> CurrentUser:
+    """Utilisateur du JWT; utilisable hors dépendances (ex: WebSocket, token en query)."""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
         sub = payload.get("sub")
@@ -26,17 +46,38 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    user = db.query(User).filter(User.email == sub).first()
-    if not user or not user.is_active:
+    # token récent auto-suffisant: pas d'aller-retour base
+    if settings.AUTH_STATELESS_CLAIMS and _fresh_claims(payload):
+        try:
+            return CurrentUser(id=payload["uid"], email=sub, role=payload["role"])
+        except ValueError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+
+    user = user_cache.get(sub)
+    if user is None:
+        row = (
+            db.query(User.id, User.email, User.role, User.is_active)
+            .filter(User.email == sub)
+            .first()
+        )
+        if not row:
+            raise HTTPException(status_code=401, detail="Inactive user")
+        user = CurrentUser(id=row.id, email=row.email, role=row.role, is_active=bool(row.is_active))
+        user_cache.put(sub, user)
+
+    if not user.is_active:
         raise HTTPException(status_code=401, detail="Inactive user")
     return user
 
-def require_admin(user: User = Depends(get_current_user)) -> User:
+def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> CurrentUser:
+    return authenticate_token(db, token)
+
+def require_admin(user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     if user.role != RoleEnum.ADMIN:
         raise HTTPException(status_code=403, detail="Admin only")
     return user
 
-def require_teacher_or_admin(user: User = Depends(get_current_user)) -> User:
+def require_teacher_or_admin(user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     if user.role not in (RoleEnum.ADMIN, RoleEnum.TEACHER):
         raise HTTPException(status_code=403, detail="Teacher/Admin only")
     return user
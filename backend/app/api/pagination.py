@@ -0,0 +1,57 @@
+from typing import List, Optional, Sequence, Type
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Query, Session
+
+from app.services.pagination import DEFAULT_LIMIT, InvalidCursor, SortKey, keyset_page
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[List[str]]:
+    """?fields=id,email -> ["id", "email"], limité aux champs du schéma de sortie."""
+    if not fields:
+        return None
+    names = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in names if f not in schema.__fields__]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Champs inconnus: {', '.join(unknown)}")
+    return names or None
+
+
+def select_fields(db: Session, model, fields: Optional[List[str]], keys: Sequence[SortKey]) -> Query:
+    """Requête sur l'entité complète, ou seulement sur les colonnes demandées (+ clés de tri)."""
+    if not fields:
+        return db.query(model)
+    names = list(dict.fromkeys(fields + [col.key for col, _ in keys]))
+    return db.query(*[getattr(model, name) for name in names])
+
+
+def paginated(
+    query: Query,
+    keys: Sequence[SortKey],
+    cursor: Optional[str],
+    limit: Optional[int],
+    fields: Optional[List[str]],
+    response: Response,
+):
+    """Page keyset; le curseur suivant part dans l'en-tête X-Next-Cursor (corps inchangé: une liste).
+
+    Sans limit ni cursor, la liste est complète (comportement des clients qui ne paginent pas).
+    """
+    if limit is None and cursor:
+        limit = DEFAULT_LIMIT
+    try:
+        rows, next_cursor = keyset_page(query, keys, cursor, limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    if fields:
+        # projection: pas de validation par response_model, on sérialise les colonnes lues
+        return JSONResponse(jsonable_encoder([{f: getattr(r, f) for f in fields} for r in rows]), headers=headers)
+    response.headers.update(headers)
+    return rows
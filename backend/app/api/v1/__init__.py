@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1 import auth, users, groups, sessions, face, attendance
+from app.api.v1 import auth, users, groups, sessions, face, face_stream, attendance
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -7,4 +7,5 @@ api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(groups.router, prefix="/groups", tags=["groups"])
 api_router.include_router(sessions.router, prefix="/sessions", tags=["sessions"])
 api_router.include_router(face.router, prefix="/face", tags=["face"])
+api_router.include_router(face_stream.router, prefix="/face", tags=["face"])
 api_router.include_router(attendance.router, prefix="/attendance", tags=["attendance"])
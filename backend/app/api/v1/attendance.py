@@ -1,67 +1,204 @@
+import csv
 import io
-import pandas as pd
+import os
+import tempfile
+from datetime import datetime
+from typing import Iterator, Optional
+
 from fastapi import APIRouter, Depends, Query, HTTPException
 from fastapi.responses import StreamingResponse
+from openpyxl import Workbook
 from sqlalchemy.orm import Session
-from typing import Optional
 
-from app.api.deps import get_db, require_teacher_or_admin
-from app.models.attendance import Attendance
+from app.api.deps import get_read_db, require_teacher_or_admin
+from app.core.config import settings
+from app.db.session import ReadSessionLocal
+from app.models.attendance_stat import AttendanceStat
+from app.models.group import Group
 from app.models.session import Session as SessionModel
 from app.models.user import User, RoleEnum
-from app.models.user_group import UserGroup
+from app.schemas.auth import CurrentUser
+from app.services.attendance_matrix import iter_attendance_matrix, session_filters
+from app.services.attendance_stats import alert_filters, group_sessions_held
 
 router = APIRouter()
 
+COLUMNS = ["Session ID", "Group ID", "Start", "End", "Student ID", "First name", "Last name", "Email", "Status"]
+
+# Lignes lues par lot sur le curseur serveur, et taille des morceaux envoyés
+EXPORT_CHUNK_ROWS = 1000
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def _stream_csv(rows: Iterator[tuple]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    buf.write("\ufeff")  # BOM: Excel reconnaît l'UTF-8
+    writer.writerow(COLUMNS)
+    for row in rows:
+        writer.writerow([v.isoformat(sep=" ") if isinstance(v, datetime) else v for v in row])
+        if buf.tell() >= STREAM_CHUNK_BYTES:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode("utf-8")
+
+
+def _stream_xlsx(rows: Iterator[tuple]) -> Iterator[bytes]:
+    # mode write-only: les lignes partent sur disque au fil de l'eau, mémoire constante
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Attendance")
+    ws.append(COLUMNS)
+    for row in rows:
+        ws.append(tuple(row))
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        wb.save(path)
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(STREAM_CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.unlink(path)
+
+
+def _export_stream(fmt: str, group_id, session_id, date_from, date_to) -> Iterator[bytes]:
+    # la session de get_read_db est fermée avant l'envoi de la réponse: le générateur a la sienne
+    db = ReadSessionLocal()
+    try:
+        rows = iter_attendance_matrix(
+            db, chunk_size=EXPORT_CHUNK_ROWS,
+            group_id=group_id, session_id=session_id, date_from=date_from, date_to=date_to,
+        )
+        yield from (_stream_csv(rows) if fmt == "csv" else _stream_xlsx(rows))
+    finally:
+        db.close()
+
+
 @router.get("/export")
 def export_excel(
-    db: Session = Depends(get_db),
-    _: User = Depends(require_teacher_or_admin),
+    db: Session = Depends(get_read_db),
+    _: CurrentUser = Depends(require_teacher_or_admin),
     group_id: Optional[int] = Query(None),
     session_id: Optional[int] = Query(None),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    format: str = Query("xlsx", regex="^(xlsx|csv)$"),
 ):
     if not session_id and not group_id:
         raise HTTPException(status_code=400, detail="session_id ou group_id requis")
+    if session_id:
+        # session_id prioritaire sur group_id
+        group_id = None
 
-    sessions = (
-        db.query(SessionModel).filter(SessionModel.id == session_id).all()
-        if session_id
-        else db.query(SessionModel).filter(SessionModel.group_id == group_id).all()
-    )
-    if not sessions:
+    filters = session_filters(group_id=group_id, session_id=session_id, date_from=date_from, date_to=date_to)
+    if not db.query(SessionModel.id).filter(*filters).first():
         raise HTTPException(status_code=404, detail="Aucune séance trouvée")
 
-    rows = []
-    for sess in sessions:
-        student_ids = [ug.user_id for ug in db.query(UserGroup).filter(UserGroup.group_id == sess.group_id).all()]
-        students = (
-            db.query(User).filter(User.id.in_(student_ids), User.role == RoleEnum.STUDENT).all()
-            if student_ids else []
-        )
-        present_ids = set([a.user_id for a in db.query(Attendance).filter(Attendance.session_id == sess.id).all()])
-
-        for st in students:
-            rows.append({
-                "Session ID": sess.id,
-                "Group ID": sess.group_id,
-                "Start": sess.start_time,
-                "End": sess.end_time,
-                "Student ID": st.id,
-                "First name": st.first_name,
-                "Last name": st.last_name,
-                "Email": st.email,
-                "Status": "PRESENT" if st.id in present_ids else "ABSENT",
-            })
-
-    df = pd.DataFrame(rows)
-    out = io.BytesIO()
-    with pd.ExcelWriter(out, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="Attendance")
-    out.seek(0)
-
-    fname = f"attendance_{'session_'+str(session_id) if session_id else 'group_'+str(group_id)}.xlsx"
+    fname = f"attendance_{'session_'+str(session_id) if session_id else 'group_'+str(group_id)}.{format}"
+    media_type = (
+        "text/csv; charset=utf-8"
+        if format == "csv"
+        else "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
     return StreamingResponse(
-        out,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        _export_stream(format, group_id, session_id, date_from, date_to),
+        media_type=media_type,
         headers={"Content-Disposition": f"attachment; filename={fname}"},
     )
+
+
+# --- statistiques (table attendance_stats, sans relire attendance) ---
+# lecture seule: les séances terminées sont clôturées par session_closer (ATTENDANCE_CLOSE_INTERVAL)
+
+def _stat_out(stat: AttendanceStat, first_name: Optional[str] = None, last_name: Optional[str] = None) -> dict:
+    out = {
+        "student_id": stat.user_id,
+        "group_id": stat.group_id,
+        "sessions_held": stat.sessions_held,
+        "presences": stat.presences,
+        "absences": stat.absences,
+        "absence_rate": round(stat.absences / stat.sessions_held, 3) if stat.sessions_held else 0.0,
+        "current_streak": stat.current_streak,
+        "last_session_at": stat.last_session_at,
+        "last_present_at": stat.last_present_at,
+    }
+    if first_name is not None:
+        out["name"] = f"{first_name} {last_name}"
+    return out
+
+
+@router.get("/stats/groups/{group_id}")
+def group_stats(
+    group_id: int,
+    db: Session = Depends(get_read_db),
+    _: CurrentUser = Depends(require_teacher_or_admin),
+):
+    if not db.query(Group.id).filter(Group.id == group_id).first():
+        raise HTTPException(status_code=404, detail="Group not found")
+    rows = (
+        db.query(AttendanceStat, User.first_name, User.last_name)
+        .join(User, User.id == AttendanceStat.user_id)
+        .filter(AttendanceStat.group_id == group_id)
+        .order_by(AttendanceStat.user_id)
+        .all()
+    )
+    students = [_stat_out(stat, first, last) for stat, first, last in rows]
+    presences = sum(s["presences"] for s in students)
+    absences = sum(s["absences"] for s in students)
+    return {
+        "group_id": group_id,
+        "sessions_held": group_sessions_held(db, group_id),
+        "presences": presences,
+        "absences": absences,
+        "attendance_rate": round(presences / (presences + absences), 3) if presences + absences else None,
+        "students": students,
+    }
+
+
+@router.get("/stats/students/{student_id}")
+def student_stats(
+    student_id: int,
+    db: Session = Depends(get_read_db),
+    _: CurrentUser = Depends(require_teacher_or_admin),
+):
+    if not db.query(User.id).filter(User.id == student_id, User.role == RoleEnum.STUDENT).first():
+        raise HTTPException(status_code=404, detail="Student not found")
+    stats = db.query(AttendanceStat).filter(AttendanceStat.user_id == student_id).order_by(AttendanceStat.group_id)
+    return {"student_id": student_id, "groups": [_stat_out(stat) for stat in stats]}
+
+
+@router.get("/alerts")
+def absence_alerts(
+    group_id: Optional[int] = Query(None),
+    min_streak: Optional[int] = Query(None, ge=0, description="Absences consécutives (défaut ATTENDANCE_ALERT_STREAK)"),
+    min_absences: Optional[int] = Query(None, ge=0, description="Absences au total (défaut ATTENDANCE_ALERT_ABSENCES)"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+    _: CurrentUser = Depends(require_teacher_or_admin),
+):
+    """Étudiants en absences répétées, série la plus longue d'abord."""
+    min_streak = settings.ATTENDANCE_ALERT_STREAK if min_streak is None else min_streak
+    min_absences = settings.ATTENDANCE_ALERT_ABSENCES if min_absences is None else min_absences
+    filters = alert_filters(min_streak, min_absences)
+    if not filters:
+        raise HTTPException(status_code=400, detail="min_streak ou min_absences requis")
+    query = (
+        db.query(AttendanceStat, User.first_name, User.last_name)
+        .join(User, User.id == AttendanceStat.user_id)
+        .filter(*filters)
+    )
+    if group_id:
+        query = query.filter(AttendanceStat.group_id == group_id)
+    rows = query.order_by(
+        AttendanceStat.current_streak.desc(), AttendanceStat.absences.desc(), AttendanceStat.user_id
+    ).limit(limit)
+    return {
+        "min_streak": min_streak,
+        "min_absences": min_absences,
+        "alerts": [_stat_out(stat, first, last) for stat, first, last in rows],
+    }
@@ -1,19 +1,60 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
-from app.core.security import verify_password, create_access_token
+from app.core.config import settings
+from app.core.security import PasswordHasherBusy, verify_and_update_password, create_access_token
 from app.models.user import User
 from app.schemas.auth import Token
+from app.services.login_limiter import LoginRateLimiter
 
 router = APIRouter()
 
+login_limiter = LoginRateLimiter(
+    max_failures=settings.LOGIN_MAX_FAILURES,
+    window_seconds=settings.LOGIN_FAILURE_WINDOW,
+)
+
+def _find_user(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+def _save_rehash(db: Session, user: User, new_hash: str) -> None:
+    user.hashed_password = new_hash
+    db.commit()
+
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == form_data.username).first()
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    retry = login_limiter.retry_after(form_data.username)
+    if retry > 0:
+        raise HTTPException(
+            status_code=429,
+            detail="Trop de tentatives, réessaie plus tard",
+            headers={"Retry-After": str(int(retry) + 1)},
+        )
+
+    # accès base hors de la boucle asyncio, bcrypt sur son pool dédié
+    user = await run_in_threadpool(_find_user, db, form_data.username)
     if not user or not user.hashed_password:
+        login_limiter.record_failure(form_data.username)
         raise HTTPException(status_code=401, detail="Bad credentials")
-    if not verify_password(form_data.password, user.hashed_password):
+    try:
+        ok, new_hash = await verify_and_update_password(form_data.password, user.hashed_password)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Serveur occupé, réessaie dans quelques secondes")
+    if not ok:
+        login_limiter.record_failure(form_data.username)
         raise HTTPException(status_code=401, detail="Bad credentials")
-    return Token(access_token=create_access_token(subject=user.email))
+    if not user.is_active:
+        raise HTTPException(status_code=401, detail="Inactive user")
+
+    login_limiter.reset(form_data.username)
+    # lus avant le commit du re-hash, qui expire l'objet: pas de rechargement en base depuis la boucle asyncio
+    subject = user.email
+    claims = {"uid": user.id, "role": user.role.value} if settings.AUTH_STATELESS_CLAIMS else None
+    if new_hash:
+        # coût bcrypt modifié depuis la création du compte: re-hash transparent
+        await run_in_threadpool(_save_rehash, db, user, new_hash)
+
+    return Token(access_token=create_access_token(subject=subject, claims=claims))
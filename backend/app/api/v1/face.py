@@ -1,22 +1,39 @@
 # app/api/v1/face.py
+import asyncio
 import io
-import json
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
-import cv2
-from PIL import Image, ImageOps
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.api.deps import get_db, require_teacher_or_admin, require_admin
+from app.core.config import settings
+from app.core.metrics import FACES_PER_IMAGE, FACES_REJECTED, GALLERY_SIZE, inc, observe, stage
 from app.models.user import User, RoleEnum
 from app.models.student_face import StudentFace
 from app.models.session import Session as SessionModel
 from app.models.user_group import UserGroup
-from app.models.attendance import Attendance, AttendanceStatus
+from app.models.recognition_job import JobStatus, RecognitionJob
+from app.schemas.auth import CurrentUser
+from app.services.attendance_marking import mark_present
+from app.services.face_ann import face_index
+from app.services.face_embedding import encode_embedding
+from app.services.face_image import MAX_SIZE, ImageDecodeError, decode_image
+from app.services.face_gallery import gallery_cache, invalidate_student, invalidate_students
+from app.services.face_matching import match_faces
+from app.services.face_result_cache import content_digest, get_analysis, put_analysis, result_cache
+from app.services.face_inference import InferenceBusy, InferenceUnavailable, get_backend
+from app.services.face_models import MODELS_DIR, SFACE_PATH, YUNET_PATH, ModelPoolTimeout, model_pool
+from app.services.face_tiling import analyze_tiled
+from app.services.recognition_jobs import JobFailed, QueueFull, enqueue, job_to_dict
 
 router = APIRouter()
 
@@ -24,18 +41,14 @@ router = APIRouter()
 # 0.35~0.55 selon caméra/qualité. Commence à 0.40 puis ajuste.
 COSINE_THRESHOLD = 0.40
 
-# Taille max pour stabilité/perf
-MAX_SIZE = 1280
+# Nombre de candidats retenus par visage lors du matching
+MATCH_TOP_K = 3
 
-# Project root = .../app/api/v1/face.py -> parents[3] => project root
-PROJECT_ROOT = Path(__file__).resolve().parents[3]
-MODELS_DIR = PROJECT_ROOT / "models"
+# Enregistrement en masse: taille max d'une image extraite d'un ZIP
+BULK_MAX_FILE_BYTES = 20 * 1024 * 1024
 
-YUNET_PATH = MODELS_DIR / "face_detection_yunet_2023mar.onnx"
-SFACE_PATH = MODELS_DIR / "face_recognition_sface_2021dec.onnx"
-
-_detector = None
-_recognizer = None
+# GET /face/jobs/{job_id}?wait=: intervalle de relecture de la tâche
+JOB_WAIT_POLL_SECONDS = 0.5
 
 
 def _require_models():
@@ -51,76 +64,77 @@ def _require_models():
         )
 
 
-def _load_models_if_needed(img_w: int, img_h: int):
-    global _detector, _recognizer
+def _analyze(
+    bgr: np.ndarray, endpoint: str, max_faces: Optional[int] = None, tiled: bool = False
+) -> Tuple[np.ndarray, np.ndarray, List[Dict]]:
+    """Détection + contrôle qualité + encodage via le backend configuré (in-process ou pool de process)."""
     _require_models()
-
-    if _detector is None:
-        # params: model, config, input_size, score_threshold, nms_threshold, top_k
-        _detector = cv2.FaceDetectorYN_create(
-            str(YUNET_PATH), "", (img_w, img_h), 0.9, 0.3, 5000
-        )
-
-    if _recognizer is None:
-        _recognizer = cv2.FaceRecognizerSF_create(str(SFACE_PATH), "")
-
-    # important: YuNet doit connaître la taille de l'image courante
-    _detector.setInputSize((img_w, img_h))
-
-
-def _bytes_to_bgr(data: bytes) -> np.ndarray:
-    if not data:
-        raise HTTPException(status_code=400, detail="Fichier vide")
-
     try:
-        img = Image.open(io.BytesIO(data))
-    except Exception:
-        raise HTTPException(status_code=400, detail="Image invalide. Utilise un JPG/PNG standard.")
+        if tiled:
+            faces, feats, rejected = analyze_tiled(
+                get_backend(), bgr, settings.FACE_TILE_SIZE, settings.FACE_TILE_OVERLAP,
+                settings.FACE_TILE_WORKERS or model_pool.size,
+            )
+        else:
+            faces, feats, rejected = get_backend().analyze(bgr, max_faces=max_faces)
+    except InferenceBusy:
+        raise HTTPException(status_code=429, detail="Trop de photos en cours de traitement, réessaie dans quelques secondes")
+    except (ModelPoolTimeout, InferenceUnavailable):
+        raise HTTPException(status_code=503, detail="Serveur de reconnaissance saturé, réessaie dans quelques secondes")
 
-    img = ImageOps.exif_transpose(img)
-    img = img.convert("RGB")
+    observe(FACES_PER_IMAGE, len(faces) + len(rejected), endpoint)
+    for face in rejected:
+        for reason in face["reasons"]:
+            inc(FACES_REJECTED, reason)
+    return faces, feats, rejected
 
-    w, h = img.size
-    m = max(w, h)
-    if m > MAX_SIZE:
-        scale = MAX_SIZE / float(m)
-        img = img.resize((int(w * scale), int(h * scale)))
 
-    rgb = np.asarray(img, dtype=np.uint8)
-    rgb = np.require(rgb, dtype=np.uint8, requirements=["C_CONTIGUOUS"])
+def _analyze_upload(data: bytes, endpoint: str, tiled: bool, digest: str) -> Tuple[np.ndarray, np.ndarray, List[Dict]]:
+    """_analyze sur une photo envoyée, sans décodage ni inférence si la même photo a déjà été analysée."""
+    cached = get_analysis(digest, tiled)
+    if cached is not None:
+        return cached
+    bgr = _bytes_to_bgr(data, settings.FACE_TILED_MAX_SIZE if tiled else MAX_SIZE)
+    result = _analyze(bgr, endpoint, tiled=tiled)
+    put_analysis(digest, tiled, result)
+    return result
 
-    # OpenCV travaille en BGR
-    bgr = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
-    return bgr
 
+def _rejection_detail(rejected: List[Dict]) -> str:
+    reasons = sorted({r for face in rejected for r in face["reasons"]})
+    return f"Visage inexploitable ({', '.join(reasons)}). Photo de face, nette, bien éclairée."
 
-def _detect_faces(bgr: np.ndarray) -> np.ndarray:
-    h, w = bgr.shape[:2]
-    _load_models_if_needed(w, h)
 
-    # detect returns (retval, faces)
-    retval, faces = _detector.detect(bgr)
-    if faces is None or len(faces) == 0:
-        return np.empty((0, 15), dtype=np.float32)
-    return faces
+def _bytes_to_bgr(data: bytes, max_size: int = MAX_SIZE) -> np.ndarray:
+    try:
+        with stage("decode"):
+            return decode_image(data, max_size)
+    except ImageDecodeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
-def _extract_feature(bgr: np.ndarray, face_row: np.ndarray) -> np.ndarray:
-    """
-    face_row: [x, y, w, h, score, l0x,l0y, l1x,l1y, ..., l4x,l4y]
-    """
-    aligned = _recognizer.alignCrop(bgr, face_row)
-    feat = _recognizer.feature(aligned)  # shape (1, 128) float32
-    feat = feat.reshape(-1).astype(np.float32)
-    return feat
+def _detection_tiled(detection: Optional[str]) -> bool:
+    return (detection or settings.FACE_DETECTION_MODE) == "tiled"
 
 
-def _cosine_sim(a: np.ndarray, b: np.ndarray) -> float:
-    a = a.astype(np.float32)
-    b = b.astype(np.float32)
-    na = np.linalg.norm(a) + 1e-8
-    nb = np.linalg.norm(b) + 1e-8
-    return float(np.dot(a, b) / (na * nb))
+def _trim_templates(db: Session, student_ids: List[int]) -> Dict[int, int]:
+    """Garde au plus FACE_MAX_TEMPLATES_PER_STUDENT modèles (les plus récents) par étudiant."""
+    rows = (
+        db.query(StudentFace.id, StudentFace.user_id)
+        .filter(StudentFace.user_id.in_(student_ids))
+        .order_by(StudentFace.user_id, StudentFace.id.desc())
+        .all()
+    )
+    kept: Dict[int, int] = {}
+    stale: List[int] = []
+    for fid, uid in rows:
+        if kept.get(uid, 0) >= settings.FACE_MAX_TEMPLATES_PER_STUDENT:
+            stale.append(fid)
+        else:
+            kept[uid] = kept.get(uid, 0) + 1
+    if stale:
+        db.query(StudentFace).filter(StudentFace.id.in_(stale)).delete(synchronize_session=False)
+    return kept
 
 
 @router.get("/status")
@@ -131,6 +145,10 @@ def face_status():
         "yunet_exists": YUNET_PATH.exists(),
         "sface_exists": SFACE_PATH.exists(),
         "cosine_threshold": COSINE_THRESHOLD,
+        "template_mode": settings.FACE_TEMPLATE_MODE,
+        "max_templates_per_student": settings.FACE_MAX_TEMPLATES_PER_STUDENT,
+        "inference_mode": settings.FACE_INFERENCE_MODE,
+        "model_pool_size": model_pool.size,
     }
 
 
@@ -138,8 +156,9 @@ def face_status():
 def register_face(
     student_id: int,
     file: UploadFile = File(...),
+    replace: bool = Query(False, description="Supprime les modèles existants de l'étudiant"),
     db: Session = Depends(get_db),
-    _: User = Depends(require_admin),
+    _: CurrentUser = Depends(require_admin),
 ):
     student = (
         db.query(User)
@@ -152,108 +171,324 @@ def register_face(
     data = file.file.read()
     bgr = _bytes_to_bgr(data)
 
-    faces = _detect_faces(bgr)
+    faces, feats, rejected = _analyze(bgr, "register", max_faces=1)
+    if len(faces) == 0 and rejected:
+        raise HTTPException(status_code=400, detail=_rejection_detail(rejected))
     if len(faces) == 0:
         raise HTTPException(status_code=400, detail="Aucun visage détecté. Photo de face, bien éclairée.")
     if len(faces) > 1:
         raise HTTPException(status_code=400, detail="Plusieurs visages détectés. Envoie une photo avec un seul visage.")
 
-    feat = _extract_feature(bgr, faces[0])
-    enc_json = json.dumps(feat.tolist())
+    if replace:
+        db.query(StudentFace).filter(StudentFace.user_id == student_id).delete(synchronize_session=False)
+    db.add(StudentFace(user_id=student_id, embedding=encode_embedding(feats[0])))
+    db.flush()
+    templates = _trim_templates(db, [student_id]).get(student_id, 0)
+
+    db.commit()
+    invalidate_student(db, student_id)
+    return {"message": "Visage enregistré (OpenCV SFace)", "student_id": student_id, "templates": templates}
+
+
+def _bulk_key(name: str) -> str:
+    """Clé étudiant d'un fichier: 12.jpg -> 12, jane@ecole.ma/face1.jpg -> jane@ecole.ma."""
+    parts = [p for p in name.replace("\\", "/").split("/") if p]
+    if len(parts) > 1:
+        return parts[-2].strip()
+    stem = parts[-1] if parts else ""
+    return stem.rsplit(".", 1)[0].strip() if "." in stem else stem.strip()
+
+
+def _bulk_entries(files: List[UploadFile]) -> List[Tuple[str, bytes]]:
+    """(nom, contenu) pour chaque image envoyée; les ZIP sont dépliés."""
+    entries: List[Tuple[str, bytes]] = []
+    for up in files:
+        data = up.file.read()
+        name = up.filename or ""
+        if name.lower().endswith(".zip") or zipfile.is_zipfile(io.BytesIO(data)):
+            try:
+                zf = zipfile.ZipFile(io.BytesIO(data))
+            except zipfile.BadZipFile:
+                raise HTTPException(status_code=400, detail=f"ZIP invalide: {name}")
+            with zf:
+                for info in zf.infolist():
+                    if info.is_dir() or info.filename.startswith("__MACOSX/"):
+                        continue
+                    if info.file_size > BULK_MAX_FILE_BYTES:
+                        raise HTTPException(status_code=413, detail=f"Fichier trop volumineux dans le ZIP: {info.filename}")
+                    entries.append((info.filename, zf.read(info)))
+                    if len(entries) > settings.FACE_BULK_MAX_FILES:
+                        break
+        else:
+            entries.append((name, data))
+        if len(entries) > settings.FACE_BULK_MAX_FILES:
+            raise HTTPException(status_code=413, detail=f"Maximum {settings.FACE_BULK_MAX_FILES} images par envoi")
+    return entries
+
+
+def _embed_single_face(data: bytes) -> Tuple[str, Optional[np.ndarray], Optional[str]]:
+    try:
+        bgr = _bytes_to_bgr(data)
+        faces, feats, rejected = _analyze(bgr, "register_bulk", max_faces=1)
+    except HTTPException as e:
+        return ("invalid_image" if e.status_code == 400 else "error"), None, str(e.detail)
+    except Exception:
+        return "error", None, "Erreur pendant l'analyse de l'image"
+    if len(faces) == 0 and rejected:
+        return "low_quality", None, _rejection_detail(rejected)
+    if len(faces) == 0:
+        return "no_face", None, "Aucun visage détecté"
+    if len(faces) > 1:
+        return "multiple_faces", None, "Plusieurs visages détectés"
+    return "ok", feats[0], None
+
+
+@router.post("/register-bulk")
+def register_faces_bulk(
+    files: List[UploadFile] = File(..., description="Images nommées <student_id|email>.jpg, ou ZIP (éventuellement <student>/photo.jpg)"),
+    replace: bool = Query(False, description="Supprime les modèles existants des étudiants concernés"),
+    db: Session = Depends(get_db),
+    _: CurrentUser = Depends(require_admin),
+):
+    entries = _bulk_entries(files)
+    if not entries:
+        raise HTTPException(status_code=400, detail="Aucune image reçue")
+
+    keys = {name: _bulk_key(name) for name, _ in entries}
+    ids = {int(k) for k in keys.values() if k.isdigit()}
+    emails = {k.lower() for k in keys.values() if not k.isdigit() and "@" in k}
+
+    students: Dict[str, int] = {}
+    if ids:
+        for uid, in db.query(User.id).filter(User.id.in_(ids), User.role == RoleEnum.STUDENT):
+            students[str(uid)] = uid
+    if emails:
+        for uid, email in db.query(User.id, User.email).filter(User.email.in_(emails), User.role == RoleEnum.STUDENT):
+            students[email.lower()] = uid
+
+    report: List[Dict[str, Any]] = []
+    todo: List[Tuple[int, str, int, bytes]] = []
+    for name, data in entries:
+        key = keys[name]
+        uid = students.get(key if key.isdigit() else key.lower())
+        report.append({"file": name, "student_id": uid, "status": None})
+        if uid is None:
+            report[-1].update(status="unknown_student", detail=f"Étudiant introuvable: {key}")
+        else:
+            todo.append((len(report) - 1, name, uid, data))
+
+    # décodage + encodage en parallèle (chaque tâche emprunte son propre modèle)
+    workers = max(1, min(len(todo), settings.FACE_BULK_WORKERS or model_pool.size))
+    new_rows: List[StudentFace] = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(lambda t: _embed_single_face(t[3]), todo)
+        for (idx, _name, uid, _data), (status, feat, detail) in zip(todo, results):
+            report[idx]["status"] = status
+            if detail:
+                report[idx]["detail"] = detail
+            if feat is not None:
+                new_rows.append(StudentFace(user_id=uid, embedding=encode_embedding(feat)))
+
+    # une seule transaction pour tout le lot
+    touched = sorted({r.user_id for r in new_rows})
+    templates: Dict[int, int] = {}
+    if touched:
+        if replace:
+            db.query(StudentFace).filter(StudentFace.user_id.in_(touched)).delete(synchronize_session=False)
+        db.add_all(new_rows)
+        db.flush()
+        templates = _trim_templates(db, touched)
+        db.commit()
+        invalidate_students(db, touched)
+
+    return {
+        "files": len(report),
+        "registered": len(new_rows),
+        "students": len(touched),
+        "templates": {str(k): v for k, v in templates.items()},
+        "report": report,
+    }
+
 
-    sf = db.query(StudentFace).filter(StudentFace.user_id == student_id).first()
-    if sf:
-        sf.encoding = enc_json
+@router.post("/identify")
+def identify_faces(
+    file: UploadFile = File(...),
+    top_k: int = Query(MATCH_TOP_K, ge=1, le=10),
+    detection: Optional[str] = Query(None, regex="^(standard|tiled)$"),
+    db: Session = Depends(get_db),
+    _: CurrentUser = Depends(require_teacher_or_admin),
+):
+    """Identifie les visages parmi tous les étudiants enregistrés (index ANN), sans marquer de présence."""
+    tiled = _detection_tiled(detection)
+    data = file.file.read()
+    with stage("hash"):
+        digest = content_digest(data)
+    faces, feats, rejected = _analyze_upload(data, "identify", tiled, digest)
+    if len(faces) == 0 and rejected:
+        raise HTTPException(status_code=400, detail=_rejection_detail(rejected))
+    if len(faces) == 0:
+        raise HTTPException(status_code=400, detail="Aucun visage détecté sur l'image envoyée")
+
+    with stage("gallery"):
+        index = face_index.get(db)
+    observe(GALLERY_SIZE, len(index), "all")
+    with stage("match"):
+        matches = index.match(feats, COSINE_THRESHOLD, top_k=top_k)
+    ids = {m.user_id for m in matches if m.user_id is not None}
+    names = {
+        uid: f"{first} {last}"
+        for uid, first, last in db.query(User.id, User.first_name, User.last_name).filter(User.id.in_(ids))
+    } if ids else {}
+    return {
+        "faces_in_image": int(len(faces)),
+        "rejected_faces": rejected,
+        "faces": [
+            {
+                "face_index": m.face_index,
+                "user_id": m.user_id,
+                "name": names.get(m.user_id),
+                "similarity": m.similarity,
+                "candidates": [{"user_id": uid, "similarity": sim} for uid, sim in m.candidates],
+            }
+            for m in matches
+        ],
+    }
+
+
+def _recognize(db: Session, sess: SessionModel, data: bytes, scope: str, tiled: bool) -> Dict[str, Any]:
+    """Reconnaissance + marquage des présents pour une photo de séance (synchrone ou tâche de fond)."""
+    session_id = sess.id
+    if scope == "all":
+        with stage("gallery"):
+            index = face_index.get(db)
+        observe(GALLERY_SIZE, len(index), scope)
+        if len(index) == 0:
+            raise HTTPException(status_code=400, detail="Aucun visage enregistré")
+    else:
+        with stage("gallery"):
+            gallery = gallery_cache.get(db, sess.group_id)
+        observe(GALLERY_SIZE, len(gallery), scope)
+        if len(gallery) == 0:
+            if not db.query(UserGroup).filter(UserGroup.group_id == sess.group_id).first():
+                raise HTTPException(status_code=400, detail="Aucun étudiant dans ce groupe")
+            raise HTTPException(status_code=400, detail="Aucun visage enregistré pour ce groupe")
+
+    with stage("hash"):
+        digest = content_digest(data)
+    # même photo, même séance, même galerie: résultat précédent (renvoi après coupure réseau)
+    cache_key = (digest, session_id, scope, tiled, face_index.version if scope == "all" else gallery.version)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        recognized, faces_in_image, rejected = cached
     else:
-        db.add(StudentFace(user_id=student_id, encoding=enc_json))
+        faces, feats, rejected = _analyze_upload(data, "mark", tiled, digest)
+        if len(faces) == 0 and rejected:
+            raise HTTPException(status_code=400, detail=_rejection_detail(rejected))
+        if len(faces) == 0:
+            raise HTTPException(status_code=400, detail="Aucun visage détecté sur l'image envoyée")
+
+        with stage("match"):
+            if scope == "all":
+                matches = index.match(feats, COSINE_THRESHOLD, top_k=MATCH_TOP_K)
+            else:
+                matches = match_faces(
+                    feats, gallery.matrix, gallery.user_ids, COSINE_THRESHOLD,
+                    top_k=MATCH_TOP_K, offsets=gallery.offsets,
+                )
 
-    db.commit()
-    return {"message": "Visage enregistré (OpenCV SFace)", "student_id": student_id}
+        recognized: List[Dict[str, Any]] = [
+            {"user_id": m.user_id, "similarity": m.similarity} for m in matches if m.user_id is not None
+        ]
+        if not recognized:
+            raise HTTPException(
+                status_code=404,
+                detail="Aucun étudiant reconnu. (Photo floue/loin, ou seuil trop strict).",
+            )
+        faces_in_image = int(len(faces))
+        result_cache.put(cache_key, (recognized, faces_in_image, rejected))
+
+    now = datetime.utcnow()
+    # un seul INSERT idempotent pour tous les visages reconnus
+    with stage("db_write"):
+        newly_marked = mark_present(db, session_id, [r["user_id"] for r in recognized], now)
+        db.commit()
+
+    return {
+        "session_id": session_id,
+        "recognized": recognized,
+        "newly_marked": newly_marked,
+        "faces_in_image": faces_in_image,
+        "rejected_faces": rejected,
+        "cached": cached is not None,
+    }
 
 
 @router.post("/mark-attendance/{session_id}")
 def mark_attendance(
     session_id: int,
+    request: Request,
     file: UploadFile = File(...),
+    scope: str = Query("group", regex="^(group|all)$", description="all: tous les étudiants (salle d'examen multi-groupes)"),
+    detection: Optional[str] = Query(
+        None, regex="^(standard|tiled)$", description="tiled: tuiles à pleine résolution (grandes salles)"
+    ),
+    mode: str = Query(
+        "sync", regex="^(sync|async)$", description="async: réponse 202 immédiate, résultat via GET /face/jobs/{job_id}"
+    ),
     db: Session = Depends(get_db),
-    _: User = Depends(require_teacher_or_admin),
+    current: CurrentUser = Depends(require_teacher_or_admin),
 ):
     sess = db.query(SessionModel).filter(SessionModel.id == session_id).first()
     if not sess:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    student_ids = [
-        ug.user_id
-        for ug in db.query(UserGroup).filter(UserGroup.group_id == sess.group_id).all()
-    ]
-    if not student_ids:
-        raise HTTPException(status_code=400, detail="Aucun étudiant dans ce groupe")
-
-    face_rows = db.query(StudentFace).filter(StudentFace.user_id.in_(student_ids)).all()
-    if not face_rows:
-        raise HTTPException(status_code=400, detail="Aucun visage enregistré pour ce groupe")
-
-    known_feats: List[np.ndarray] = []
-    known_ids: List[int] = []
-    for fr in face_rows:
-        try:
-            v = np.array(json.loads(fr.encoding), dtype=np.float32)
-            if v.ndim != 1:
-                continue
-            known_feats.append(v)
-            known_ids.append(fr.user_id)
-        except Exception:
-            continue
-
-    if not known_feats:
-        raise HTTPException(status_code=400, detail="Encodages invalides en base. Ré-enregistre les visages.")
-
     data = file.file.read()
-    bgr = _bytes_to_bgr(data)
+    if mode == "sync":
+        return _recognize(db, sess, data, scope, _detection_tiled(detection))
 
-    faces = _detect_faces(bgr)
-    if len(faces) == 0:
-        raise HTTPException(status_code=400, detail="Aucun visage détecté sur l'image envoyée")
-
-    now = datetime.utcnow()
-    recognized: List[Dict[str, Any]] = []
-
-    for f in faces:
-        feat = _extract_feature(bgr, f)
-
-        # cherche meilleur match
-        best_sim = -1.0
-        best_uid: Optional[int] = None
-        for uid, kfeat in zip(known_ids, known_feats):
-            sim = _cosine_sim(feat, kfeat)
-            if sim > best_sim:
-                best_sim = sim
-                best_uid = uid
-
-        if best_uid is not None and best_sim >= COSINE_THRESHOLD:
-            recognized.append({"user_id": best_uid, "similarity": best_sim})
-
-            exists = (
-                db.query(Attendance)
-                .filter(Attendance.session_id == session_id, Attendance.user_id == best_uid)
-                .first()
-            )
-            if not exists:
-                db.add(
-                    Attendance(
-                        session_id=session_id,
-                        user_id=best_uid,
-                        status=AttendanceStatus.PRESENT,
-                        timestamp=now,
-                    )
-                )
-
-    db.commit()
+    try:
+        job = enqueue(db, session_id, sess.start_time, data, scope, detection, current.id)
+    except QueueFull:
+        raise HTTPException(status_code=429, detail="Trop de photos en attente, réessaie dans quelques minutes")
+    return JSONResponse(
+        status_code=202,
+        content=jsonable_encoder(job_to_dict(db, job)),
+        headers={"Location": str(request.url_for("get_job", job_id=job.id))},
+    )
 
-    if not recognized:
-        raise HTTPException(
-            status_code=404,
-            detail="Aucun étudiant reconnu. (Photo floue/loin, ou seuil trop strict).",
-        )
 
-    return {"session_id": session_id, "recognized": recognized, "faces_in_image": int(len(faces))}
+def run_mark_job(db: Session, job: RecognitionJob) -> Dict[str, Any]:
+    """Handler des workers de app/services/recognition_jobs.py: même traitement que le mode synchrone."""
+    sess = db.get(SessionModel, job.session_id)
+    if sess is None:
+        raise JobFailed(404, "Session not found")
+    try:
+        return _recognize(db, sess, job.image, job.scope, _detection_tiled(job.detection))
+    except HTTPException as e:
+        # serveur saturé: la tâche est remise en file
+        raise JobFailed(e.status_code, str(e.detail), retry=e.status_code in (429, 503))
+
+
+def _load_job(db: Session, job_id: int, user: CurrentUser) -> Dict[str, Any]:
+    db.expire_all()
+    job = db.get(RecognitionJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Tâche introuvable")
+    if user.role != RoleEnum.ADMIN and job.created_by != user.id:
+        raise HTTPException(status_code=403, detail="Tâche d'un autre utilisateur")
+    return job_to_dict(db, job)
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: int,
+    wait: float = Query(0, ge=0, le=30, description="Attend jusqu'à N secondes que la tâche se termine"),
+    db: Session = Depends(get_db),
+    current: CurrentUser = Depends(require_teacher_or_admin),
+):
+    deadline = time.monotonic() + wait
+    while True:
+        job = await run_in_threadpool(_load_job, db, job_id, current)
+        if job["status"] in (JobStatus.DONE.value, JobStatus.FAILED.value) or time.monotonic() >= deadline:
+            return job
+        await asyncio.sleep(JOB_WAIT_POLL_SECONDS)
@@ -0,0 +1,236 @@
+# app/api/v1/face_stream.py
+"""Présence en continu depuis une caméra: WebSocket /face/stream/{session_id}?token=<jwt>.
+
+Le client envoie des images JPEG/PNG en messages binaires (et "stop" pour
+terminer). Seule la dernière image reçue est analysée, au plus
+FACE_STREAM_MAX_FPS fois par seconde; les autres sont ignorées. Chaque image
+analysée renvoie un message JSON {"event": "frame", ...}, et la fin un
+{"event": "summary", ...}.
+"""
+import asyncio
+import time
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Query, WebSocket
+from starlette.concurrency import run_in_threadpool
+from starlette.websockets import WebSocketDisconnect
+
+from app.api.deps import authenticate_token
+from app.api.v1.face import COSINE_THRESHOLD
+from app.core.config import settings
+from app.core.metrics import FACES_PER_IMAGE, observe, stage
+from app.db.session import SessionLocal
+from app.models.session import Session as SessionModel
+from app.models.user import RoleEnum
+from app.services.attendance_marking import mark_present
+from app.services.face_gallery import Gallery, gallery_cache
+from app.services.face_image import MAX_SIZE, ImageDecodeError, decode_image
+from app.services.face_inference import InferenceBusy, InferenceUnavailable, get_backend
+from app.services.face_matching import match_faces
+from app.services.face_models import ModelPoolTimeout, models_available
+from app.services.face_quality import assess_faces
+from app.services.face_tracking import FaceTracker
+
+try:  # serveur websockets (uvicorn[standard]): envoi vers un client parti
+    from websockets.exceptions import ConnectionClosed
+    _SEND_CLOSED: Tuple[type, ...] = (WebSocketDisconnect, RuntimeError, ConnectionClosed)
+except ImportError:
+    _SEND_CLOSED = (WebSocketDisconnect, RuntimeError)
+
+router = APIRouter()
+
+STREAM_MAX_FRAME_BYTES = 4 * 1024 * 1024
+
+# codes de fermeture applicatifs (4000-4999)
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_FORBIDDEN = 4403
+CLOSE_NOT_FOUND = 4404
+CLOSE_UNAVAILABLE = 4503
+
+
+class StreamRejected(Exception):
+    def __init__(self, code: int, reason: str):
+        super().__init__(reason)
+        self.code = code
+        self.reason = reason
+
+
+def _open_stream(session_id: int, token: str) -> int:
+    """Vérifie le token et la séance; retourne le groupe de la séance."""
+    db = SessionLocal()
+    try:
+        try:
+            user = authenticate_token(db, token)
+        except HTTPException as e:
+            raise StreamRejected(CLOSE_UNAUTHORIZED, str(e.detail))
+        if user.role not in (RoleEnum.ADMIN, RoleEnum.TEACHER):
+            raise StreamRejected(CLOSE_FORBIDDEN, "Teacher/Admin only")
+
+        sess = db.query(SessionModel).filter(SessionModel.id == session_id).first()
+        if not sess:
+            raise StreamRejected(CLOSE_NOT_FOUND, "Session not found")
+        if len(gallery_cache.get(db, sess.group_id)) == 0:
+            raise StreamRejected(CLOSE_NOT_FOUND, "Aucun visage enregistré pour ce groupe")
+        return sess.group_id
+    finally:
+        db.close()
+
+
+def _current_gallery(group_id: int) -> Gallery:
+    # relue à chaque image: un étudiant enregistré pendant le flux (invalidation du cache) est reconnu;
+    # sans accès base tant que la galerie en cache est valide
+    db = SessionLocal()
+    try:
+        return gallery_cache.get(db, group_id)
+    finally:
+        db.close()
+
+
+def _process_frame(tracker: FaceTracker, group_id: int, data: bytes) -> Tuple[dict, List[int]]:
+    """Détection à chaque image, encodage seulement des pistes non confirmées et de qualité suffisante."""
+    with stage("decode"):
+        bgr = decode_image(data, MAX_SIZE)
+    backend = get_backend()
+    faces = backend.detect(bgr)
+    observe(FACES_PER_IMAGE, len(faces), "stream")
+    tracks = tracker.update(faces)
+
+    todo = [i for i, t in enumerate(tracks) if tracker.needs_embedding(t)]
+    if todo:
+        # un visage flou ou de profil sera ré-évalué sur une image suivante
+        todo = [i for i, reasons in zip(todo, assess_faces(bgr, faces[todo])) if not reasons]
+    confirmed: List[int] = []
+    if todo:
+        feats = backend.features(bgr, faces[todo])
+        with stage("gallery"):
+            gallery = _current_gallery(group_id)
+        with stage("match"):
+            matches = match_faces(
+                feats, gallery.matrix, gallery.user_ids, COSINE_THRESHOLD, top_k=1, offsets=gallery.offsets,
+            )
+        for i, m in zip(todo, matches):
+            if tracker.add_vote(tracks[i], m.user_id, m.similarity):
+                confirmed.append(tracks[i].user_id)
+
+    info = {
+        "frame": tracker.frame,
+        "faces": int(len(faces)),
+        "embedded": len(todo),
+        "tracks": [t.to_dict() for t in tracks],
+    }
+    return info, confirmed
+
+
+def _mark(session_id: int, user_ids: List[int]) -> List[int]:
+    db = SessionLocal()
+    try:
+        newly = mark_present(db, session_id, user_ids)
+        db.commit()
+        return newly
+    finally:
+        db.close()
+
+
+async def _send(websocket: WebSocket, payload: dict) -> bool:
+    """False si le client est parti (exception selon le serveur: WebSocketDisconnect, RuntimeError, ConnectionClosed)."""
+    try:
+        await websocket.send_json(payload)
+        return True
+    except _SEND_CLOSED:
+        return False
+
+
+@router.websocket("/stream/{session_id}")
+async def attendance_stream(websocket: WebSocket, session_id: int, token: str = Query(...)):
+    await websocket.accept()
+    try:
+        if not models_available():
+            raise StreamRejected(CLOSE_UNAVAILABLE, "Modèles YuNet/SFace introuvables dans /models")
+        group_id = await run_in_threadpool(_open_stream, session_id, token)
+    except StreamRejected as e:
+        await websocket.close(code=e.code, reason=e.reason)
+        return
+
+    tracker = FaceTracker(
+        iou_threshold=settings.FACE_STREAM_TRACK_IOU,
+        max_missed=settings.FACE_STREAM_TRACK_MAX_MISSED,
+        confirm_votes=settings.FACE_STREAM_CONFIRM_VOTES,
+        reembed_every=settings.FACE_STREAM_REEMBED_EVERY,
+        max_embeds=settings.FACE_STREAM_MAX_EMBEDS_PER_TRACK,
+    )
+    min_interval = 1.0 / settings.FACE_STREAM_MAX_FPS if settings.FACE_STREAM_MAX_FPS > 0 else 0.0
+
+    # une seule image en attente: la plus récente remplace les précédentes
+    latest: List[Optional[bytes]] = [None]
+    stats = {"received": 0, "dropped": 0, "analyzed": 0, "busy": 0}
+    ready = asyncio.Event()
+    stopped = asyncio.Event()
+    disconnected = asyncio.Event()
+
+    async def receive_frames():
+        try:
+            while True:
+                msg = await websocket.receive()
+                if msg["type"] == "websocket.disconnect":
+                    disconnected.set()
+                    break
+                if msg.get("bytes"):
+                    stats["received"] += 1
+                    if len(msg["bytes"]) > STREAM_MAX_FRAME_BYTES or latest[0] is not None:
+                        stats["dropped"] += 1
+                    if len(msg["bytes"]) <= STREAM_MAX_FRAME_BYTES:
+                        latest[0] = msg["bytes"]
+                        ready.set()
+                elif (msg.get("text") or "").strip().lower() == "stop":
+                    break
+        except _SEND_CLOSED:
+            disconnected.set()
+        finally:
+            stopped.set()
+            ready.set()
+
+    receiver = asyncio.create_task(receive_frames())
+    marked: set = set()
+    next_at = 0.0
+    try:
+        while not stopped.is_set():
+            await ready.wait()
+            ready.clear()
+            wait = next_at - time.monotonic()
+            if wait > 0:
+                # échantillonnage: les images arrivées entre-temps remplacent celle-ci
+                await asyncio.sleep(wait)
+            data, latest[0] = latest[0], None
+            if data is None or stopped.is_set():
+                continue
+            next_at = time.monotonic() + min_interval
+
+            try:
+                info, confirmed = await run_in_threadpool(_process_frame, tracker, group_id, data)
+            except ImageDecodeError as e:
+                if not await _send(websocket, {"event": "error", "detail": str(e)}):
+                    disconnected.set()
+                    break
+                continue
+            except (InferenceBusy, ModelPoolTimeout, InferenceUnavailable):
+                stats["busy"] += 1
+                continue
+            stats["analyzed"] += 1
+
+            todo = [uid for uid in confirmed if uid not in marked]
+            newly: List[int] = []
+            if todo:
+                newly = await run_in_threadpool(_mark, session_id, todo)
+                marked.update(todo)
+            if not await _send(websocket, {"event": "frame", **info, "newly_marked": newly, **stats}):
+                disconnected.set()
+                break
+
+        summary = {"event": "summary", "session_id": session_id, "marked": sorted(marked), **stats}
+        if not disconnected.is_set() and await _send(websocket, summary):
+            try:
+                await websocket.close()
+            except _SEND_CLOSED:
+                pass
+    finally:
+        receiver.cancel()
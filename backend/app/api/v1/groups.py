@@ -1,21 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.api.deps import get_db, require_admin
+from app.api.deps import get_db, get_read_db, require_admin
+from app.api.pagination import paginated, parse_fields, select_fields
 from app.models.group import Group
 from app.models.user import User, RoleEnum
 from app.models.user_group import UserGroup
 from app.schemas.group import GroupCreate, GroupOut
+from app.schemas.auth import CurrentUser
+from app.services.attendance_stats import rebuild_group
+from app.services.face_gallery import gallery_cache
+from app.services.pagination import MAX_LIMIT
 
 router = APIRouter()
 
+GROUP_SORT = [(Group.id, False)]
+
 @router.get("/", response_model=List[GroupOut])
-def list_groups(db: Session = Depends(get_db), _: User = Depends(require_admin)):
-    return db.query(Group).all()
+def list_groups(
+    response: Response,
+    db: Session = Depends(get_read_db),
+    _: CurrentUser = Depends(require_admin),
+    q: Optional[str] = Query(None, min_length=1, description="préfixe du nom"),
+    student_id: Optional[int] = Query(None),
+    fields: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT, description="sans limit ni cursor: liste complète"),
+):
+    cols = parse_fields(fields, GroupOut)
+    query = select_fields(db, Group, cols, GROUP_SORT)
+    if q:
+        query = query.filter(Group.name.like(f"{q}%"))
+    if student_id:
+        query = query.join(UserGroup, UserGroup.group_id == Group.id).filter(UserGroup.user_id == student_id)
+    return paginated(query, GROUP_SORT, cursor, limit, cols, response)
 
 @router.post("/", response_model=GroupOut)
-def create_group(payload: GroupCreate, db: Session = Depends(get_db), _: User = Depends(require_admin)):
+def create_group(payload: GroupCreate, db: Session = Depends(get_db), _: CurrentUser = Depends(require_admin)):
     g = Group(name=payload.name)
     db.add(g)
     db.commit()
@@ -23,13 +46,17 @@ def create_group(payload: GroupCreate, db: Session = Depends(get_db), _: User =
     return g
 
 @router.post("/{group_id}/add-student/{student_id}")
-def add_student(group_id: int, student_id: int, db: Session = Depends(get_db), _: User = Depends(require_admin)):
+def add_student(group_id: int, student_id: int, db: Session = Depends(get_db), _: CurrentUser = Depends(require_admin)):
     if not db.query(Group).filter(Group.id == group_id).first():
         raise HTTPException(status_code=404, detail="Group not found")
     if not db.query(User).filter(User.id == student_id, User.role == RoleEnum.STUDENT).first():
         raise HTTPException(status_code=404, detail="Student not found")
     if db.query(UserGroup).filter(UserGroup.group_id == group_id, UserGroup.user_id == student_id).first():
         return {"message": "Already in group"}
-    db.add(UserGroup(group_id=group_id, user_id=student_id))
+    db.add(UserGroup(group_id=group_id, user_id=student_id, created_at=datetime.utcnow()))
+    db.flush()
+    # ligne de statistiques vide: seules les séances à venir compteront
+    rebuild_group(db, group_id, [student_id])
     db.commit()
+    gallery_cache.invalidate_group(group_id)
     return {"message": "Student added"}
@@ -1,21 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.api.deps import get_db, require_admin
+from app.api.deps import get_db, get_read_db, require_admin, require_teacher_or_admin
+from app.api.pagination import paginated, parse_fields, select_fields
 from app.models.session import Session as SessionModel
 from app.models.group import Group
 from app.schemas.session import SessionCreate, SessionOut
-from app.models.user import User
+from app.schemas.auth import CurrentUser
+from app.services.attendance_stats import close_session
+from app.services.pagination import MAX_LIMIT
 
 router = APIRouter()
 
+# plus récentes d'abord; id départage les séances de même début
+SESSION_SORT = [(SessionModel.start_time, True), (SessionModel.id, True)]
+
 @router.get("/", response_model=List[SessionOut])
-def list_sessions(db: Session = Depends(get_db), _: User = Depends(require_admin)):
-    return db.query(SessionModel).order_by(SessionModel.start_time.desc()).all()
+def list_sessions(
+    response: Response,
+    db: Session = Depends(get_read_db),
+    _: CurrentUser = Depends(require_admin),
+    group_id: Optional[int] = Query(None),
+    teacher_id: Optional[int] = Query(None),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    fields: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT, description="sans limit ni cursor: liste complète"),
+):
+    cols = parse_fields(fields, SessionOut)
+    query = select_fields(db, SessionModel, cols, SESSION_SORT)
+    if group_id:
+        query = query.filter(SessionModel.group_id == group_id)
+    if teacher_id:
+        query = query.filter(SessionModel.teacher_id == teacher_id)
+    if date_from:
+        query = query.filter(SessionModel.start_time >= date_from)
+    if date_to:
+        query = query.filter(SessionModel.start_time < date_to)
+    return paginated(query, SESSION_SORT, cursor, limit, cols, response)
 
 @router.post("/", response_model=SessionOut)
-def create_session(payload: SessionCreate, db: Session = Depends(get_db), _: User = Depends(require_admin)):
+def create_session(payload: SessionCreate, db: Session = Depends(get_db), _: CurrentUser = Depends(require_admin)):
     if not db.query(Group).filter(Group.id == payload.group_id).first():
         raise HTTPException(status_code=404, detail="Group not found")
     s = SessionModel(
@@ -28,3 +56,13 @@ def create_session(payload: SessionCreate, db: Session = Depends(get_db), _: Use
     db.commit()
     db.refresh(s)
     return s
+
+@router.post("/{session_id}/close")
+def close(session_id: int, db: Session = Depends(get_db), _: CurrentUser = Depends(require_teacher_or_admin)):
+    """Clôture la séance: les absents sont comptés dans les statistiques (automatique après end_time)."""
+    if not db.query(SessionModel.id).filter(SessionModel.id == session_id).first():
+        raise HTTPException(status_code=404, detail="Session not found")
+    students = close_session(db, session_id)
+    db.commit()
+    closed_at = db.query(SessionModel.closed_at).filter(SessionModel.id == session_id).scalar()
+    return {"session_id": session_id, "closed_at": closed_at, "students_counted": students}
@@ -1,32 +1,93 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.api.deps import get_db, require_admin
-from app.models.user import User
-from app.schemas.user import UserCreate, UserOut
-from app.core.security import hash_password
+from app.api.deps import get_db, get_read_db, require_admin
+from app.api.pagination import paginated, parse_fields, select_fields
+from app.models.user import User, RoleEnum
+from app.models.user_group import UserGroup
+from app.schemas.user import UserCreate, UserOut, UserUpdate
+from app.core.security import PasswordHasherBusy, hash_password_async
+from app.schemas.auth import CurrentUser
+from app.services.pagination import MAX_LIMIT
+from app.services.user_cache import invalidate_user
 
 router = APIRouter()
 
+USER_SORT = [(User.id, False)]
+
 @router.get("/", response_model=List[UserOut])
-def list_users(db: Session = Depends(get_db), _: User = Depends(require_admin)):
-    return db.query(User).all()
+def list_users(
+    response: Response,
+    db: Session = Depends(get_read_db),
+    _: CurrentUser = Depends(require_admin),
+    role: Optional[RoleEnum] = Query(None),
+    group_id: Optional[int] = Query(None),
+    is_active: Optional[bool] = Query(None),
+    q: Optional[str] = Query(None, min_length=1, description="préfixe du nom, prénom ou email"),
+    fields: Optional[str] = Query(None, description="ex: id,first_name,last_name"),
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT, description="sans limit ni cursor: liste complète"),
+):
+    cols = parse_fields(fields, UserOut)
+    query = select_fields(db, User, cols, USER_SORT)
+    if role:
+        query = query.filter(User.role == role)
+    if is_active is not None:
+        query = query.filter(User.is_active == is_active)
+    if group_id:
+        query = query.join(UserGroup, UserGroup.user_id == User.id).filter(UserGroup.group_id == group_id)
+    if q:
+        prefix = f"{q}%"
+        query = query.filter(or_(User.last_name.like(prefix), User.first_name.like(prefix), User.email.like(prefix)))
+    return paginated(query, USER_SORT, cursor, limit, cols, response)
 
-@router.post("/", response_model=UserOut)
-def create_user(payload: UserCreate, db: Session = Depends(get_db), _: User = Depends(require_admin)):
-    if db.query(User).filter(User.email == payload.email).first():
-        raise HTTPException(status_code=400, detail="Email already exists")
+def _email_taken(db: Session, email: str) -> bool:
+    return db.query(User.id).filter(User.email == email).first() is not None
 
+def _insert_user(db: Session, payload: UserCreate, hashed: Optional[str]) -> User:
     u = User(
         first_name=payload.first_name,
         last_name=payload.last_name,
         email=payload.email,
         role=payload.role,
         is_active=True,
-        hashed_password=hash_password(payload.password) if payload.password else None,
+        hashed_password=hashed,
     )
     db.add(u)
     db.commit()
     db.refresh(u)
     return u
+
+@router.post("/", response_model=UserOut)
+async def create_user(payload: UserCreate, db: Session = Depends(get_db), _: CurrentUser = Depends(require_admin)):
+    # accès base hors de la boucle asyncio, bcrypt sur son pool dédié (comme /auth/login)
+    if await run_in_threadpool(_email_taken, db, payload.email):
+        raise HTTPException(status_code=400, detail="Email already exists")
+
+    hashed = None
+    if payload.password:
+        try:
+            hashed = await hash_password_async(payload.password)
+        except PasswordHasherBusy:
+            raise HTTPException(status_code=503, detail="Serveur occupé, réessaie dans quelques secondes")
+    u = await run_in_threadpool(_insert_user, db, payload, hashed)
+    invalidate_user(u.email)
+    return u
+
+@router.patch("/{user_id}", response_model=UserOut)
+def update_user(
+    user_id: int, payload: UserUpdate, db: Session = Depends(get_db), _: CurrentUser = Depends(require_admin)
+):
+    u = db.get(User, user_id)
+    if not u:
+        raise HTTPException(status_code=404, detail="User not found")
+    for field, value in payload.dict(exclude_unset=True, exclude_none=True).items():
+        setattr(u, field, value)
+    db.commit()
+    db.refresh(u)
+    # rôle / désactivation pris en compte dès la requête suivante (voir AUTH_USER_CACHE_TTL)
+    invalidate_user(u.email)
+    return u
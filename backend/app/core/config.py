@@ -1,10 +1,128 @@
+from typing import Literal, Optional
+
 from pydantic import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "mysql+pymysql://root:@localhost:3306/auto_absence"
+    # Réplica optionnel pour les lectures (listes, exports)
+    DATABASE_READ_URL: Optional[str] = None
+    # Pool de connexions SQLAlchemy
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_TIMEOUT: float = 30.0
+    # Pre-ping: "always" (à chaque emprunt), "idle" (après inactivité), "never"
+    # (valeurs fermées: une faute de frappe fait échouer le démarrage au lieu de couper le pre-ping)
+    DB_PRE_PING: Literal["always", "idle", "never"] = "idle"
+    DB_PRE_PING_IDLE_SECONDS: float = 60.0
+    # Applique app/db/migrations.py au démarrage
+    DB_AUTO_MIGRATE: bool = True
     SECRET_KEY: str = "CHANGE_ME_SUPER_SECRET"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24
 
+    # Cache des utilisateurs authentifiés (get_current_user), par process; TTL 0 = désactivé.
+    # Révocation (PATCH /users/{id}: rôle, désactivation): immédiate dans le worker qui traite la
+    # modification, au plus AUTH_USER_CACHE_TTL secondes dans les autres (ou après une modification en SQL).
+    AUTH_USER_CACHE_TTL: float = 30.0
+    AUTH_USER_CACHE_SIZE: int = 10000
+    # id + rôle dans le token: aucun accès base pour les contrôles de rôle tant que le token a moins de
+    # AUTH_STATELESS_MAX_AGE_MINUTES; au-delà, vérification en base comme sans l'option.
+    # Révocation: au plus AUTH_STATELESS_MAX_AGE_MINUTES minutes + AUTH_USER_CACHE_TTL secondes.
+    AUTH_STATELESS_CLAIMS: bool = False
+    AUTH_STATELESS_MAX_AGE_MINUTES: int = 5
+
+    # bcrypt: coût, pool dédié (hors threadpool API) et file max avant 503
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 64
+    # Limitation des échecs de connexion par compte, par process (N workers = N x LOGIN_MAX_FAILURES)
+    LOGIN_MAX_FAILURES: int = 5
+    LOGIN_FAILURE_WINDOW: float = 300.0
+
+    # Cache des galeries d'encodages par groupe (face/mark-attendance)
+    FACE_GALLERY_CACHE_SIZE: int = 256
+    FACE_GALLERY_CACHE_TTL: float = 300.0
+    # Stockage des encodages: "float32" (512 o) ou "float16" (256 o)
+    FACE_EMBEDDING_DTYPE: Literal["float32", "float16"] = "float32"
+    # Plusieurs modèles par étudiant; "all" = max sur les modèles, "mean" = modèle moyen
+    FACE_MAX_TEMPLATES_PER_STUDENT: int = 5
+    FACE_TEMPLATE_MODE: Literal["all", "mean"] = "all"
+    # POST /face/register-bulk (0 workers = taille du pool de modèles)
+    FACE_BULK_MAX_FILES: int = 500
+    FACE_BULK_WORKERS: int = 0
+    # Pool d'instances YuNet/SFace (0 = nombre de coeurs)
+    FACE_MODEL_POOL_SIZE: int = 0
+    FACE_MODEL_POOL_TIMEOUT: float = 30.0
+    # Threads OpenCV du process API (mode inprocess). 0 = 1 dès que le pool a plus d'une instance
+    # (les inférences parallèles occupent déjà les coeurs), défaut OpenCV sinon
+    FACE_CV_THREADS: int = 0
+    # "inprocess" (pool de modèles dans le worker API) ou "process" (pool de process dédiés)
+    FACE_INFERENCE_MODE: Literal["inprocess", "process"] = "inprocess"
+    FACE_PROCESS_WORKERS: int = 0
+    FACE_PROCESS_QUEUE_SIZE: int = 32
+    FACE_INFERENCE_TIMEOUT: float = 60.0
+    # Détection YuNet puis contrôle qualité avant encodage SFace (taille en px,
+    # netteté = variance du Laplacien, lacet/tangage estimés depuis les 5 points)
+    # seuil YuNet d'acceptation; contrôle qualité actif, le détecteur descend à
+    # FACE_QUALITY_DETECTION_SCORE pour rapporter les visages peu sûrs (low_score) sans les garder
+    FACE_DETECTION_SCORE_THRESHOLD: float = 0.9
+    FACE_QUALITY_ENABLED: bool = True
+    FACE_QUALITY_DETECTION_SCORE: float = 0.7
+    FACE_QUALITY_MIN_SIZE: int = 40
+    FACE_QUALITY_MIN_SCORE: float = 0.9
+    FACE_QUALITY_MIN_SHARPNESS: float = 30.0
+    FACE_QUALITY_MAX_YAW: float = 0.5
+    FACE_QUALITY_MAX_PITCH: float = 0.3
+    # Détection "tiled" (photos d'amphi): tuiles à résolution d'origine (côté max FACE_TILED_MAX_SIZE),
+    # en parallèle (0 worker = taille du pool de modèles). FACE_DETECTION_MODE = mode par défaut
+    FACE_DETECTION_MODE: Literal["standard", "tiled"] = "standard"
+    FACE_TILED_MAX_SIZE: int = 4096
+    # Images refusées au-delà de ce nombre de pixels (lu dans l'en-tête, avant tout décodage):
+    # un PNG de quelques Ko peut décrire une image de plusieurs Go une fois décodée. 0 = sans limite
+    FACE_IMAGE_MAX_PIXELS: int = 50_000_000
+    FACE_TILE_SIZE: int = 960
+    FACE_TILE_OVERLAP: int = 160
+    FACE_TILE_WORKERS: int = 0
+    # Flux vidéo (WS /face/stream/{session_id}): images analysées/s, votes avant marquage,
+    # ré-encodage d'une piste non confirmée toutes les N images analysées, au plus M fois
+    FACE_STREAM_MAX_FPS: float = 5.0
+    FACE_STREAM_CONFIRM_VOTES: int = 3
+    FACE_STREAM_REEMBED_EVERY: int = 2
+    FACE_STREAM_MAX_EMBEDS_PER_TRACK: int = 10
+    FACE_STREAM_TRACK_IOU: float = 0.3
+    FACE_STREAM_TRACK_MAX_MISSED: int = 5
+    # Index IVF de tous les encodages (identification tous groupes, scope=all).
+    # Chemin vide = backend/data/face_ann.npz; 0 liste = ~sqrt(nombre d'encodages).
+    # NPROBE: listes parcourues par requête; les candidats sont re-classés exactement, mais un étudiant
+    # absent des listes parcourues est manqué (marquage scope=all): 32 garde le rappel proche de 1
+    FACE_ANN_INDEX_PATH: str = ""
+    FACE_ANN_NLIST: int = 0
+    FACE_ANN_NPROBE: int = 32
+    FACE_ANN_SYNC_INTERVAL: float = 60.0
+    # Photos renvoyées à l'identique (empreinte SHA-256): encodages réutilisés pour toute séance,
+    # résultat de reconnaissance réutilisé pour la même séance et la même galerie. Taille 0 = désactivé
+    FACE_EMBED_CACHE_SIZE: int = 256
+    FACE_EMBED_CACHE_TTL: float = 3600.0
+    FACE_RESULT_CACHE_SIZE: int = 1024
+    FACE_RESULT_CACHE_TTL: float = 900.0
+    # mark-attendance?mode=async: file persistante (table recognition_jobs) vidée par FACE_JOB_WORKERS threads
+    # par process API (0 = aucun, file vidée par recognition_worker.py); séance la plus ancienne d'abord
+    FACE_JOB_WORKERS: int = 2
+    FACE_JOB_POLL_INTERVAL: float = 1.0
+    FACE_JOB_MAX_QUEUED: int = 1000
+    FACE_JOB_MAX_ATTEMPTS: int = 3
+    FACE_JOB_STALE_SECONDS: float = 300.0
+    FACE_JOB_RETENTION_HOURS: float = 24.0
+    # Agrégats attendance_stats: séances terminées clôturées toutes les N secondes (0 = jamais), par lots;
+    # alerte à partir de N absences consécutives ou N absences au total (0 = critère ignoré)
+    ATTENDANCE_CLOSE_INTERVAL: float = 60.0
+    ATTENDANCE_CLOSE_BATCH: int = 500
+    ATTENDANCE_ALERT_STREAK: int = 3
+    ATTENDANCE_ALERT_ABSENCES: int = 0
+    # Métriques Prometheus (GET /metrics) et en-tête Server-Timing par requête
+    METRICS_ENABLED: bool = True
+    METRICS_SERVER_TIMING: bool = False
+
     class Config:
         env_file = ".env"
 
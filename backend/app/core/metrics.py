@@ -0,0 +1,240 @@
+"""Métriques du pipeline visage: exposition Prometheus (/metrics) et en-tête Server-Timing.
+
+Compteurs et histogrammes process-local (chaque worker uvicorn a les siens:
+Prometheus agrège par instance). Désactivé (METRICS_ENABLED=false et pas de
+Server-Timing), stage() renvoie un contexte vide partagé: aucun coût mesurable.
+"""
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+# secondes: du décodage (~ms) à l'inférence d'une grande photo (~s)
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FACE_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+GALLERY_SIZE_BUCKETS = (10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000)
+
+# durées par étape de la requête en cours (None = Server-Timing inactif)
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+
+def _labels(names: Sequence[str], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, doc: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, doc: str, buckets: Sequence[float], label_names: Sequence[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.buckets = tuple(buckets)
+        self.label_names = tuple(label_names)
+        # labels -> [compte par bucket..., somme, total]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            names = self.label_names + ("le",)
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (f'{bound:g}',))} {cumulative:g}")
+            lines.append(f"{self.name}_bucket{_labels(names, labels + ('+Inf',))} {series[-1]:g}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {series[-1]:g}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list = []
+
+    def counter(self, name: str, doc: str, label_names: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, doc, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, doc: str, buckets: Sequence[float], label_names: Sequence[str] = ()) -> Histogram:
+        metric = Histogram(name, doc, buckets, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+FACE_STAGE_SECONDS = registry.histogram(
+    "face_stage_seconds", "Durée des étapes du pipeline visage", STAGE_BUCKETS, ("stage",)
+)
+FACE_MODEL_LOAD_SECONDS = registry.histogram(
+    "face_model_load_seconds", "Chargement d'un couple YuNet + SFace", STAGE_BUCKETS
+)
+FACES_PER_IMAGE = registry.histogram(
+    "face_faces_per_image", "Visages détectés par image", FACE_COUNT_BUCKETS, ("endpoint",)
+)
+GALLERY_SIZE = registry.histogram(
+    "face_gallery_size", "Étudiants comparés par requête", GALLERY_SIZE_BUCKETS, ("scope",)
+)
+FACES_REJECTED = registry.counter(
+    "face_rejected_total", "Visages écartés par le contrôle qualité", ("reason",)
+)
+FACE_CACHE_LOOKUPS = registry.counter(
+    "face_cache_lookups_total", "Recherches dans les caches de photos déjà traitées", ("cache", "result")
+)
+
+
+def enabled() -> bool:
+    return settings.METRICS_ENABLED
+
+
+def observe(metric: Histogram, value: float, *labels: str) -> None:
+    if settings.METRICS_ENABLED:
+        metric.observe(value, *labels)
+
+
+def inc(metric: Counter, *labels: str, amount: float = 1.0) -> None:
+    if settings.METRICS_ENABLED:
+        metric.inc(*labels, amount=amount)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    if settings.METRICS_ENABLED:
+        FACE_STAGE_SECONDS.observe(seconds, name)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+class _Stage:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_stage(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+_NULL = nullcontext()
+
+
+def stage(name: str):
+    """with stage("detect"): ... — mesure une étape (histogramme + Server-Timing)."""
+    if not settings.METRICS_ENABLED and _request_timings.get() is None:
+        return _NULL
+    return _Stage(name)
+
+
+class StageClock:
+    """Durées collectées hors du process API (worker d'inférence), renvoyées avec le résultat."""
+
+    __slots__ = ("timings",)
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    def stage(self, name: str) -> "_ClockStage":
+        return _ClockStage(self, name)
+
+
+class _ClockStage:
+    __slots__ = ("clock", "name", "t0")
+
+    def __init__(self, clock: StageClock, name: str):
+        self.clock = clock
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.clock.timings[self.name] = self.clock.timings.get(self.name, 0.0) + time.perf_counter() - self.t0
+        return False
+
+
+def server_timing_header(timings: List[Tuple[str, float]], total: float) -> bytes:
+    merged: Dict[str, float] = {}
+    for name, seconds in timings:
+        merged[name] = merged.get(name, 0.0) + seconds
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in merged.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts).encode("latin-1")
+
+
+class ServerTimingMiddleware:
+    """Middleware ASGI: ajoute Server-Timing aux réponses quand METRICS_SERVER_TIMING est actif."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_SERVER_TIMING:
+            await self.app(scope, receive, send)
+            return
+
+        timings: List[Tuple[str, float]] = []
+        token = _request_timings.set(timings)
+        t0 = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing_header(timings, time.perf_counter() - t0)))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
@@ -1,20 +1,64 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min = max = BCRYPT_ROUNDS: un hash d'un autre coût est marqué à re-hasher au login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 ALGORITHM = "HS256"
 
+# bcrypt tourne sur son propre pool (bcrypt relâche le GIL), pas sur le
+# threadpool de l'API partagé avec la reconnaissance faciale
+_hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="pwhash")
+_hash_slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE)
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
-def create_access_token(subject: str, expires_minutes: Optional[int] = None) -> str:
+async def _run_hasher(fn, *args):
+    if not _hash_slots.acquire(blocking=False):
+        raise PasswordHasherBusy()
+    try:
+        future = _hash_executor.submit(fn, *args)
+    except BaseException:
+        _hash_slots.release()
+        raise
+    # place rendue quand le hash se termine réellement: une requête annulée
+    # (client parti) ne libère pas un slot dont le thread travaille encore
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return await asyncio.wrap_future(future)
+
+async def verify_and_update_password(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """(valide, nouveau hash si le coût configuré a changé)"""
+    return await _run_hasher(pwd_context.verify_and_update, plain, hashed)
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hasher(pwd_context.hash, password)
+
+def create_access_token(
+    subject: str, expires_minutes: Optional[int] = None, claims: Optional[Dict[str, Any]] = None
+) -> str:
     expire = datetime.utcnow() + timedelta(
         minutes=expires_minutes or settings.ACCESS_TOKEN_EXPIRE_MINUTES
     )
-    return jwt.encode({"sub": subject, "exp": expire}, settings.SECRET_KEY, algorithm=ALGORITHM)
+    payload = dict(claims or {})
+    payload.update({"sub": subject, "exp": expire, "iat": datetime.utcnow()})
+    return jwt.encode(payload, settings.SECRET_KEY, algorithm=ALGORITHM)
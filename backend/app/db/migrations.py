@@ -0,0 +1,211 @@
+"""Migrations de schéma versionnées, appliquées après Base.metadata.create_all.
+
+create_all crée les tables manquantes mais ne modifie jamais une table
+existante: chaque évolution d'une table déjà en production est une étape
+ci-dessous. Les étapes sont idempotentes (une base neuve créée depuis les
+modèles les traverse sans rien changer) et enregistrées dans schema_migrations.
+"""
+import logging
+from datetime import datetime
+from typing import Callable, List, Sequence, Tuple
+
+from sqlalchemy import DateTime, LargeBinary, Table, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.models.student_face import StudentFace
+
+logger = logging.getLogger(__name__)
+
+
+def _columns(conn: Connection, table: str):
+    return {c["name"]: c for c in inspect(conn).get_columns(table)}
+
+
+def _index_names(conn: Connection, table: str) -> set:
+    return {i["name"] for i in inspect(conn).get_indexes(table)}
+
+
+def create_index(conn: Connection, name: str, table: str, columns: Sequence[str]) -> bool:
+    if name in _index_names(conn, table):
+        return False
+    conn.execute(text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"))
+    logger.info("index %s créé sur %s(%s)", name, table, ", ".join(columns))
+    return True
+
+
+def drop_index(conn: Connection, name: str, table: str) -> bool:
+    if name not in _index_names(conn, table):
+        return False
+    if conn.dialect.name == "mysql":
+        conn.execute(text(f"DROP INDEX {name} ON {table}"))
+    else:
+        conn.execute(text(f"DROP INDEX {name}"))
+    return True
+
+
+def rebuild_sqlite_table(conn: Connection, table: Table) -> None:
+    """SQLite ne sait ni rendre une colonne nullable ni supprimer une contrainte:
+    recrée la table depuis le modèle et recopie les colonnes communes."""
+    old = f"{table.name}__old"
+    for name in _index_names(conn, table.name):
+        conn.execute(text(f'DROP INDEX "{name}"'))
+    conn.execute(text(f'ALTER TABLE "{table.name}" RENAME TO "{old}"'))
+    table.create(conn)
+    cols = ", ".join(f'"{c}"' for c in table.columns.keys() if c in _columns(conn, old))
+    conn.execute(text(f'INSERT INTO "{table.name}" ({cols}) SELECT {cols} FROM "{old}"'))
+    conn.execute(text(f'DROP TABLE "{old}"'))
+    logger.info("table %s reconstruite depuis le modèle", table.name)
+
+
+# --- étapes ---
+
+def _student_faces_binary_embedding(conn: Connection) -> None:
+    cols = _columns(conn, "student_faces")
+    if "embedding" not in cols:
+        blob_type = LargeBinary().compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE student_faces ADD COLUMN embedding {blob_type} NULL"))
+    if "created_at" not in cols:
+        dt_type = DateTime().compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE student_faces ADD COLUMN created_at {dt_type} NULL"))
+    if not cols["encoding"]["nullable"]:
+        if conn.dialect.name == "mysql":
+            conn.execute(text("ALTER TABLE student_faces MODIFY encoding TEXT NULL"))
+        elif conn.dialect.name == "postgresql":
+            conn.execute(text("ALTER TABLE student_faces ALTER COLUMN encoding DROP NOT NULL"))
+        elif conn.dialect.name != "sqlite":
+            logger.warning("%s: student_faces.encoding reste NOT NULL, le JSON est conservé", conn.dialect.name)
+        # SQLite: table reconstruite par _student_faces_sqlite_rebuild
+
+
+def _student_faces_multi_templates(conn: Connection) -> None:
+    """Plusieurs modèles par étudiant: remplace l'index unique sur user_id par un index simple."""
+    insp = inspect(conn)
+    unique_names = [
+        c["name"] for c in insp.get_unique_constraints("student_faces") if c["column_names"] == ["user_id"]
+    ] + [
+        i["name"] for i in insp.get_indexes("student_faces") if i["unique"] and i["column_names"] == ["user_id"]
+    ]
+    if not unique_names:
+        return
+
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        # reconstruite par _student_faces_sqlite_rebuild
+        return
+    if dialect not in ("mysql", "postgresql"):
+        logger.warning("%s: impossible de supprimer l'unicité de student_faces.user_id, recrée la table", dialect)
+        return
+
+    # MySQL: la FK a besoin d'un index avant de supprimer l'index unique
+    create_index(conn, "ix_student_faces_user_id", "student_faces", ["user_id"])
+    for name in dict.fromkeys(unique_names):
+        if dialect == "mysql":
+            conn.execute(text(f"ALTER TABLE student_faces DROP INDEX `{name}`"))
+        else:
+            conn.execute(text(f'ALTER TABLE student_faces DROP CONSTRAINT IF EXISTS "{name}"'))
+            conn.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+
+
+# Index des requêtes chaudes (voir benchmarks/query_plans.py):
+# - user_groups par group_id (la PK commence par user_id)
+# - sessions par group_id triées par start_time (export, stats)
+# - sessions triées par start_time (liste admin)
+HOT_QUERY_INDEXES: List[Tuple[str, str, Tuple[str, ...]]] = [
+    ("ix_user_groups_group_user", "user_groups", ("group_id", "user_id")),
+    ("ix_sessions_group_start", "sessions", ("group_id", "start_time")),
+    ("ix_sessions_start_time", "sessions", ("start_time",)),
+]
+
+
+def create_hot_query_indexes(conn: Connection) -> None:
+    for name, table, cols in HOT_QUERY_INDEXES:
+        create_index(conn, name, table, cols)
+
+
+def _sessions_closed_at(conn: Connection) -> None:
+    """Clôture des séances (agrégats attendance_stats). Les séances existantes restent ouvertes:
+    rebuild_attendance_stats.py les clôture et calcule les agrégats."""
+    if "closed_at" not in _columns(conn, "sessions"):
+        dt_type = DateTime().compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE sessions ADD COLUMN closed_at {dt_type} NULL"))
+    create_index(conn, "ix_sessions_closed_end", "sessions", ["closed_at", "end_time"])
+
+
+def _user_groups_created_at(conn: Connection) -> None:
+    """Date d'entrée dans le groupe; les appartenances existantes restent NULL (membres d'origine)."""
+    if "created_at" not in _columns(conn, "user_groups"):
+        dt_type = DateTime().compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE user_groups ADD COLUMN created_at {dt_type} NULL"))
+
+
+def _student_faces_sqlite_rebuild(conn: Connection) -> None:
+    """SQLite: encoding nullable et plus d'unicité sur user_id (étapes 1 et 2 sans ALTER possible)."""
+    if conn.dialect.name != "sqlite":
+        return
+    insp = inspect(conn)
+    unique_user = any(
+        c["column_names"] == ["user_id"] for c in insp.get_unique_constraints("student_faces")
+    ) or any(i["unique"] and i["column_names"] == ["user_id"] for i in insp.get_indexes("student_faces"))
+    if unique_user or not _columns(conn, "student_faces")["encoding"]["nullable"]:
+        rebuild_sqlite_table(conn, StudentFace.__table__)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "student_faces_binary_embedding", _student_faces_binary_embedding),
+    (2, "student_faces_multi_templates", _student_faces_multi_templates),
+    (3, "hot_query_indexes", create_hot_query_indexes),
+    (4, "sessions_closed_at", _sessions_closed_at),
+    (5, "user_groups_created_at", _user_groups_created_at),
+    (6, "student_faces_sqlite_rebuild", _student_faces_sqlite_rebuild),
+]
+
+
+def run_migrations(engine: Engine) -> List[str]:
+    """Applique les étapes manquantes, dans l'ordre. Retourne les noms appliqués."""
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            " version INTEGER PRIMARY KEY,"
+            " name VARCHAR(100) NOT NULL,"
+            " applied_at TIMESTAMP NOT NULL)"
+        ))
+        done = {v for (v,) in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+    applied = []
+    for version, name, step in MIGRATIONS:
+        if version in done:
+            continue
+        if _apply(engine, version, name, step):
+            logger.info("migration %s appliquée: %s", version, name)
+            applied.append(name)
+    return applied
+
+
+def _recorded(engine: Engine, version: int) -> bool:
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT 1 FROM schema_migrations WHERE version = :v"), {"v": version}
+        ).first() is not None
+
+
+def _apply(engine: Engine, version: int, name: str, step: Callable[[Connection], None], retries: int = 1) -> bool:
+    """False si un autre worker l'a appliquée en parallèle."""
+    try:
+        with engine.begin() as conn:
+            step(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+                {"v": version, "n": name, "t": datetime.utcnow()},
+            )
+    except IntegrityError:
+        return False
+    except OperationalError:
+        # ALTER/CREATE INDEX en double (colonne ou index déjà créé par un autre worker,
+        # DDL non transactionnel sur MySQL): étape idempotente, rejouée sur l'état courant
+        if _recorded(engine, version):
+            return False
+        if retries <= 0:
+            raise
+        return _apply(engine, version, name, step, retries - 1)
+    return True
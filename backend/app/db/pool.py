@@ -0,0 +1,122 @@
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics:
+    """Compteurs d'attente/obtention de connexions d'un pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.pings = 0
+        self.ping_failures = 0
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            if seconds > self.wait_seconds_max:
+                self.wait_seconds_max = seconds
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def record_ping(self, ok: bool) -> None:
+        with self._lock:
+            self.pings += 1
+            if not ok:
+                self.ping_failures += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+                "pre_pings": self.pings,
+                "pre_ping_failures": self.ping_failures,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool qui mesure le temps passé à attendre une connexion."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        new = super().recreate()
+        new.metrics = self.metrics
+        return new
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_wait(time.perf_counter() - t0)
+        return conn
+
+
+def install_idle_pre_ping(engine, idle_seconds: float) -> None:
+    """Pre-ping seulement pour les connexions restées inactives plus de `idle_seconds`.
+
+    Évite le SELECT 1 à chaque emprunt (pool_pre_ping=True) tout en détectant
+    les connexions coupées par le serveur (wait_timeout MySQL).
+    """
+    metrics = getattr(engine.pool, "metrics", None)
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        connection_record.info["checkin_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        last = connection_record.info.get("checkin_at")
+        if last is None or time.monotonic() - last < idle_seconds:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+            ok = True
+        except Exception:
+            ok = False
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+        if metrics is not None:
+            metrics.record_ping(ok)
+        if not ok:
+            # le pool jette cette connexion et en ouvre une nouvelle
+            raise exc.DisconnectionError()
+
+
+def pool_status(engine) -> Dict[str, Any]:
+    pool = engine.pool
+    out: Dict[str, Any] = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        out.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=pool.overflow(),
+        )
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        out.update(metrics.snapshot())
+    return out
@@ -1,7 +1,34 @@
+from typing import Any, Dict
+
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
+from app.db.pool import InstrumentedQueuePool, install_idle_pre_ping
+
+def _make_engine(url: str):
+    kwargs: Dict[str, Any] = {}
+    if not url.startswith("sqlite"):
+        kwargs.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_pre_ping=settings.DB_PRE_PING == "always",
+        )
+    eng = create_engine(url, **kwargs)
+    if settings.DB_PRE_PING == "idle" and not url.startswith("sqlite"):
+        install_idle_pre_ping(eng, settings.DB_PRE_PING_IDLE_SECONDS)
+    return eng
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+engine = _make_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+# Réplica en lecture seule (listes, exports); à défaut, la base principale
+read_engine = _make_engine(settings.DATABASE_READ_URL) if settings.DATABASE_READ_URL else engine
+ReadSessionLocal = (
+    sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    if read_engine is not engine
+    else SessionLocal
+)
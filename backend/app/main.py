@@ -1,11 +1,24 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
+from app.api.deps import require_admin
 from app.api.v1 import api_router
-from app.db.session import Base, engine
+from app.core.config import settings
+from app.core.metrics import ServerTimingMiddleware, registry
+from app.db.migrations import run_migrations
+from app.db.pool import pool_status
+from app.db.session import Base, engine, read_engine
 from app import models  # noqa: F401
+from app.api.v1.face import run_mark_job
+from app.services.attendance_stats import session_closer
+from app.services.face_ann import face_index
+from app.services.face_inference import shutdown_backend
+from app.services.recognition_jobs import job_workers
 
 Base.metadata.create_all(bind=engine)
+if settings.DB_AUTO_MIGRATE:
+    run_migrations(engine)
 
 app = FastAPI(title="Auto-Absence Backend", version="1.0.0")
 
@@ -15,10 +28,37 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
+app.add_middleware(ServerTimingMiddleware)
 
 app.include_router(api_router, prefix="/api/v1")
 
+@app.on_event("startup")
+def startup():
+    job_workers.start(run_mark_job)
+    session_closer.start()
+
+@app.on_event("shutdown")
+def shutdown():
+    job_workers.stop()
+    session_closer.stop()
+    shutdown_backend()
+    face_index.save_if_dirty()
+
 @app.get("/")
 def root():
     return {"message": "Auto-Absence API is running"}
+
+# état des pools et du réplica: réservé aux admins
+@app.get("/health/db", dependencies=[Depends(require_admin)])
+def db_health():
+    out = {"primary": pool_status(engine)}
+    if read_engine is not engine:
+        out["read_replica"] = pool_status(read_engine)
+    return out
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # format texte Prometheus 0.0.4
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
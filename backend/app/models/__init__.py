@@ -4,3 +4,5 @@ from app.models.user_group import UserGroup
 from app.models.session import Session
 from app.models.attendance import Attendance, AttendanceStatus
 from app.models.student_face import StudentFace
+from app.models.recognition_job import RecognitionJob, JobStatus
+from app.models.attendance_stat import AttendanceStat
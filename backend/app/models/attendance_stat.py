@@ -0,0 +1,24 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
+from app.db.session import Base
+
+class AttendanceStat(Base):
+    """Agrégats de présence par (étudiant, groupe), tenus à jour à la clôture des séances
+    et au marquage tardif (voir app/services/attendance_stats.py)."""
+    __tablename__ = "attendance_stats"
+    __table_args__ = (
+        # alertes: étudiants d'un groupe avec la plus longue série d'absences
+        Index("ix_attendance_stats_group_streak", "group_id", "current_streak"),
+    )
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    group_id = Column(Integer, ForeignKey("groups.id"), primary_key=True)
+    # séances clôturées du groupe
+    sessions_held = Column(Integer, nullable=False, default=0)
+    presences = Column(Integer, nullable=False, default=0)
+    absences = Column(Integer, nullable=False, default=0)
+    # absences consécutives jusqu'à la dernière séance clôturée
+    current_streak = Column(Integer, nullable=False, default=0)
+    last_session_at = Column(DateTime, nullable=True)
+    last_present_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
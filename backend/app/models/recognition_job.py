@@ -0,0 +1,38 @@
+import enum
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, LargeBinary, DateTime, Enum, ForeignKey, Index
+from sqlalchemy.dialects.mysql import LONGBLOB
+from app.db.session import Base
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+class RecognitionJob(Base):
+    """Photo de présence à traiter en arrière-plan (file persistante, voir app/services/recognition_jobs.py)."""
+    __tablename__ = "recognition_jobs"
+    __table_args__ = (
+        # prochaine tâche: QUEUED, séance la plus ancienne d'abord
+        Index("ix_recognition_jobs_queue", "status", "priority", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey("sessions.id"), nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    status = Column(Enum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+    # début de la séance
+    priority = Column(DateTime, nullable=False)
+    scope = Column(String(10), nullable=False, default="group")
+    detection = Column(String(10), nullable=True)
+    # photo envoyée, effacée une fois la tâche terminée (BLOB MySQL limité à 64 Ko)
+    image = Column(LargeBinary().with_variant(LONGBLOB(), "mysql"), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    # réponse de mark-attendance (JSON) ou erreur HTTP équivalente
+    result = Column(Text, nullable=True)
+    error_status = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
@@ -1,9 +1,14 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
 class Session(Base):
     __tablename__ = "sessions"
+    __table_args__ = (
+        Index("ix_sessions_group_start", "group_id", "start_time"),
+        Index("ix_sessions_start_time", "start_time"),
+        Index("ix_sessions_closed_end", "closed_at", "end_time"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     group_id = Column(Integer, ForeignKey("groups.id"), nullable=False)
@@ -11,5 +16,7 @@ class Session(Base):
 
     start_time = Column(DateTime, nullable=False)
     end_time   = Column(DateTime, nullable=False)
+    # clôture: absences comptées dans attendance_stats (à la fin de la séance ou via POST /sessions/{id}/close)
+    closed_at  = Column(DateTime, nullable=True)
 
     group = relationship("Group", back_populates="sessions")
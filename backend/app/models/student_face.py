@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, ForeignKey, Text
+from datetime import datetime
+from sqlalchemy import Column, Integer, ForeignKey, Text, LargeBinary, DateTime
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
@@ -6,7 +7,12 @@ class StudentFace(Base):
     __tablename__ = "student_faces"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
-    encoding = Column(Text, nullable=False)
+    # plusieurs modèles par étudiant (éclairage, angle...)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    # format binaire (voir app/services/face_embedding.py)
+    embedding = Column(LargeBinary, nullable=True)
+    # ancien format JSON, lu tant que migrate_face_encodings.py n'a pas été lancé
+    encoding = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=True)
 
-    user = relationship("User", back_populates="face_encoding")
+    user = relationship("User", back_populates="faces")
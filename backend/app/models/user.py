@@ -20,5 +20,5 @@ class User(Base):
     is_active = Column(Boolean, default=True)
 
     groups = relationship("UserGroup", back_populates="user")
-    face_encoding = relationship("StudentFace", back_populates="user", uselist=False)
+    faces = relationship("StudentFace", back_populates="user")
     attendances = relationship("Attendance", back_populates="user")
@@ -1,12 +1,19 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from datetime import datetime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
 class UserGroup(Base):
     __tablename__ = "user_groups"
+    __table_args__ = (
+        # la PK (user_id, group_id) ne sert pas les filtres par groupe
+        Index("ix_user_groups_group_user", "group_id", "user_id"),
+    )
 
     user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
     group_id = Column(Integer, ForeignKey("groups.id"), primary_key=True)
+    # entrée dans le groupe (statistiques: séances comptées à partir de là); NULL = membre d'origine
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=True)
 
     user = relationship("User", back_populates="groups")
     group = relationship("Group", back_populates="students")
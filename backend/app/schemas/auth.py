@@ -1,5 +1,14 @@
 from pydantic import BaseModel
 
+from app.models.user import RoleEnum
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+
+class CurrentUser(BaseModel):
+    """Utilisateur authentifié (sans session SQLAlchemy, donc cachable)."""
+    id: int
+    email: str
+    role: RoleEnum
+    is_active: bool = True
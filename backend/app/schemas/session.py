@@ -14,6 +14,7 @@ class SessionOut(BaseModel):
     teacher_id: Optional[int]
     start_time: datetime
     end_time: datetime
+    closed_at: Optional[datetime] = None
 
     class Config:
         orm_mode = True
@@ -9,6 +9,12 @@ class UserCreate(BaseModel):
     role: RoleEnum
     password: Optional[str] = None
 
+class UserUpdate(BaseModel):
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    role: Optional[RoleEnum] = None
+    is_active: Optional[bool] = None
+
 class UserOut(BaseModel):
     id: int
     first_name: str
@@ -0,0 +1,79 @@
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.attendance import Attendance, AttendanceStatus
+from app.models.session import Session as SessionModel
+from app.services.attendance_stats import on_marked
+
+
+def _existing_stmt(session_id: int, user_ids: List[int], lock: bool = False):
+    stmt = select(Attendance.user_id).where(Attendance.session_id == session_id, Attendance.user_id.in_(user_ids))
+    # lecture verrouillante: voit les présences validées depuis le début de la transaction
+    return stmt.with_for_update(read=True) if lock else stmt
+
+
+def _lock_session_stmt(session_id: int):
+    return select(SessionModel.id).where(SessionModel.id == session_id).with_for_update()
+
+
+def _existing(db: Session, session_id: int, user_ids: List[int], lock: bool = False) -> set:
+    return set(db.execute(_existing_stmt(session_id, user_ids, lock)).scalars())
+
+
+def mark_present(
+    db: Session, session_id: int, user_ids: Iterable[int], now: Optional[datetime] = None
+) -> List[int]:
+    """Marque PRESENT en un seul INSERT idempotent; retourne les étudiants nouvellement marqués.
+
+    Les doublons (requêtes concurrentes sur la même séance) sont absorbés par
+    uq_attendance_session_user via ON CONFLICT DO NOTHING; sans RETURNING (MySQL),
+    les marquages d'une même séance sont sérialisés par un verrou sur la séance.
+    Sur une séance déjà clôturée, met aussi à jour attendance_stats.
+    Ne commit pas: l'appelant garde la main sur la transaction.
+    """
+    ids = sorted(set(int(u) for u in user_ids))
+    if not ids:
+        return []
+    newly = _insert_present(db, session_id, ids, now or datetime.utcnow())
+    on_marked(db, session_id, newly)
+    return newly
+
+
+def _insert_present(db: Session, session_id: int, ids: List[int], now: datetime) -> List[int]:
+    rows = [
+        {"session_id": session_id, "user_id": uid, "status": AttendanceStatus.PRESENT, "timestamp": now}
+        for uid in ids
+    ]
+    table = Attendance.__table__
+    dialect = db.get_bind().dialect
+
+    if dialect.name in ("postgresql", "sqlite"):
+        if dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(rows).on_conflict_do_nothing(index_elements=["session_id", "user_id"])
+        if dialect.insert_returning:
+            # RETURNING ne renvoie que les lignes réellement insérées
+            return sorted(db.execute(stmt.returning(table.c.user_id)).scalars())
+        existing = _existing(db, session_id, ids)
+        db.execute(stmt)
+        return [uid for uid in ids if uid not in existing]
+
+    # MySQL: pas de RETURNING. Séance verrouillée (FOR UPDATE, comme close_session), présences
+    # déjà là relues en lecture verrouillante, puis un seul INSERT multi-lignes des manquantes:
+    # 3 requêtes quel que soit le nombre d'étudiants, exact avec des requêtes simultanées.
+    # Pas d'INSERT IGNORE: une vraie erreur d'intégrité (FK, NOT NULL) remonte.
+    return _insert_locked(db, session_id, rows)
+
+
+def _insert_locked(db: Session, session_id: int, rows: List[dict]) -> List[int]:
+    db.execute(_lock_session_stmt(session_id))
+    existing = _existing(db, session_id, [r["user_id"] for r in rows], lock=True)
+    new_rows = [r for r in rows if r["user_id"] not in existing]
+    if new_rows:
+        db.execute(Attendance.__table__.insert().values(new_rows))
+    return [r["user_id"] for r in new_rows]
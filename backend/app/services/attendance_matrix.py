@@ -0,0 +1,75 @@
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from sqlalchemy import and_, case, literal, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.models.attendance import Attendance
+from app.models.session import Session as SessionModel
+from app.models.user import User, RoleEnum
+from app.models.user_group import UserGroup
+
+
+def session_filters(
+    *,
+    group_id: Optional[int] = None,
+    session_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+) -> List:
+    conds = []
+    if session_id:
+        conds.append(SessionModel.id == session_id)
+    if group_id:
+        conds.append(SessionModel.group_id == group_id)
+    if date_from:
+        conds.append(SessionModel.start_time >= date_from)
+    if date_to:
+        conds.append(SessionModel.start_time < date_to)
+    return conds
+
+
+def attendance_matrix_query(
+    *,
+    group_id: Optional[int] = None,
+    session_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+) -> Select:
+    """Une ligne par (séance, étudiant du groupe) avec PRESENT/ABSENT calculé en SQL.
+
+    séances JOIN user_groups JOIN users(étudiants) LEFT JOIN attendance:
+    une seule requête quel que soit le nombre de séances.
+    """
+    status = case((Attendance.id.is_(None), literal("ABSENT")), else_=literal("PRESENT")).label("status")
+    return (
+        select(
+            SessionModel.id.label("session_id"),
+            SessionModel.group_id,
+            SessionModel.start_time,
+            SessionModel.end_time,
+            User.id.label("student_id"),
+            User.first_name,
+            User.last_name,
+            User.email,
+            status,
+        )
+        .select_from(SessionModel)
+        .join(UserGroup, UserGroup.group_id == SessionModel.group_id)
+        .join(User, and_(User.id == UserGroup.user_id, User.role == RoleEnum.STUDENT))
+        .outerjoin(
+            Attendance,
+            and_(Attendance.session_id == SessionModel.id, Attendance.user_id == User.id),
+        )
+        .where(*session_filters(group_id=group_id, session_id=session_id, date_from=date_from, date_to=date_to))
+        .order_by(SessionModel.start_time, SessionModel.id, User.id)
+    )
+
+
+def iter_attendance_matrix(db: Session, *, chunk_size: int = 1000, **filters) -> Iterator[Row]:
+    """Parcourt la matrice avec un curseur serveur (yield_per): mémoire constante."""
+    result = db.execute(attendance_matrix_query(**filters).execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        yield from partition
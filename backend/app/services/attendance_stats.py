@@ -0,0 +1,364 @@
+"""Agrégats de présence par (étudiant, groupe): table attendance_stats.
+
+Tenus à jour par incréments, sans relire attendance:
+- clôture d'une séance (close_session): +1 séance pour chaque étudiant du
+  groupe, +1 présence ou +1 absence, série d'absences remise à 0 ou prolongée;
+- marquage tardif sur une séance déjà clôturée (on_marked): absence -> présence.
+
+Une séance est clôturée explicitement (POST /sessions/{id}/close) ou, une fois
+terminée, par la tâche périodique SessionCloser (close_ended_sessions). Un
+étudiant n'est compté que pour les séances finissant après son entrée dans le
+groupe (user_groups.created_at; NULL = membre d'origine). rebuild_group
+recalcule depuis attendance (rebuild_attendance_stats.py pour les reprises).
+
+close_session et on_marked verrouillent la ligne de la séance (FOR UPDATE):
+un marquage concurrent d'une clôture est soit vu par la clôture, soit compté
+comme marquage tardif une fois la clôture validée, jamais perdu.
+"""
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import case, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.attendance import Attendance
+from app.models.attendance_stat import AttendanceStat
+from app.models.session import Session as SessionModel
+from app.models.user import User, RoleEnum
+from app.models.user_group import UserGroup
+
+logger = logging.getLogger(__name__)
+
+# séances lues par lot pour recalculer une série d'absences
+STREAK_BATCH = 100
+
+
+def _memberships(db: Session, group_id: int, user_ids: Optional[Iterable[int]] = None) -> Dict[int, Optional[datetime]]:
+    """Étudiants du groupe -> date d'entrée (None: membre d'origine)."""
+    q = (
+        db.query(UserGroup.user_id, UserGroup.created_at)
+        .join(User, User.id == UserGroup.user_id)
+        .filter(UserGroup.group_id == group_id, User.role == RoleEnum.STUDENT)
+    )
+    if user_ids is not None:
+        q = q.filter(UserGroup.user_id.in_(list(user_ids)))
+    return dict(sorted(q.all()))
+
+
+def _counts(joined_at: Optional[datetime], session_end: datetime) -> bool:
+    # séance encore à venir ou en cours à l'entrée dans le groupe
+    return joined_at is None or joined_at < session_end
+
+
+def _session_stmt(session_id: int):
+    return (
+        select(SessionModel.group_id, SessionModel.start_time, SessionModel.end_time, SessionModel.closed_at)
+        .where(SessionModel.id == session_id)
+        .with_for_update()
+    )
+
+
+def _insert_stats_stmt(dialect_name: str, rows: List[dict]):
+    """INSERT des lignes d'agrégats, sans erreur si une clôture simultanée d'une autre séance
+    du groupe vient de les créer (clé primaire user_id, group_id)."""
+    table = AttendanceStat.__table__
+    if dialect_name in ("postgresql", "sqlite"):
+        if dialect_name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        return insert(table).values(rows).on_conflict_do_nothing(index_elements=["user_id", "group_id"])
+    if dialect_name in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert
+
+        stmt = insert(table).values(rows)
+        # doublon: affectation sans effet (pas d'INSERT IGNORE, qui masquerait une erreur de FK)
+        return stmt.on_duplicate_key_update(user_id=stmt.inserted.user_id)
+    return table.insert().values(rows)
+
+
+def _ensure_rows(db: Session, group_id: int, user_ids: List[int], now: datetime) -> None:
+    existing = set(
+        db.execute(
+            select(AttendanceStat.user_id).where(AttendanceStat.group_id == group_id, AttendanceStat.user_id.in_(user_ids))
+        ).scalars()
+    )
+    missing = [
+        {"user_id": uid, "group_id": group_id, "sessions_held": 0, "presences": 0, "absences": 0,
+         "current_streak": 0, "updated_at": now}
+        for uid in user_ids if uid not in existing
+    ]
+    if missing:
+        db.execute(_insert_stats_stmt(db.get_bind().dialect.name, missing))
+
+
+def _present_stmt(session_ids: List[int], user_ids: Iterable[int], lock: bool = False):
+    stmt = select(Attendance.session_id, Attendance.user_id).where(
+        Attendance.session_id.in_(session_ids), Attendance.user_id.in_(list(user_ids))
+    )
+    # lecture verrouillante: voit les présences validées après le début de la transaction (MySQL)
+    return stmt.with_for_update(read=True) if lock else stmt
+
+
+def _present(db: Session, session_ids: List[int], user_ids: Iterable[int], lock: bool = False) -> Set[Tuple[int, int]]:
+    return set(db.execute(_present_stmt(session_ids, user_ids, lock)).all())
+
+
+def recompute_streaks(db: Session, group_id: int, user_ids: Iterable[int]) -> None:
+    """Série d'absences courante relue depuis attendance; remonte les séances clôturées
+    jusqu'à la dernière présence de chaque étudiant (coût ~ longueur de la série)."""
+    joined = _memberships(db, group_id, user_ids)
+    remaining = set(user_ids)
+    streaks = {uid: 0 for uid in remaining}
+    sessions = (
+        select(SessionModel.id, SessionModel.end_time)
+        .where(SessionModel.group_id == group_id, SessionModel.closed_at.isnot(None))
+        .order_by(SessionModel.start_time.desc(), SessionModel.id.desc())
+    )
+    offset = 0
+    while remaining:
+        batch = db.execute(sessions.offset(offset).limit(STREAK_BATCH)).all()
+        if not batch:
+            break
+        offset += len(batch)
+        present = _present(db, [sid for sid, _ in batch], remaining)
+        for sid, end in batch:
+            for uid in list(remaining):
+                # présent, ou séance antérieure à l'entrée dans le groupe: fin de la série
+                if (sid, uid) in present or not _counts(joined.get(uid), end):
+                    remaining.discard(uid)
+                else:
+                    streaks[uid] += 1
+            if not remaining:
+                break
+    if streaks:
+        db.execute(
+            update(AttendanceStat),
+            [{"user_id": uid, "group_id": group_id, "current_streak": n} for uid, n in streaks.items()],
+        )
+
+
+def close_session(db: Session, session_id: int, now: Optional[datetime] = None) -> int:
+    """Clôture la séance et compte présences/absences de son groupe. Sans effet si déjà clôturée.
+
+    Retourne le nombre d'étudiants comptés. Ne commit pas.
+    """
+    now = now or datetime.utcnow()
+    # verrou tenu jusqu'au commit: les marquages de la séance attendent (on_marked) ou sont déjà validés
+    sess = db.execute(_session_stmt(session_id)).first()
+    if sess is None or sess.closed_at is not None:
+        return 0
+    db.execute(
+        update(SessionModel)
+        .where(SessionModel.id == session_id)
+        .values(closed_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    group_id, start, end = sess.group_id, sess.start_time, sess.end_time
+    members = [uid for uid, joined in _memberships(db, group_id).items() if _counts(joined, end)]
+    if not members:
+        return 0
+    _ensure_rows(db, group_id, members, now)
+    present = {uid for _, uid in _present(db, [session_id], members, lock=True)}
+    absent = [uid for uid in members if uid not in present]
+
+    stats = AttendanceStat
+    in_order = or_(stats.last_session_at.is_(None), stats.last_session_at <= start)
+    # séance clôturée après une plus récente: la série est recalculée
+    late = list(db.execute(
+        select(stats.user_id).where(stats.group_id == group_id, stats.user_id.in_(members), ~in_order)
+    ).scalars())
+    common = {"sessions_held": stats.sessions_held + 1, "updated_at": now}
+    if present:
+        db.execute(
+            update(stats).where(stats.group_id == group_id, stats.user_id.in_(present)).values(
+                **common,
+                presences=stats.presences + 1,
+                current_streak=case((in_order, 0), else_=stats.current_streak),
+                last_session_at=case((in_order, start), else_=stats.last_session_at),
+                last_present_at=case(
+                    (or_(stats.last_present_at.is_(None), stats.last_present_at < start), start),
+                    else_=stats.last_present_at,
+                ),
+            ).execution_options(synchronize_session=False)
+        )
+    if absent:
+        db.execute(
+            update(stats).where(stats.group_id == group_id, stats.user_id.in_(absent)).values(
+                **common,
+                absences=stats.absences + 1,
+                current_streak=case((in_order, stats.current_streak + 1), else_=stats.current_streak),
+                last_session_at=case((in_order, start), else_=stats.last_session_at),
+            ).execution_options(synchronize_session=False)
+        )
+    if late:
+        recompute_streaks(db, group_id, late)
+    return len(members)
+
+
+def close_ended_sessions(db: Session, now: Optional[datetime] = None, limit: Optional[int] = None) -> int:
+    """Clôture les séances terminées (end_time passé), les plus anciennes d'abord. Ne commit pas."""
+    now = now or datetime.utcnow()
+    limit = settings.ATTENDANCE_CLOSE_BATCH if limit is None else limit
+    ids = [
+        sid for (sid,) in db.query(SessionModel.id)
+        .filter(SessionModel.closed_at.is_(None), SessionModel.end_time <= now)
+        .order_by(SessionModel.end_time, SessionModel.id)
+        .limit(limit)
+    ]
+    for sid in ids:
+        close_session(db, sid, now)
+    return len(ids)
+
+
+def on_marked(db: Session, session_id: int, user_ids: List[int]) -> None:
+    """Présences ajoutées après la clôture: absence -> présence, séries recalculées. Ne commit pas."""
+    if not user_ids:
+        return
+    # attend une clôture en cours: clôturée entre-temps, la présence est comptée ici
+    sess = db.execute(_session_stmt(session_id)).first()
+    if sess is None or sess.closed_at is None:
+        return
+    # seuls les étudiants comptés à la clôture (scope=all peut marquer d'autres groupes)
+    counted = [uid for uid, joined in _memberships(db, sess.group_id, user_ids).items() if _counts(joined, sess.end_time)]
+    if not counted:
+        return
+    stats = AttendanceStat
+    members = stats.group_id == sess.group_id, stats.user_id.in_(counted)
+    db.execute(
+        update(stats).where(*members).values(
+            presences=stats.presences + 1,
+            absences=case((stats.absences > 0, stats.absences - 1), else_=0),
+            last_present_at=case(
+                (or_(stats.last_present_at.is_(None), stats.last_present_at < sess.start_time), sess.start_time),
+                else_=stats.last_present_at,
+            ),
+            updated_at=datetime.utcnow(),
+        ).execution_options(synchronize_session=False)
+    )
+    in_streak = list(db.execute(select(stats.user_id).where(*members, stats.current_streak > 0)).scalars())
+    if in_streak:
+        recompute_streaks(db, sess.group_id, in_streak)
+
+
+def rebuild_group(db: Session, group_id: int, user_ids: Optional[Iterable[int]] = None) -> int:
+    """Recalcule depuis attendance les agrégats du groupe (ou de certains étudiants). Ne commit pas."""
+    user_ids = list(user_ids) if user_ids is not None else None
+    joined = _memberships(db, group_id, user_ids)
+    q = db.query(AttendanceStat).filter(AttendanceStat.group_id == group_id)
+    if user_ids is not None:
+        q = q.filter(AttendanceStat.user_id.in_(user_ids))
+    q.delete(synchronize_session=False)
+    if not joined:
+        return 0
+
+    sessions = db.query(SessionModel.id, SessionModel.start_time, SessionModel.end_time).filter(
+        SessionModel.group_id == group_id, SessionModel.closed_at.isnot(None)
+    ).order_by(SessionModel.start_time, SessionModel.id).all()
+    present: Set[Tuple[int, int]] = set()
+    if sessions:
+        present = set(
+            db.execute(
+                select(Attendance.session_id, Attendance.user_id)
+                .join(SessionModel, SessionModel.id == Attendance.session_id)
+                .where(SessionModel.group_id == group_id, SessionModel.closed_at.isnot(None),
+                       Attendance.user_id.in_(list(joined)))
+            ).all()
+        )
+
+    now = datetime.utcnow()
+    rows: Dict[int, dict] = {
+        uid: {"user_id": uid, "group_id": group_id, "sessions_held": 0, "presences": 0, "absences": 0,
+              "current_streak": 0, "last_session_at": None, "last_present_at": None, "updated_at": now}
+        for uid in joined
+    }
+    for sid, start, end in sessions:
+        for uid, row in rows.items():
+            if not _counts(joined[uid], end):
+                continue
+            row["sessions_held"] += 1
+            row["last_session_at"] = start
+            if (sid, uid) in present:
+                row["presences"] += 1
+                row["current_streak"] = 0
+                row["last_present_at"] = start
+            else:
+                row["absences"] += 1
+                row["current_streak"] += 1
+    db.execute(AttendanceStat.__table__.insert(), list(rows.values()))
+    return len(rows)
+
+
+def alert_filters(min_streak: int, min_absences: int) -> list:
+    conds = []
+    if min_streak > 0:
+        conds.append(AttendanceStat.current_streak >= min_streak)
+    if min_absences > 0:
+        conds.append(AttendanceStat.absences >= min_absences)
+    return [or_(*conds)] if conds else []
+
+
+def group_sessions_held(db: Session, group_id: int) -> int:
+    return db.query(func.count(SessionModel.id)).filter(
+        SessionModel.group_id == group_id, SessionModel.closed_at.isnot(None)
+    ).scalar()
+
+
+class SessionCloser:
+    """Tâche périodique: clôture les séances terminées (les lectures de statistiques n'écrivent pas)."""
+
+    def __init__(self, interval: float, batch: int):
+        self.interval = interval
+        self.batch = batch
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="session-closer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self) -> int:
+        """Clôture par lots de `batch` séances, une transaction par lot."""
+        total = 0
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                n = close_ended_sessions(db, limit=self.batch)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+            total += n
+            if n < self.batch:
+                break
+        return total
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                closed = self.run_once()
+                if closed:
+                    logger.info("%d séance(s) clôturée(s)", closed)
+            except Exception:
+                logger.exception("clôture des séances terminées")
+
+
+session_closer = SessionCloser(
+    interval=settings.ATTENDANCE_CLOSE_INTERVAL,
+    batch=settings.ATTENDANCE_CLOSE_BATCH,
+)
@@ -0,0 +1,369 @@
+"""Index approximatif (IVF) de tous les encodages, pour l'identification tous groupes confondus.
+
+Les encodages normalisés sont répartis en `nlist` listes autour de centroïdes
+(k-means sphérique). Une recherche ne compare la requête qu'aux lignes des
+`nprobe` listes les plus proches, puis re-classe exactement les modèles des
+étudiants candidats avec match_faces (même seuil, même affectation 1-1).
+
+L'index est persisté en .npz; au chargement, seul le diff des ids
+StudentFace est relu en base. Chaque worker a son index: il se resynchronise
+au plus tard après FACE_ANN_SYNC_INTERVAL secondes.
+"""
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.student_face import StudentFace
+from app.services.face_embedding import EMBEDDING_DIM, load_embedding
+from app.services.face_matching import FaceMatch, match_faces, normalize_rows
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+INDEX_FORMAT_VERSION = 1
+# réentraîne les centroïdes quand l'index a grossi de ce facteur depuis l'entraînement
+RETRAIN_GROWTH = 4.0
+# lignes par centroïde utilisées pour l'entraînement
+TRAIN_SAMPLES_PER_LIST = 256
+
+
+def default_nlist(n: int) -> int:
+    # ~sqrt(N) listes; en dessous de quelques milliers de lignes, une seule liste = recherche exacte
+    return max(1, int(np.sqrt(n))) if n >= 2048 else 1
+
+
+def train_centroids(vectors: np.ndarray, nlist: int, iters: int = 10, seed: int = 0) -> np.ndarray:
+    """k-means sphérique (produit scalaire sur vecteurs normalisés)."""
+    n = vectors.shape[0]
+    nlist = max(1, min(nlist, n))
+    if n == 0:
+        return np.zeros((1, EMBEDDING_DIM), dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    sample = vectors
+    if n > nlist * TRAIN_SAMPLES_PER_LIST:
+        sample = vectors[rng.choice(n, nlist * TRAIN_SAMPLES_PER_LIST, replace=False)]
+    centroids = sample[rng.choice(sample.shape[0], nlist, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        counts = np.bincount(assign, minlength=nlist)
+        empty = counts == 0
+        # liste vide: réensemencée sur un point au hasard
+        sums[empty] = sample[rng.choice(sample.shape[0], int(empty.sum()))]
+        centroids = normalize_rows(sums)
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        vectors: np.ndarray,
+        user_ids: np.ndarray,
+        face_ids: np.ndarray,
+        nprobe: int = 8,
+        trained_on: Optional[int] = None,
+    ):
+        self.centroids = centroids.astype(np.float32)
+        self.vectors = vectors.astype(np.float32).reshape(-1, EMBEDDING_DIM)
+        self.user_ids = user_ids.astype(np.int64)
+        self.face_ids = face_ids.astype(np.int64)
+        self.nprobe = max(1, nprobe)
+        self.trained_on = len(self.face_ids) if trained_on is None else trained_on
+        self.assign = self._assign(self.vectors)
+        self._lists: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @classmethod
+    def build(
+        cls, vectors: np.ndarray, user_ids: np.ndarray, face_ids: np.ndarray, nlist: int = 0, nprobe: int = 8
+    ) -> "IVFIndex":
+        vectors = normalize_rows(vectors) if len(vectors) else np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        centroids = train_centroids(vectors, nlist or default_nlist(len(vectors)))
+        return cls(centroids, vectors, user_ids, face_ids, nprobe)
+
+    def __len__(self) -> int:
+        return int(self.face_ids.shape[0])
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        if len(vectors) == 0:
+            return np.empty((0,), dtype=np.int64)
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int64)
+
+    def _inverted_lists(self) -> Tuple[np.ndarray, np.ndarray]:
+        # (ordre des lignes groupées par liste, début de chaque liste), recalculé après modification
+        if self._lists is None:
+            order = np.argsort(self.assign, kind="stable")
+            starts = np.searchsorted(self.assign[order], np.arange(self.nlist + 1))
+            self._lists = (order, starts)
+        return self._lists
+
+    # Modifications en copie: l'index partagé n'est jamais modifié en place,
+    # FaceIndexManager remplace la référence (les lecteurs gardent leur instantané).
+
+    def _derive(self, vectors, user_ids, face_ids, assign) -> "IVFIndex":
+        index = object.__new__(IVFIndex)
+        index.centroids = self.centroids
+        index.vectors = vectors
+        index.user_ids = user_ids
+        index.face_ids = face_ids
+        index.nprobe = self.nprobe
+        index.trained_on = self.trained_on
+        index.assign = assign
+        index._lists = None
+        return index
+
+    def with_faces(self, vectors: np.ndarray, user_ids: Iterable[int], face_ids: Iterable[int]) -> "IVFIndex":
+        if len(vectors) == 0:
+            return self
+        vectors = normalize_rows(vectors)
+        return self._derive(
+            np.vstack([self.vectors, vectors]),
+            np.concatenate([self.user_ids, np.asarray(list(user_ids), dtype=np.int64)]),
+            np.concatenate([self.face_ids, np.asarray(list(face_ids), dtype=np.int64)]),
+            np.concatenate([self.assign, self._assign(vectors)]),
+        )
+
+    def _keep(self, mask: np.ndarray) -> "IVFIndex":
+        if mask.all():
+            return self
+        return self._derive(self.vectors[mask], self.user_ids[mask], self.face_ids[mask], self.assign[mask])
+
+    def without_faces(self, face_ids: Iterable[int]) -> "IVFIndex":
+        ids = np.asarray(list(face_ids), dtype=np.int64)
+        return self._keep(~np.isin(self.face_ids, ids)) if ids.size else self
+
+    def without_users(self, user_ids: Iterable[int]) -> "IVFIndex":
+        ids = np.asarray(list(user_ids), dtype=np.int64)
+        return self._keep(~np.isin(self.user_ids, ids)) if ids.size else self
+
+    def needs_retrain(self) -> bool:
+        return len(self) > RETRAIN_GROWTH * max(self.trained_on, 1) and default_nlist(len(self)) > self.nlist
+
+    def candidate_users(self, queries: np.ndarray, k: int, nprobe: Optional[int] = None) -> np.ndarray:
+        """Étudiants des k meilleures lignes de chaque requête, dans les nprobe listes les plus proches."""
+        if len(self) == 0:
+            return np.empty((0,), dtype=np.int64)
+        q = normalize_rows(queries)
+        order, starts = self._inverted_lists()
+        nprobe = max(1, min(nprobe or self.nprobe, self.nlist))
+        probe_sims = q @ self.centroids.T
+        if nprobe < self.nlist:
+            probes = np.argpartition(-probe_sims, nprobe - 1, axis=1)[:, :nprobe]
+        else:
+            probes = np.tile(np.arange(self.nlist), (q.shape[0], 1))
+
+        found = []
+        for qi in range(q.shape[0]):
+            rows = np.concatenate([order[starts[li]:starts[li + 1]] for li in probes[qi]])
+            if rows.size == 0:
+                continue
+            sims = self.vectors[rows] @ q[qi]
+            kk = min(k, rows.size)
+            best = rows[np.argpartition(-sims, kk - 1)[:kk]]
+            found.append(self.user_ids[best])
+        if not found:
+            return np.empty((0,), dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def match(
+        self,
+        queries: np.ndarray,
+        threshold: float,
+        top_k: int = 3,
+        one_to_one: bool = True,
+        nprobe: Optional[int] = None,
+    ) -> List[FaceMatch]:
+        """Candidats par IVF puis match_faces exact sur tous les modèles de ces étudiants.
+
+        Thread-safe: l'instance n'est jamais modifiée après construction.
+        """
+        users = self.candidate_users(queries, k=max(top_k, 1) * 4, nprobe=nprobe)
+        rows = np.nonzero(np.isin(self.user_ids, users))[0]
+        rows = rows[np.argsort(self.user_ids[rows], kind="stable")]
+        row_users = self.user_ids[rows]
+        gallery_ids, offsets = np.unique(row_users, return_index=True)
+        return match_faces(
+            queries, self.vectors[rows], gallery_ids, threshold,
+            top_k=top_k, one_to_one=one_to_one, offsets=offsets if len(rows) else None,
+        )
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                version=np.int64(INDEX_FORMAT_VERSION),
+                centroids=self.centroids,
+                vectors=self.vectors,
+                user_ids=self.user_ids,
+                face_ids=self.face_ids,
+                trained_on=np.int64(self.trained_on),
+            )
+        # remplacement atomique: un autre worker ne lit jamais un fichier à moitié écrit
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path, nprobe: int = 8) -> Optional["IVFIndex"]:
+        try:
+            with np.load(path) as data:
+                if int(data["version"]) != INDEX_FORMAT_VERSION or data["vectors"].shape[1:] != (EMBEDDING_DIM,):
+                    return None
+                return cls(
+                    data["centroids"], data["vectors"], data["user_ids"], data["face_ids"],
+                    nprobe=nprobe, trained_on=int(data["trained_on"]),
+                )
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def _face_rows(db: Session, face_ids: Optional[Iterable[int]] = None, user_ids: Optional[Iterable[int]] = None):
+    query = db.query(StudentFace.id, StudentFace.user_id, StudentFace.embedding, StudentFace.encoding)
+    if face_ids is not None:
+        query = query.filter(StudentFace.id.in_(list(face_ids)))
+    if user_ids is not None:
+        query = query.filter(StudentFace.user_id.in_(list(user_ids)))
+    vectors, uids, fids = [], [], []
+    for fid, uid, embedding, encoding in query.yield_per(1000):
+        v = load_embedding(embedding, encoding, fid)
+        if v is None:
+            continue
+        vectors.append(v)
+        uids.append(uid)
+        fids.append(fid)
+    if not vectors:
+        return np.empty((0, EMBEDDING_DIM), dtype=np.float32), np.empty((0,), np.int64), np.empty((0,), np.int64)
+    return np.vstack(vectors).astype(np.float32), np.asarray(uids, np.int64), np.asarray(fids, np.int64)
+
+
+class FaceIndexManager:
+    """Index partagé du process: chargé du disque (ou construit) au premier usage."""
+
+    def __init__(self, path: Path, nlist: int, nprobe: int, sync_interval: float):
+        self.path = path
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.sync_interval = sync_interval
+        self._index: Optional[IVFIndex] = None
+        self._synced_at = 0.0
+        self._dirty = False
+        # incrémenté à chaque modification de l'index (clé du cache de résultats)
+        self.version = 0
+        self._lock = threading.RLock()
+        self._syncing = False
+
+    def get(self, db: Session) -> IVFIndex:
+        with self._lock:
+            if self._index is None:
+                # premier usage: les autres requêtes attendent l'index
+                self._index = IVFIndex.load(self.path, self.nprobe)
+                if self._index is None:
+                    self.rebuild(db)
+                else:
+                    self.sync(db)
+                return self._index
+            index = self._index
+            due = self.sync_interval >= 0 and time.monotonic() - self._synced_at > self.sync_interval
+            if not due or self._syncing:
+                # synchronisation en cours dans un autre thread: index courant (copie immuable)
+                return index
+            self._syncing = True
+        try:
+            self.sync(db)
+        finally:
+            self._syncing = False
+        return self._index
+
+    def _build(self, db: Session) -> IVFIndex:
+        t0 = time.perf_counter()
+        vectors, uids, fids = _face_rows(db)
+        index = IVFIndex.build(vectors, uids, fids, nlist=self.nlist, nprobe=self.nprobe)
+        logger.info(
+            "index ANN construit: %d encodages, %d listes en %.2fs",
+            len(index), index.nlist, time.perf_counter() - t0,
+        )
+        return index
+
+    def rebuild(self, db: Session) -> IVFIndex:
+        index = self._build(db)
+        with self._lock:
+            self._index = index
+            self._synced_at = time.monotonic()
+            self.version += 1
+            self._save()
+            return index
+
+    def sync(self, db: Session) -> None:
+        """Aligne l'index sur student_faces (ajouts et suppressions faites par d'autres process).
+
+        Lectures en base et calcul hors du verrou, sur une copie; l'index n'est remplacé que
+        s'il n'a pas changé entre-temps (sinon la prochaine synchronisation reprend le diff).
+        """
+        base = self._index
+        db_ids = np.fromiter((fid for (fid,) in db.query(StudentFace.id)), dtype=np.int64)
+        stale = np.setdiff1d(base.face_ids, db_ids, assume_unique=True)
+        missing = np.setdiff1d(db_ids, base.face_ids, assume_unique=True)
+        index = base
+        if stale.size:
+            index = index.without_faces(stale)
+        if missing.size:
+            vectors, uids, fids = _face_rows(db, face_ids=missing.tolist())
+            index = index.with_faces(vectors, uids, fids)
+        changed = bool(stale.size or missing.size)
+        retrained = changed and index.needs_retrain()
+        if retrained:
+            index = self._build(db)
+        with self._lock:
+            if self._index is not base:
+                return
+            self._index = index
+            self._synced_at = time.monotonic()
+            if changed:
+                self._dirty = True
+                self.version += 1
+            if retrained:
+                self._save()
+
+    def refresh_students(self, db: Session, user_ids: Iterable[int]) -> None:
+        """Remplace les modèles de ces étudiants (après register_face); sans effet si l'index n'est pas chargé."""
+        user_ids = list(user_ids)
+        with self._lock:
+            if self._index is None or not user_ids:
+                return
+            vectors, uids, fids = _face_rows(db, user_ids=user_ids)
+            self._index = self._index.without_users(user_ids).with_faces(vectors, uids, fids)
+            self._dirty = True
+            self.version += 1
+
+    def _save(self) -> None:
+        try:
+            self._index.save(self.path)
+            self._dirty = False
+        except OSError:
+            logger.warning("impossible d'écrire l'index ANN dans %s", self.path, exc_info=True)
+
+    def save_if_dirty(self) -> None:
+        with self._lock:
+            if self._index is not None and self._dirty:
+                self._save()
+
+
+face_index = FaceIndexManager(
+    path=Path(settings.FACE_ANN_INDEX_PATH) if settings.FACE_ANN_INDEX_PATH else PROJECT_ROOT / "data" / "face_ann.npz",
+    nlist=settings.FACE_ANN_NLIST,
+    nprobe=settings.FACE_ANN_NPROBE,
+    sync_interval=settings.FACE_ANN_SYNC_INTERVAL,
+)
@@ -0,0 +1,82 @@
+import json
+import logging
+from typing import Optional, Set
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 128
+
+# Format binaire de StudentFace.embedding:
+#   b"SF" | version (1 octet) | dtype (1 octet: b"4"=float32, b"2"=float16) | payload little-endian
+MAGIC = b"SF"
+FORMAT_VERSION = 1
+HEADER_SIZE = 4
+
+_DTYPES = {
+    "float32": (b"4", np.dtype("<f4")),
+    "float16": (b"2", np.dtype("<f2")),
+}
+_CODES = {code: dt for code, dt in _DTYPES.values()}
+
+# lignes StudentFace au blob illisible déjà signalées (un avertissement par ligne et par process)
+_reported: Set[Optional[int]] = set()
+
+
+def encode_embedding(feat: np.ndarray, dtype: Optional[str] = None) -> bytes:
+    name = dtype or settings.FACE_EMBEDDING_DTYPE
+    if name not in _DTYPES:
+        raise ValueError(f"dtype d'encodage non supporté: {name}")
+    code, dt = _DTYPES[name]
+    v = np.asarray(feat, dtype=np.float32).reshape(-1)
+    if v.shape[0] != EMBEDDING_DIM:
+        raise ValueError(f"encodage de dimension {v.shape[0]}, attendu {EMBEDDING_DIM}")
+    return MAGIC + bytes((FORMAT_VERSION,)) + code + v.astype(dt, copy=False).tobytes()
+
+
+def decode_embedding(blob: bytes) -> Optional[np.ndarray]:
+    """Décodage sans copie (np.frombuffer); la vue retournée est en lecture seule."""
+    if len(blob) < HEADER_SIZE or blob[:2] != MAGIC or blob[2] != FORMAT_VERSION:
+        return None
+    dt = _CODES.get(blob[3:4])
+    if dt is None:
+        return None
+    # blob tronqué ou trop long: np.frombuffer lèverait ValueError
+    if len(blob) != HEADER_SIZE + EMBEDDING_DIM * dt.itemsize:
+        return None
+    return np.frombuffer(blob, dtype=dt, offset=HEADER_SIZE)
+
+
+def decode_legacy_encoding(encoding: str) -> Optional[np.ndarray]:
+    try:
+        v = np.asarray(json.loads(encoding), dtype=np.float32)
+    except Exception:
+        return None
+    if v.ndim != 1 or v.shape[0] != EMBEDDING_DIM:
+        return None
+    return v
+
+
+def load_embedding(
+    embedding: Optional[bytes], encoding: Optional[str], face_id: Optional[int] = None
+) -> Optional[np.ndarray]:
+    """Lit une ligne StudentFace quel que soit son format (binaire ou JSON historique).
+
+    Blob illisible: repli sur le JSON s'il a été conservé (migration --keep-json).
+    """
+    if embedding:
+        v = decode_embedding(embedding)
+        if v is not None:
+            return v
+        if face_id not in _reported:
+            _reported.add(face_id)
+            logger.warning(
+                "student_faces id=%s: embedding illisible (%d octets)%s", face_id, len(embedding),
+                ", repli sur encoding" if encoding else ", ligne ignorée",
+            )
+    if encoding:
+        return decode_legacy_encoding(encoding)
+    return None
@@ -0,0 +1,168 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.student_face import StudentFace
+from app.models.user_group import UserGroup
+from app.services.face_ann import face_index
+from app.services.face_embedding import EMBEDDING_DIM, load_embedding
+
+# numéro unique par galerie construite (clé du cache de résultats)
+_versions = itertools.count(1)
+
+
+class Gallery:
+    """Encodages d'un groupe: matrice (R, 128) float32 normalisée L2, lignes triées par étudiant.
+
+    `user_ids` contient les U étudiants distincts; `offsets` (U,) donne l'index de
+    la première ligne de chacun quand un étudiant a plusieurs modèles (None sinon).
+    `version` change à chaque reconstruction.
+    """
+
+    __slots__ = ("group_id", "matrix", "user_ids", "offsets", "built_at", "version")
+
+    def __init__(self, group_id: int, matrix: np.ndarray, user_ids: np.ndarray, offsets: Optional[np.ndarray] = None):
+        self.group_id = group_id
+        self.matrix = matrix
+        self.user_ids = user_ids
+        self.offsets = offsets
+        self.built_at = time.monotonic()
+        self.version = next(_versions)
+
+    def __len__(self) -> int:
+        return int(self.user_ids.shape[0])
+
+
+def _readonly(a: np.ndarray) -> np.ndarray:
+    a.setflags(write=False)
+    return a
+
+
+def gallery_from_rows(group_id: int, rows: Iterable[Tuple[int, int, Any, Any]], mode: Optional[str] = None) -> Gallery:
+    """rows: (face_id, user_id, embedding, encoding) triés par user_id.
+
+    mode "all": une ligne par modèle, score d'un étudiant = max sur ses modèles.
+    mode "mean": une ligne par étudiant (moyenne des modèles normalisés).
+    """
+    mode = mode or settings.FACE_TEMPLATE_MODE
+
+    feats = []
+    row_ids = []
+    for face_id, user_id, embedding, encoding in rows:
+        v = load_embedding(embedding, encoding, face_id)
+        if v is None:
+            continue
+        feats.append(v)
+        row_ids.append(user_id)
+
+    if not feats:
+        return Gallery(group_id, np.empty((0, EMBEDDING_DIM), dtype=np.float32), np.empty((0,), dtype=np.int64))
+
+    matrix = np.vstack(feats).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-8
+    row_ids = np.asarray(row_ids, dtype=np.int64)
+    user_ids, offsets = np.unique(row_ids, return_index=True)
+
+    if len(user_ids) == len(row_ids):
+        return Gallery(group_id, _readonly(matrix), _readonly(user_ids))
+
+    if mode == "mean":
+        matrix = np.add.reduceat(matrix, offsets, axis=0)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-8
+        return Gallery(group_id, _readonly(matrix), _readonly(user_ids))
+
+    return Gallery(group_id, _readonly(matrix), _readonly(user_ids), _readonly(offsets))
+
+
+def build_gallery(db: Session, group_id: int) -> Gallery:
+    rows = (
+        db.query(StudentFace.id, StudentFace.user_id, StudentFace.embedding, StudentFace.encoding)
+        .join(UserGroup, UserGroup.user_id == StudentFace.user_id)
+        .filter(UserGroup.group_id == group_id)
+        .order_by(StudentFace.user_id, StudentFace.id)
+        .all()
+    )
+    return gallery_from_rows(group_id, rows)
+
+
+class GalleryCache:
+    """Cache LRU process-local des galeries par groupe.
+
+    Chaque worker uvicorn a son propre cache: le TTL borne la durée pendant
+    laquelle un autre process peut servir une galerie périmée.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, Gallery]" = OrderedDict()
+        self._lock = threading.Lock()
+        # incrémenté à chaque invalidation: une galerie construite pendant
+        # une invalidation concurrente n'est pas mise en cache
+        self._generation = 0
+
+    def get(self, db: Session, group_id: int) -> Gallery:
+        with self._lock:
+            gallery = self._entries.get(group_id)
+            if gallery is not None and not self._expired(gallery):
+                self._entries.move_to_end(group_id)
+                return gallery
+            generation = self._generation
+
+        gallery = build_gallery(db, group_id)
+
+        with self._lock:
+            if generation != self._generation:
+                return gallery
+            self._entries[group_id] = gallery
+            self._entries.move_to_end(group_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return gallery
+
+    def _expired(self, gallery: Gallery) -> bool:
+        return self.ttl_seconds > 0 and time.monotonic() - gallery.built_at > self.ttl_seconds
+
+    def invalidate_group(self, group_id: int) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(group_id, None)
+
+    def invalidate_groups(self, group_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._generation += 1
+            for gid in group_ids:
+                self._entries.pop(gid, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+gallery_cache = GalleryCache(
+    max_entries=settings.FACE_GALLERY_CACHE_SIZE,
+    ttl_seconds=settings.FACE_GALLERY_CACHE_TTL,
+)
+
+
+def invalidate_students(db: Session, user_ids: Iterable[int]) -> None:
+    """À appeler quand les encodages d'étudiants changent: invalide tous leurs groupes et met à jour l'index ANN."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    face_index.refresh_students(db, user_ids)
+    group_ids = [
+        gid for (gid,) in db.query(UserGroup.group_id).filter(UserGroup.user_id.in_(user_ids)).distinct().all()
+    ]
+    gallery_cache.invalidate_groups(group_ids)
+
+
+def invalidate_student(db: Session, user_id: int) -> None:
+    invalidate_students(db, [user_id])
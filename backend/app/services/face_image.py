@@ -0,0 +1,94 @@
+import io
+
+import cv2
+import numpy as np
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+
+# Taille max pour stabilité/perf
+MAX_SIZE = 1280
+
+# Décodage JPEG à échelle réduite (DCT 1/2, 1/4, 1/8): lit directement en BGR
+# et applique l'orientation EXIF (comportement par défaut d'imdecode).
+_REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+class ImageDecodeError(ValueError):
+    pass
+
+
+def _check_pixels(w: int, h: int) -> None:
+    limit = settings.FACE_IMAGE_MAX_PIXELS
+    if limit > 0 and w * h > limit:
+        raise ImageDecodeError(f"Image trop grande ({w}x{h} px, {limit} px max)")
+
+
+def _fit(bgr: np.ndarray, max_size: int) -> np.ndarray:
+    h, w = bgr.shape[:2]
+    m = max(w, h)
+    if m <= max_size:
+        return bgr
+    scale = max_size / float(m)
+    return cv2.resize(bgr, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+
+
+def decode_image(data: bytes, max_size: int = MAX_SIZE) -> np.ndarray:
+    """Octets JPG/PNG -> image BGR contiguë, orientée, de côté max `max_size`."""
+    if not data:
+        raise ImageDecodeError("Fichier vide")
+
+    try:
+        # Image.open ne lit que l'en-tête: suffit pour choisir le facteur de réduction
+        header = Image.open(io.BytesIO(data))
+        w, h = header.size
+        fmt = header.format
+    except Exception:
+        raise ImageDecodeError("Image invalide. Utilise un JPG/PNG standard.")
+    _check_pixels(w, h)
+
+    flag = cv2.IMREAD_COLOR
+    if fmt == "JPEG" and max_size > 0:
+        for factor, reduced in _REDUCED_FLAGS:
+            if max(w, h) // factor >= max_size:
+                flag = reduced
+                break
+
+    bgr = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flag)
+    if bgr is None:
+        # format non géré par OpenCV (GIF, etc.)
+        return decode_image_legacy(data, max_size)
+    return _fit(bgr, max_size)
+
+
+def decode_image_legacy(data: bytes, max_size: int = MAX_SIZE) -> np.ndarray:
+    """Ancien chemin PIL (décodage pleine taille); gardé en secours et pour le benchmark."""
+    if not data:
+        raise ImageDecodeError("Fichier vide")
+
+    try:
+        img = Image.open(io.BytesIO(data))
+    except Exception:
+        raise ImageDecodeError("Image invalide. Utilise un JPG/PNG standard.")
+    _check_pixels(*img.size)
+    try:
+        img = ImageOps.exif_transpose(img)
+        img = img.convert("RGB")
+    except Exception:
+        raise ImageDecodeError("Image invalide. Utilise un JPG/PNG standard.")
+
+    w, h = img.size
+    m = max(w, h)
+    if m > max_size:
+        scale = max_size / float(m)
+        img = img.resize((int(w * scale), int(h * scale)))
+
+    rgb = np.asarray(img, dtype=np.uint8)
+    rgb = np.require(rgb, dtype=np.uint8, requirements=["C_CONTIGUOUS"])
+
+    # OpenCV travaille en BGR
+    return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
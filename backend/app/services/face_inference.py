@@ -0,0 +1,188 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import StageClock, record_stage, stage
+from app.services.face_models import FaceModels, model_pool
+from app.services.face_quality import filter_faces
+
+# (visages retenus (F, 15), encodages (F, 128), visages rejetés par le contrôle qualité)
+InferenceResult = Tuple[np.ndarray, np.ndarray, List[Dict]]
+
+
+class InferenceBusy(Exception):
+    """File d'attente du pool de process pleine (-> 429)."""
+
+
+class InferenceUnavailable(Exception):
+    """Pas de résultat d'inférence dans le délai, ou worker mort (-> 503)."""
+
+
+def _analyze_with(models: FaceModels, bgr: np.ndarray, max_faces: Optional[int], timer=stage) -> InferenceResult:
+    with timer("detect"):
+        detected = models.detect(bgr)
+    with timer("quality"):
+        faces, rejected = filter_faces(bgr, detected)
+    # inutile d'encoder si l'appelant rejettera l'image (ex: enregistrement à 1 visage)
+    if max_faces is not None and len(faces) > max_faces:
+        return faces, np.empty((0, 128), dtype=np.float32), rejected
+    with timer("embed"):
+        feats = models.features(bgr, faces)
+    return faces, feats, rejected
+
+
+class InProcessBackend:
+    mode = "inprocess"
+
+    def analyze(self, bgr: np.ndarray, max_faces: Optional[int] = None) -> InferenceResult:
+        with model_pool.checkout() as models:
+            return _analyze_with(models, bgr, max_faces)
+
+    def detect(self, bgr: np.ndarray) -> np.ndarray:
+        with model_pool.checkout() as models, stage("detect"):
+            return models.detect(bgr)
+
+    def features(self, bgr: np.ndarray, faces: np.ndarray) -> np.ndarray:
+        with model_pool.checkout() as models, stage("embed"):
+            return models.features(bgr, faces)
+
+    def shutdown(self) -> None:
+        pass
+
+
+# --- côté worker: un FaceModels par process, chargé une fois ---
+_worker_models: Optional[FaceModels] = None
+
+
+def _init_worker() -> None:
+    global _worker_models
+    # un process = un coeur: évite la sur-souscription des threads OpenCV
+    cv2.setNumThreads(1)
+    _worker_models = FaceModels()
+
+
+def _worker_analyze(bgr: np.ndarray, max_faces: Optional[int]) -> Tuple[InferenceResult, Dict[str, float]]:
+    # les métriques du worker sont renvoyées au process API avec le résultat
+    clock = StageClock()
+    return _analyze_with(_worker_models, bgr, max_faces, timer=clock.stage), clock.timings
+
+
+def _worker_detect(bgr: np.ndarray) -> np.ndarray:
+    return _worker_models.detect(bgr)
+
+
+def _worker_features(bgr: np.ndarray, faces: np.ndarray) -> np.ndarray:
+    return _worker_models.features(bgr, faces)
+
+
+class ProcessPoolBackend:
+    """Inférence dans un pool de process, chacun avec ses propres modèles ONNX.
+
+    Au plus `workers + queue_size` images en vol: au-delà, InferenceBusy
+    (contre-pression) plutôt qu'une file illimitée en mémoire.
+    """
+
+    mode = "process"
+
+    def __init__(self, workers: int, queue_size: int, timeout: float):
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self._lock = threading.Lock()
+        self._executor = self._new_executor()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    def analyze(self, bgr: np.ndarray, max_faces: Optional[int] = None) -> InferenceResult:
+        with stage("inference"):
+            result, timings = self._run(_worker_analyze, bgr, max_faces)
+        for name, seconds in timings.items():
+            record_stage(name, seconds)
+        return result
+
+    def detect(self, bgr: np.ndarray) -> np.ndarray:
+        with stage("detect"):
+            return self._run(_worker_detect, bgr)
+
+    def features(self, bgr: np.ndarray, faces: np.ndarray) -> np.ndarray:
+        with stage("embed"):
+            return self._run(_worker_features, bgr, faces)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise InferenceBusy()
+
+        executor = self._executor
+        try:
+            fut = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            # un worker est mort depuis le dernier appel: submit refuse tout jusqu'au remplacement du pool
+            self._slots.release()
+            self._reset(executor)
+            raise InferenceUnavailable("worker d'inférence arrêté")
+        except BaseException:
+            self._slots.release()
+            raise
+        # le slot est libéré quand le worker a fini, même si l'appelant a abandonné
+        fut.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return fut.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise InferenceUnavailable(f"pas de réponse du worker après {self.timeout}s")
+        except BrokenProcessPool:
+            self._reset(executor)
+            raise InferenceUnavailable("worker d'inférence arrêté")
+
+    def _reset(self, broken: ProcessPoolExecutor) -> None:
+        # remplacé une seule fois, même si plusieurs requêtes voient le même pool cassé
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = self._new_executor()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Backend choisi par FACE_INFERENCE_MODE ("inprocess" ou "process"), créé au premier appel."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if settings.FACE_INFERENCE_MODE == "process":
+                    _backend = ProcessPoolBackend(
+                        workers=settings.FACE_PROCESS_WORKERS or (os.cpu_count() or 1),
+                        queue_size=settings.FACE_PROCESS_QUEUE_SIZE,
+                        timeout=settings.FACE_INFERENCE_TIMEOUT,
+                    )
+                else:
+                    _backend = InProcessBackend()
+    return _backend
+
+
+def shutdown_backend() -> None:
+    global _backend
+    with _backend_lock:
+        if _backend is not None:
+            _backend.shutdown()
+            _backend = None
@@ -0,0 +1,100 @@
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+class FaceMatch(NamedTuple):
+    face_index: int
+    user_id: Optional[int]
+    similarity: float
+    candidates: List[Tuple[int, float]]
+
+
+def normalize_rows(feats: np.ndarray) -> np.ndarray:
+    feats = np.asarray(feats, dtype=np.float32)
+    if feats.ndim == 1:
+        feats = feats.reshape(1, -1)
+    return feats / (np.linalg.norm(feats, axis=1, keepdims=True) + 1e-8)
+
+
+def _assign_one_to_one(sims: np.ndarray, threshold: float) -> np.ndarray:
+    """Affectation gloutonne par similarité décroissante.
+
+    Retourne pour chaque visage l'index de colonne retenu (-1 sinon): un
+    étudiant ne peut être attribué qu'à un seul visage de l'image.
+    """
+    n_faces, n_known = sims.shape
+    assigned = np.full(n_faces, -1, dtype=np.int64)
+
+    qi, gi = np.nonzero(sims >= threshold)
+    if qi.size == 0:
+        return assigned
+
+    order = np.argsort(-sims[qi, gi], kind="stable")
+    taken = np.zeros(n_known, dtype=bool)
+    remaining = min(n_faces, n_known)
+    for k in order:
+        q = qi[k]
+        g = gi[k]
+        if assigned[q] >= 0 or taken[g]:
+            continue
+        assigned[q] = g
+        taken[g] = True
+        remaining -= 1
+        if remaining == 0:
+            break
+    return assigned
+
+
+def match_faces(
+    queries: np.ndarray,
+    gallery_matrix: np.ndarray,
+    gallery_ids: np.ndarray,
+    threshold: float,
+    top_k: int = 3,
+    one_to_one: bool = True,
+    offsets: Optional[np.ndarray] = None,
+) -> List[FaceMatch]:
+    """Compare tous les visages détectés à la galerie en un seul produit matriciel.
+
+    queries: (Q, D) encodages bruts (normalisés ici).
+    gallery_matrix: (R, D) déjà normalisée L2.
+    gallery_ids: (U,) étudiants; sans `offsets`, R == U et les lignes sont alignées.
+    offsets: (U,) début des lignes de chaque étudiant (plusieurs modèles par étudiant).
+    """
+    n_faces = int(queries.shape[0]) if queries.ndim == 2 else 1
+    if n_faces == 0:
+        return []
+    if gallery_matrix.shape[0] == 0:
+        return [FaceMatch(i, None, -1.0, []) for i in range(n_faces)]
+
+    q = normalize_rows(queries)
+    sims = q @ gallery_matrix.T  # (Q, R)
+    if offsets is not None:
+        # meilleur modèle de chaque étudiant -> (Q, U)
+        sims = np.maximum.reduceat(sims, offsets, axis=1)
+
+    k = max(1, min(top_k, sims.shape[1]))
+    if k < sims.shape[1]:
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    else:
+        top = np.tile(np.arange(sims.shape[1]), (n_faces, 1))
+    top_sims = np.take_along_axis(sims, top, axis=1)
+    order = np.argsort(-top_sims, axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+    top_sims = np.take_along_axis(top_sims, order, axis=1)
+
+    if one_to_one:
+        assigned = _assign_one_to_one(sims, threshold)
+    else:
+        assigned = np.where(top_sims[:, 0] >= threshold, top[:, 0], -1)
+
+    results: List[FaceMatch] = []
+    for i in range(n_faces):
+        candidates = [(int(gallery_ids[j]), float(s)) for j, s in zip(top[i], top_sims[i])]
+        g = int(assigned[i])
+        if g >= 0:
+            results.append(FaceMatch(i, int(gallery_ids[g]), float(sims[i, g]), candidates))
+        else:
+            results.append(FaceMatch(i, None, float(top_sims[i, 0]), candidates))
+    return results
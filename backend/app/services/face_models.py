@@ -0,0 +1,139 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import FACE_MODEL_LOAD_SECONDS, observe
+
+# Project root = .../app/services/face_models.py -> parents[2] => project root
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+MODELS_DIR = PROJECT_ROOT / "models"
+
+YUNET_PATH = MODELS_DIR / "face_detection_yunet_2023mar.onnx"
+SFACE_PATH = MODELS_DIR / "face_recognition_sface_2021dec.onnx"
+
+# params YuNet: score_threshold, nms_threshold, top_k
+# (contrôle qualité actif: seuil abaissé, les visages sous FACE_DETECTION_SCORE_THRESHOLD
+# sont écartés et rapportés par face_quality; sinon seuil d'acceptation tel quel)
+DETECTION_SCORE_THRESHOLD = (
+    min(settings.FACE_DETECTION_SCORE_THRESHOLD, settings.FACE_QUALITY_DETECTION_SCORE)
+    if settings.FACE_QUALITY_ENABLED
+    else settings.FACE_DETECTION_SCORE_THRESHOLD
+)
+DETECTION_NMS_THRESHOLD = 0.3
+DETECTION_TOP_K = 5000
+
+
+class ModelPoolTimeout(Exception):
+    pass
+
+
+class FaceModels:
+    """Un couple YuNet + SFace. Non thread-safe: toujours utilisé via ModelPool.checkout()."""
+
+    def __init__(self):
+        t0 = time.perf_counter()
+        self.detector = cv2.FaceDetectorYN_create(
+            str(YUNET_PATH), "", (320, 320),
+            DETECTION_SCORE_THRESHOLD, DETECTION_NMS_THRESHOLD, DETECTION_TOP_K,
+        )
+        self.recognizer = cv2.FaceRecognizerSF_create(str(SFACE_PATH), "")
+        self._input_size: Optional[Tuple[int, int]] = None
+        observe(FACE_MODEL_LOAD_SECONDS, time.perf_counter() - t0)
+
+    def detect(self, bgr: np.ndarray) -> np.ndarray:
+        h, w = bgr.shape[:2]
+        # important: YuNet doit connaître la taille de l'image courante
+        if self._input_size != (w, h):
+            self.detector.setInputSize((w, h))
+            self._input_size = (w, h)
+
+        # detect returns (retval, faces)
+        retval, faces = self.detector.detect(bgr)
+        if faces is None or len(faces) == 0:
+            return np.empty((0, 15), dtype=np.float32)
+        return faces
+
+    def feature(self, bgr: np.ndarray, face_row: np.ndarray) -> np.ndarray:
+        """
+        face_row: [x, y, w, h, score, l0x,l0y, l1x,l1y, ..., l4x,l4y]
+        """
+        aligned = self.recognizer.alignCrop(bgr, face_row)
+        feat = self.recognizer.feature(aligned)  # shape (1, 128) float32
+        return feat.reshape(-1).astype(np.float32)
+
+    def features(self, bgr: np.ndarray, faces: np.ndarray) -> np.ndarray:
+        if len(faces) == 0:
+            return np.empty((0, 128), dtype=np.float32)
+        return np.vstack([self.feature(bgr, f) for f in faces])
+
+
+class ModelPool:
+    """Pool borné d'instances FaceModels, créées à la demande.
+
+    Chaque requête emprunte une instance le temps de son inférence: plus de
+    setInputSize concurrent sur un détecteur partagé.
+    """
+
+    def __init__(self, size: int, timeout: float, cv_threads: int = 0):
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.cv_threads = cv_threads if cv_threads > 0 else (1 if self.size > 1 else 0)
+        self._idle: "queue.LifoQueue[FaceModels]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> FaceModels:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                if self._created == 0 and self.cv_threads:
+                    # sinon chaque inférence parallèle lance un thread OpenCV par coeur
+                    cv2.setNumThreads(self.cv_threads)
+                self._created += 1
+        if create:
+            try:
+                return FaceModels()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise ModelPoolTimeout(f"aucun modèle libre après {self.timeout}s")
+
+    def release(self, models: FaceModels) -> None:
+        self._idle.put(models)
+
+    @contextmanager
+    def checkout(self) -> Iterator[FaceModels]:
+        models = self.acquire()
+        try:
+            yield models
+        finally:
+            self.release(models)
+
+
+def models_available() -> bool:
+    return YUNET_PATH.exists() and SFACE_PATH.exists()
+
+
+model_pool = ModelPool(
+    size=settings.FACE_MODEL_POOL_SIZE or (os.cpu_count() or 1),
+    timeout=settings.FACE_MODEL_POOL_TIMEOUT,
+    cv_threads=settings.FACE_CV_THREADS,
+)
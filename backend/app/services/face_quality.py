@@ -0,0 +1,83 @@
+"""Contrôle qualité des visages détectés, avant l'encodage SFace (alignCrop + feature).
+
+Rejette les visages trop petits, flous, de profil ou peu sûrs: ils ne
+matcheraient pas et coûtent une inférence chacun. Chaque rejet est rapporté
+avec ses raisons.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.core.config import settings
+
+# taille de recadrage pour la netteté (entrée SFace): variance comparable quelle que soit la taille du visage
+SHARPNESS_CROP = 112
+# nez à mi-hauteur entre yeux et bouche de face (ratio vertical)
+FRONTAL_PITCH_RATIO = 0.55
+
+
+def face_sharpness(gray: np.ndarray, box: np.ndarray) -> float:
+    """Variance du Laplacien sur le visage, ramené à SHARPNESS_CROP px."""
+    h, w = gray.shape[:2]
+    x, y, bw, bh = box
+    x0, y0 = max(int(x), 0), max(int(y), 0)
+    x1, y1 = min(int(x + bw), w), min(int(y + bh), h)
+    if x1 - x0 < 2 or y1 - y0 < 2:
+        return 0.0
+    crop = cv2.resize(gray[y0:y1, x0:x1], (SHARPNESS_CROP, SHARPNESS_CROP), interpolation=cv2.INTER_AREA)
+    return float(cv2.Laplacian(crop, cv2.CV_64F).var())
+
+
+def face_pose(face_row: np.ndarray) -> Tuple[float, float]:
+    """(lacet, tangage) approximés depuis les 5 points YuNet, 0 = de face.
+
+    lacet: décalage horizontal du nez par rapport au milieu des yeux / écart des yeux.
+    tangage: position verticale du nez entre yeux et bouche, relative à FRONTAL_PITCH_RATIO.
+    """
+    re, le, nose, rm, lm = face_row[4:14].reshape(5, 2)
+    eye_mid = (re + le) / 2
+    mouth_mid = (rm + lm) / 2
+    eye_dist = max(float(np.linalg.norm(le - re)), 1e-6)
+    yaw = float((nose[0] - eye_mid[0]) / eye_dist)
+    span = float(mouth_mid[1] - eye_mid[1])
+    pitch = float((nose[1] - eye_mid[1]) / span - FRONTAL_PITCH_RATIO) if span > 1e-6 else 1.0
+    return yaw, pitch
+
+
+def assess_faces(bgr: np.ndarray, faces: np.ndarray) -> List[List[str]]:
+    """Raisons de rejet pour chaque visage (liste vide = accepté)."""
+    if len(faces) == 0 or not settings.FACE_QUALITY_ENABLED:
+        return [[] for _ in range(len(faces))]
+    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY) if bgr.ndim == 3 else bgr
+
+    out = []
+    for f in faces:
+        reasons = []
+        if min(f[2], f[3]) < settings.FACE_QUALITY_MIN_SIZE:
+            reasons.append("too_small")
+        # jamais sous le seuil d'acceptation du détecteur, abaissé pour ce contrôle
+        if f[14] < max(settings.FACE_QUALITY_MIN_SCORE, settings.FACE_DETECTION_SCORE_THRESHOLD):
+            reasons.append("low_score")
+        yaw, pitch = face_pose(f)
+        if abs(yaw) > settings.FACE_QUALITY_MAX_YAW or abs(pitch) > settings.FACE_QUALITY_MAX_PITCH:
+            reasons.append("pose")
+        # netteté en dernier: seule mesure qui lit les pixels
+        if not reasons and face_sharpness(gray, f[:4]) < settings.FACE_QUALITY_MIN_SHARPNESS:
+            reasons.append("blurry")
+        out.append(reasons)
+    return out
+
+
+def filter_faces(
+    bgr: np.ndarray, faces: np.ndarray, reasons: Optional[List[List[str]]] = None
+) -> Tuple[np.ndarray, List[Dict]]:
+    """(visages acceptés, rejets {box, score, reasons}) — les rejets sont sérialisables tels quels."""
+    reasons = assess_faces(bgr, faces) if reasons is None else reasons
+    keep = np.array([not r for r in reasons], dtype=bool)
+    rejected = [
+        {"box": [round(float(v), 1) for v in f[:4]], "score": round(float(f[14]), 3), "reasons": r}
+        for f, r in zip(faces, reasons)
+        if r
+    ]
+    return faces[keep] if len(faces) else faces, rejected
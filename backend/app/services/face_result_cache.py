@@ -0,0 +1,92 @@
+"""Caches des photos déjà traitées, par empreinte SHA-256 du contenu envoyé.
+
+Un enseignant renvoie souvent la même photo (double appui, réseau mobile
+instable): chaque nouvel envoi refaisait décodage, détection et encodage.
+
+- embedding_cache: (empreinte, mode de détection) -> (visages, encodages, rejets).
+  La même photo envoyée pour une autre séance saute toute l'inférence.
+- result_cache: (empreinte, séance, portée, mode, version de galerie) -> résultat
+  de reconnaissance. La version change à chaque reconstruction de galerie ou
+  mise à jour de l'index: un résultat n'est jamais servi sur des encodages périmés.
+
+Process-local comme les autres caches: chaque worker uvicorn a les siens.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import FACE_CACHE_LOOKUPS, inc
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class TTLCache:
+    """LRU borné en entrées, avec expiration; taille ou TTL 0 = désactivé."""
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() >= entry[0]:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        inc(FACE_CACHE_LOOKUPS, self.name, "miss" if entry is None else "hit")
+        return None if entry is None else entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _readonly_result(result: Tuple[Any, Any, Any]):
+    # les tableaux sont partagés entre requêtes
+    for a in result[:2]:
+        a.setflags(write=False)
+    return result
+
+
+embedding_cache = TTLCache(
+    "embedding", settings.FACE_EMBED_CACHE_SIZE, settings.FACE_EMBED_CACHE_TTL
+)
+result_cache = TTLCache(
+    "result", settings.FACE_RESULT_CACHE_SIZE, settings.FACE_RESULT_CACHE_TTL
+)
+
+
+def get_analysis(digest: str, tiled: bool):
+    return embedding_cache.get((digest, tiled))
+
+
+def put_analysis(digest: str, tiled: bool, result) -> None:
+    embedding_cache.put((digest, tiled), _readonly_result(result))
@@ -0,0 +1,127 @@
+"""Détection par tuiles pour les photos d'amphithéâtre.
+
+Réduite à MAX_SIZE, une photo grand angle rend les visages du fond trop
+petits pour YuNet. Ici YuNet tourne sur des tuiles chevauchantes à la
+résolution d'origine (en parallèle, un modèle par tuile), plus une passe
+globale réduite pour les visages proches plus grands qu'une tuile; les
+résultats sont fusionnés par NMS.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Tuple
+
+import cv2
+import numpy as np
+
+from app.core.metrics import stage
+from app.services.face_image import MAX_SIZE
+from app.services.face_quality import filter_faces
+
+# colonnes x / y d'une ligne YuNet (boîte puis 5 points)
+_X_COLS = [0, 4, 6, 8, 10, 12]
+_Y_COLS = [1, 5, 7, 9, 11, 13]
+# un visage qui touche un bord intérieur de tuile est coupé: la tuile voisine le voit entier
+EDGE_MARGIN = 2
+
+Region = Tuple[int, int, int, int]
+
+
+def _starts(length: int, tile: int, step: int) -> List[int]:
+    if length <= tile:
+        return [0]
+    starts = list(range(0, length - tile, step))
+    starts.append(length - tile)
+    return starts
+
+
+def tile_grid(width: int, height: int, tile: int, overlap: int) -> List[Region]:
+    """Tuiles (x0, y0, x1, y1) de côté `tile` couvrant l'image, chevauchement `overlap`."""
+    step = max(1, tile - overlap)
+    return [
+        (x, y, min(x + tile, width), min(y + tile, height))
+        for y in _starts(height, tile, step)
+        for x in _starts(width, tile, step)
+    ]
+
+
+def _drop_cut_faces(faces: np.ndarray, region: Region, width: int, height: int) -> np.ndarray:
+    if len(faces) == 0:
+        return faces
+    x0, y0, x1, y1 = region
+    bx, by = faces[:, 0], faces[:, 1]
+    bx2, by2 = bx + faces[:, 2], by + faces[:, 3]
+    cut = np.zeros(len(faces), dtype=bool)
+    if x0 > 0:
+        cut |= bx <= EDGE_MARGIN
+    if y0 > 0:
+        cut |= by <= EDGE_MARGIN
+    if x1 < width:
+        cut |= bx2 >= (x1 - x0) - EDGE_MARGIN
+    if y1 < height:
+        cut |= by2 >= (y1 - y0) - EDGE_MARGIN
+    return faces[~cut]
+
+
+def _shift(faces: np.ndarray, dx: float, dy: float, scale: float = 1.0) -> np.ndarray:
+    faces = np.array(faces, dtype=np.float32, copy=True)
+    if scale != 1.0:
+        faces[:, :14] *= scale
+    faces[:, _X_COLS] += dx
+    faces[:, _Y_COLS] += dy
+    return faces
+
+
+def merge_detections(parts: List[np.ndarray], nms_threshold: float) -> np.ndarray:
+    parts = [p for p in parts if len(p)]
+    if not parts:
+        return np.empty((0, 15), dtype=np.float32)
+    faces = np.vstack(parts)
+    keep = cv2.dnn.NMSBoxes(
+        faces[:, :4].round().astype(int).tolist(), faces[:, 14].astype(float).tolist(), 0.0, nms_threshold,
+    )
+    keep = np.asarray(keep, dtype=np.int64).reshape(-1)
+    return faces[np.sort(keep)]
+
+
+def detect_tiled(
+    detect: Callable[[np.ndarray], np.ndarray],
+    bgr: np.ndarray,
+    tile: int,
+    overlap: int,
+    workers: int,
+    nms_threshold: float = 0.3,
+    coarse_size: int = MAX_SIZE,
+) -> np.ndarray:
+    """Détections (F, 15) en coordonnées de `bgr`; `detect` doit être thread-safe (backend d'inférence)."""
+    h, w = bgr.shape[:2]
+    regions = tile_grid(w, h, tile, overlap)
+    if len(regions) == 1:
+        return detect(bgr)
+
+    scale = max(w, h) / float(coarse_size)
+    coarse = cv2.resize(bgr, (int(w / scale), int(h / scale)), interpolation=cv2.INTER_AREA) if scale > 1 else None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(regions) + 1))) as pool:
+        tile_futs = [
+            (region, pool.submit(detect, np.ascontiguousarray(bgr[region[1]:region[3], region[0]:region[2]])))
+            for region in regions
+        ]
+        coarse_fut = pool.submit(detect, coarse) if coarse is not None else None
+
+        parts = [
+            _shift(_drop_cut_faces(fut.result(), region, w, h), region[0], region[1])
+            for region, fut in tile_futs
+        ]
+        if coarse_fut is not None:
+            found = coarse_fut.result()
+            if len(found):
+                parts.append(_shift(found, 0, 0, scale))
+    return merge_detections(parts, nms_threshold)
+
+
+def analyze_tiled(backend, bgr: np.ndarray, tile: int, overlap: int, workers: int):
+    """Même résultat que backend.analyze (visages, encodages, rejets), détection par tuiles."""
+    with stage("detect_tiled"):
+        faces = detect_tiled(backend.detect, bgr, tile, overlap, workers)
+    with stage("quality"):
+        faces, rejected = filter_faces(bgr, faces)
+    return faces, backend.features(bgr, faces), rejected
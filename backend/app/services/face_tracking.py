@@ -0,0 +1,136 @@
+"""Suivi des visages entre images d'un flux vidéo (caméra de porte).
+
+Chaque visage détecté est associé à une piste par recouvrement (IoU) avec la
+boîte de l'image précédente. Une piste n'est encodée (SFace) que tant qu'elle
+n'est pas confirmée: les votes s'accumulent, et au-delà de `confirm_votes`
+votes majoritaires pour un même étudiant la piste est confirmée et n'est
+plus jamais ré-encodée.
+"""
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """IoU entre boîtes (x, y, w, h): (A, 4) x (B, 4) -> (A, B)."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    ax1, ay1 = a[:, 0:1], a[:, 1:2]
+    ax2, ay2 = ax1 + a[:, 2:3], ay1 + a[:, 3:4]
+    bx1, by1 = b[:, 0], b[:, 1]
+    bx2, by2 = bx1 + b[:, 2], by1 + b[:, 3]
+    iw = np.clip(np.minimum(ax2, bx2) - np.maximum(ax1, bx1), 0, None)
+    ih = np.clip(np.minimum(ay2, by2) - np.maximum(ay1, by1), 0, None)
+    inter = iw * ih
+    union = a[:, 2:3] * a[:, 3:4] + b[:, 2] * b[:, 3] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+class Track:
+    __slots__ = ("track_id", "box", "face", "hits", "missed", "votes", "best_similarity",
+                 "embeds", "last_embed_frame", "user_id", "gave_up")
+
+    def __init__(self, track_id: int, face: np.ndarray):
+        self.track_id = track_id
+        self.face = face
+        self.box = face[:4].copy()
+        self.hits = 1
+        self.missed = 0
+        # user_id (None = inconnu) -> nombre de votes
+        self.votes: Counter = Counter()
+        self.best_similarity: Dict[int, float] = {}
+        self.embeds = 0
+        self.last_embed_frame = -1
+        self.user_id: Optional[int] = None  # étudiant confirmé
+        self.gave_up = False  # trop d'encodages sans décision
+
+    @property
+    def confirmed(self) -> bool:
+        return self.user_id is not None
+
+    def to_dict(self) -> dict:
+        leader = self.votes.most_common(1)
+        return {
+            "track_id": self.track_id,
+            "box": [round(float(v), 1) for v in self.box],
+            "user_id": self.user_id,
+            "candidate": leader[0][0] if leader and not self.confirmed else None,
+            "votes": sum(self.votes.values()),
+            "confirmed": self.confirmed,
+        }
+
+
+class FaceTracker:
+    def __init__(
+        self,
+        iou_threshold: float = 0.3,
+        max_missed: int = 5,
+        confirm_votes: int = 3,
+        reembed_every: int = 2,
+        max_embeds: int = 10,
+    ):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.confirm_votes = confirm_votes
+        self.reembed_every = max(1, reembed_every)
+        self.max_embeds = max_embeds
+        self.tracks: List[Track] = []
+        self.frame = 0
+        self._next_id = 1
+
+    def update(self, faces: np.ndarray) -> List[Track]:
+        """Associe les détections de l'image courante aux pistes; retourne la piste de chaque visage."""
+        self.frame += 1
+        boxes = faces[:, :4] if len(faces) else np.empty((0, 4), dtype=np.float32)
+        ious = iou_matrix(np.array([t.box for t in self.tracks]).reshape(-1, 4), boxes)
+
+        assigned: List[Optional[Track]] = [None] * len(faces)
+        used = set()
+        # association gloutonne par IoU décroissant
+        for flat in np.argsort(-ious, axis=None):
+            ti, fi = np.unravel_index(flat, ious.shape)
+            if ious[ti, fi] < self.iou_threshold:
+                break
+            if ti in used or assigned[fi] is not None:
+                continue
+            track = self.tracks[ti]
+            track.face, track.box = faces[fi], faces[fi, :4].copy()
+            track.hits += 1
+            track.missed = 0
+            assigned[fi] = track
+            used.add(ti)
+
+        for ti, track in enumerate(self.tracks):
+            if ti not in used:
+                track.missed += 1
+        self.tracks = [t for t in self.tracks if t.missed <= self.max_missed]
+
+        for fi in range(len(faces)):
+            if assigned[fi] is None:
+                track = Track(self._next_id, faces[fi])
+                self._next_id += 1
+                self.tracks.append(track)
+                assigned[fi] = track
+        return assigned
+
+    def needs_embedding(self, track: Track) -> bool:
+        if track.confirmed or track.gave_up:
+            return False
+        return track.last_embed_frame < 0 or self.frame - track.last_embed_frame >= self.reembed_every
+
+    def add_vote(self, track: Track, user_id: Optional[int], similarity: float) -> bool:
+        """Enregistre le résultat d'un encodage; True si la piste vient d'être confirmée."""
+        track.embeds += 1
+        track.last_embed_frame = self.frame
+        track.votes[user_id] += 1
+        if user_id is not None:
+            track.best_similarity[user_id] = max(similarity, track.best_similarity.get(user_id, -1.0))
+
+        leader, count = track.votes.most_common(1)[0]
+        if leader is not None and count >= self.confirm_votes and count * 2 > sum(track.votes.values()):
+            track.user_id = leader
+            return True
+        if track.embeds >= self.max_embeds:
+            track.gave_up = True
+        return False
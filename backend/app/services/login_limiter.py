@@ -0,0 +1,59 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict
+
+
+class LoginRateLimiter:
+    """Limite les échecs de connexion par compte sur une fenêtre glissante.
+
+    Compteurs en mémoire, propres à chaque process: avec N workers uvicorn/gunicorn,
+    un attaquant dispose jusqu'à N x max_failures essais par fenêtre.
+    """
+
+    def __init__(self, max_failures: int, window_seconds: float, max_tracked: int = 100_000):
+        self.max_failures = max_failures
+        self.window_seconds = window_seconds
+        self.max_tracked = max_tracked
+        self._failures: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(username: str) -> str:
+        return username.strip().lower()
+
+    def _prune(self, q: Deque[float], now: float) -> None:
+        while q and now - q[0] >= self.window_seconds:
+            q.popleft()
+
+    def retry_after(self, username: str) -> float:
+        """Secondes avant la prochaine tentative autorisée (0 = autorisée)."""
+        if self.max_failures <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            q = self._failures.get(self._key(username))
+            if not q:
+                return 0.0
+            self._prune(q, now)
+            if len(q) < self.max_failures:
+                return 0.0
+            return self.window_seconds - (now - q[0])
+
+    def record_failure(self, username: str) -> None:
+        if self.max_failures <= 0:
+            return
+        now = time.monotonic()
+        key = self._key(username)
+        with self._lock:
+            if key not in self._failures and len(self._failures) >= self.max_tracked:
+                # purge des comptes dont la fenêtre est écoulée
+                for k in [k for k, q in self._failures.items() if not q or now - q[-1] >= self.window_seconds]:
+                    del self._failures[k]
+            q = self._failures.setdefault(key, deque(maxlen=self.max_failures))
+            self._prune(q, now)
+            q.append(now)
+
+    def reset(self, username: str) -> None:
+        with self._lock:
+            self._failures.pop(self._key(username), None)
@@ -0,0 +1,67 @@
+"""Pagination par curseur (keyset) pour les listes d'administration.
+
+Le curseur encode les valeurs de tri de la dernière ligne renvoyée; la page
+suivante filtre "après" ces valeurs au lieu d'un OFFSET, donc le coût reste
+constant quelle que soit la profondeur.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import DateTime, and_, or_
+from sqlalchemy.orm import Query
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+# (colonne, tri décroissant ?) — la dernière clé doit être unique (id)
+SortKey = Tuple[Any, bool]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[SortKey]) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError
+        return [
+            datetime.fromisoformat(v) if isinstance(col.type, DateTime) else v
+            for (col, _), v in zip(keys, values)
+        ]
+    except (ValueError, TypeError):
+        raise InvalidCursor("curseur invalide")
+
+
+def _after(keys: Sequence[SortKey], values: Sequence[Any]):
+    # (k1 > v1) OR (k1 = v1 AND ((k2 > v2) OR ...)), sens inversé pour les clés décroissantes
+    (col, desc), value = keys[0], values[0]
+    strict = col < value if desc else col > value
+    if len(keys) == 1:
+        return strict
+    return or_(strict, and_(col == value, _after(keys[1:], values[1:])))
+
+
+def keyset_page(
+    query: Query, keys: Sequence[SortKey], cursor: Optional[str], limit: Optional[int]
+) -> Tuple[list, Optional[str]]:
+    """Retourne (lignes, curseur suivant ou None). limit None: toutes les lignes après le curseur."""
+    if cursor:
+        query = query.filter(_after(keys, decode_cursor(cursor, keys)))
+    query = query.order_by(*[col.desc() if desc else col.asc() for col, desc in keys])
+    if limit is None:
+        return query.all(), None
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], col.key) for col, _ in keys])
@@ -0,0 +1,272 @@
+"""File persistante de tâches de reconnaissance (table recognition_jobs), sans broker externe.
+
+L'envoi d'une photo en mode asynchrone crée une ligne QUEUED et rend la main;
+des threads workers (FACE_JOB_WORKERS par process API, ou recognition_worker.py)
+prennent la tâche QUEUED de la séance la plus ancienne par un UPDATE
+conditionnel: plusieurs process peuvent vider la même file sans se marcher
+dessus. Une tâche RUNNING abandonnée (process tué) est remise en file après
+FACE_JOB_STALE_SECONDS, au plus FACE_JOB_MAX_ATTEMPTS fois.
+"""
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.recognition_job import JobStatus, RecognitionJob
+
+logger = logging.getLogger(__name__)
+
+# nouvel essai d'une tâche remise en file après un échec transitoire (serveur saturé)
+RETRY_DELAY_SECONDS = 2.0
+MAINTENANCE_INTERVAL = 60.0
+
+
+class QueueFull(Exception):
+    """Trop de tâches en attente (-> 429)."""
+
+
+class JobFailed(Exception):
+    """Échec d'une tâche, rapporté comme l'erreur HTTP équivalente; `retry`: échec transitoire."""
+
+    def __init__(self, status_code: int, detail: str, retry: bool = False):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry = retry
+
+
+# handler(db, job) -> résultat JSON-sérialisable, ou JobFailed
+JobHandler = Callable[[Session, RecognitionJob], Dict[str, Any]]
+
+
+def _queued(db: Session) -> int:
+    return db.query(func.count(RecognitionJob.id)).filter(RecognitionJob.status == JobStatus.QUEUED).scalar()
+
+
+def enqueue(
+    db: Session, session_id: int, priority: datetime, image: bytes, scope: str,
+    detection: Optional[str], created_by: Optional[int],
+) -> RecognitionJob:
+    if settings.FACE_JOB_MAX_QUEUED > 0 and _queued(db) >= settings.FACE_JOB_MAX_QUEUED:
+        raise QueueFull()
+    job = RecognitionJob(
+        session_id=session_id, priority=priority, image=image, scope=scope,
+        detection=detection, created_by=created_by, status=JobStatus.QUEUED,
+    )
+    db.add(job)
+    db.commit()
+    job_workers.notify()
+    return job
+
+
+def queue_position(db: Session, job: RecognitionJob) -> Optional[int]:
+    """Tâches en attente avant celle-ci (None si elle n'est plus en file)."""
+    if job.status != JobStatus.QUEUED:
+        return None
+    return db.query(func.count(RecognitionJob.id)).filter(
+        RecognitionJob.status == JobStatus.QUEUED,
+        or_(
+            RecognitionJob.priority < job.priority,
+            and_(RecognitionJob.priority == job.priority, RecognitionJob.id < job.id),
+        ),
+    ).scalar()
+
+
+def claim_next(db: Session) -> Optional[RecognitionJob]:
+    """Passe la prochaine tâche QUEUED en RUNNING; None si la file est vide."""
+    for _ in range(5):
+        job_id = (
+            db.query(RecognitionJob.id)
+            .filter(RecognitionJob.status == JobStatus.QUEUED)
+            .order_by(RecognitionJob.priority, RecognitionJob.id)
+            .limit(1)
+            .scalar()
+        )
+        if job_id is None:
+            return None
+        claimed = db.execute(
+            update(RecognitionJob)
+            .where(RecognitionJob.id == job_id, RecognitionJob.status == JobStatus.QUEUED)
+            .values(status=JobStatus.RUNNING, started_at=datetime.utcnow(), attempts=RecognitionJob.attempts + 1)
+        ).rowcount
+        db.commit()
+        if claimed == 1:
+            return db.get(RecognitionJob, job_id)
+        # prise par un autre worker entre le SELECT et l'UPDATE
+    return None
+
+
+def complete(db: Session, job: RecognitionJob, result: Dict[str, Any]) -> None:
+    job.status = JobStatus.DONE
+    job.result = json.dumps(result, default=str)
+    job.image = None
+    job.finished_at = datetime.utcnow()
+    db.commit()
+
+
+def fail(db: Session, job: RecognitionJob, status_code: int, detail: str) -> None:
+    job.status = JobStatus.FAILED
+    job.error_status = status_code
+    job.error = detail
+    job.image = None
+    job.finished_at = datetime.utcnow()
+    db.commit()
+
+
+def release(db: Session, job: RecognitionJob, status_code: int, detail: str) -> None:
+    """Échec transitoire: remise en file, ou échec définitif après FACE_JOB_MAX_ATTEMPTS essais."""
+    if job.attempts >= settings.FACE_JOB_MAX_ATTEMPTS:
+        fail(db, job, status_code, detail)
+        return
+    job.status = JobStatus.QUEUED
+    job.started_at = None
+    db.commit()
+
+
+def requeue_stale(db: Session) -> int:
+    """Remet en file les tâches RUNNING abandonnées (process arrêté pendant le traitement)."""
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.FACE_JOB_STALE_SECONDS)
+    stale = RecognitionJob.status == JobStatus.RUNNING, RecognitionJob.started_at < cutoff
+    n = db.execute(
+        update(RecognitionJob)
+        .where(*stale, RecognitionJob.attempts >= settings.FACE_JOB_MAX_ATTEMPTS)
+        .values(status=JobStatus.FAILED, error_status=500, error="Traitement interrompu",
+                image=None, finished_at=datetime.utcnow())
+    ).rowcount
+    n += db.execute(
+        update(RecognitionJob).where(*stale).values(status=JobStatus.QUEUED, started_at=None)
+    ).rowcount
+    db.commit()
+    return n
+
+
+def purge_finished(db: Session) -> int:
+    cutoff = datetime.utcnow() - timedelta(hours=settings.FACE_JOB_RETENTION_HOURS)
+    n = (
+        db.query(RecognitionJob)
+        .filter(RecognitionJob.status.in_([JobStatus.DONE, JobStatus.FAILED]), RecognitionJob.finished_at < cutoff)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return n
+
+
+def job_to_dict(db: Session, job: RecognitionJob) -> Dict[str, Any]:
+    out: Dict[str, Any] = {
+        "job_id": job.id,
+        "session_id": job.session_id,
+        "status": job.status.value,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+    if job.status == JobStatus.QUEUED:
+        out["position"] = queue_position(db, job)
+    elif job.status == JobStatus.DONE:
+        out["result"] = json.loads(job.result) if job.result else None
+    elif job.status == JobStatus.FAILED:
+        out["error"] = {"status_code": job.error_status, "detail": job.error}
+    return out
+
+
+class JobWorkers:
+    """Threads qui vident la file; réveillés par enqueue() dans le même process, sinon par sondage."""
+
+    def __init__(self, concurrency: int, poll_interval: float):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._handler: Optional[JobHandler] = None
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Condition()
+        self._maintained_at = 0.0
+
+    def start(self, handler: JobHandler) -> None:
+        if self._threads or self.concurrency <= 0:
+            return
+        self._handler = handler
+        self._stop.clear()
+        for i in range(self.concurrency):
+            t = threading.Thread(target=self._loop, name=f"recognition-job-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        logger.info("%d worker(s) de reconnaissance démarré(s)", self.concurrency)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def notify(self) -> None:
+        with self._wakeup:
+            self._wakeup.notify()
+
+    def _wait(self, seconds: float) -> None:
+        with self._wakeup:
+            if not self._stop.is_set():
+                self._wakeup.wait(seconds)
+
+    def _maintain(self, db: Session) -> None:
+        # un seul thread à la fois, toutes les MAINTENANCE_INTERVAL secondes
+        now = time.monotonic()
+        with self._wakeup:
+            if now - self._maintained_at < MAINTENANCE_INTERVAL:
+                return
+            self._maintained_at = now
+        requeued = requeue_stale(db)
+        purged = purge_finished(db)
+        if requeued or purged:
+            logger.info("file de reconnaissance: %d tâche(s) remise(s) en file, %d purgée(s)", requeued, purged)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                self._maintain(db)
+                job = claim_next(db)
+                if job is None:
+                    db.close()
+                    self._wait(self.poll_interval)
+                    continue
+                self._run(db, job)
+            except Exception:
+                logger.exception("worker de reconnaissance")
+                db.rollback()
+                self._wait(self.poll_interval)
+            finally:
+                db.close()
+
+    def _run(self, db: Session, job: RecognitionJob) -> None:
+        try:
+            result = self._handler(db, job)
+        except JobFailed as e:
+            db.rollback()
+            if e.retry:
+                release(db, job, e.status_code, e.detail)
+                self._wait(RETRY_DELAY_SECONDS)
+            else:
+                fail(db, job, e.status_code, e.detail)
+            return
+        except Exception:
+            logger.exception("tâche de reconnaissance %s", job.id)
+            db.rollback()
+            fail(db, job, 500, "Erreur pendant l'analyse de l'image")
+            return
+        complete(db, job, result)
+
+
+job_workers = JobWorkers(
+    concurrency=settings.FACE_JOB_WORKERS,
+    poll_interval=settings.FACE_JOB_POLL_INTERVAL,
+)
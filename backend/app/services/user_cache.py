@@ -0,0 +1,59 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.core.config import settings
+from app.schemas.auth import CurrentUser
+
+
+class UserCache:
+    """Cache TTL process-local: sujet du token (email) -> CurrentUser."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, CurrentUser]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sub: str) -> Optional[CurrentUser]:
+        if self.ttl_seconds <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(sub)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[sub]
+                return None
+            self._entries.move_to_end(sub)
+            return user
+
+    def put(self, sub: str, user: CurrentUser) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[sub] = (time.monotonic() + self.ttl_seconds, user)
+            self._entries.move_to_end(sub)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, sub: str) -> None:
+        with self._lock:
+            self._entries.pop(sub, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(
+    max_entries=settings.AUTH_USER_CACHE_SIZE,
+    ttl_seconds=settings.AUTH_USER_CACHE_TTL,
+)
+
+
+def invalidate_user(email: str) -> None:
+    """À appeler après toute modification d'un utilisateur (rôle, activation, email)."""
+    user_cache.invalidate(email)
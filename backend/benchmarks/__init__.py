@@ -0,0 +1 @@
+"""Benchmarks du backend (lancer depuis backend/: python -m benchmarks.<nom>)."""
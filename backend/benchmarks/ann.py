@@ -0,0 +1,117 @@
+"""Rappel et latence de l'index IVF (app/services/face_ann.py) face à la recherche exacte.
+
+Usage:
+    python -m benchmarks.ann [--students 20000] [--templates 2] [--queries 500] [--nprobe 1 4 8 16 32]
+    python -m benchmarks.ann --from-db   # encodages réels de DATABASE_URL (lecture seule)
+
+Données synthétiques: un centre aléatoire par étudiant, modèles et requêtes
+bruités autour (similarité cosine ~0.6-0.8 comme SFace). Rappel@1 = même
+étudiant trouvé que la recherche exacte (match_faces sur toute la galerie).
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+
+from app.services.face_ann import IVFIndex
+from app.services.face_embedding import EMBEDDING_DIM
+from app.services.face_matching import match_faces, normalize_rows
+
+THRESHOLD = 0.40
+
+
+def synthetic(students: int, templates: int, queries: int, noise: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = normalize_rows(rng.standard_normal((students, EMBEDDING_DIM)))
+    user_ids = np.repeat(np.arange(1, students + 1), templates)
+    vectors = centers[user_ids - 1] + noise * rng.standard_normal((len(user_ids), EMBEDDING_DIM)) / np.sqrt(EMBEDDING_DIM)
+    face_ids = np.arange(1, len(user_ids) + 1)
+    truth = rng.integers(1, students + 1, queries)
+    q = centers[truth - 1] + noise * rng.standard_normal((queries, EMBEDDING_DIM)) / np.sqrt(EMBEDDING_DIM)
+    return vectors.astype(np.float32), user_ids, face_ids, q.astype(np.float32)
+
+
+def from_db(queries: int, noise: float, seed: int = 0):
+    from app.db.session import SessionLocal
+    from app.services.face_ann import _face_rows
+
+    db = SessionLocal()
+    try:
+        vectors, user_ids, face_ids = _face_rows(db)
+    finally:
+        db.close()
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(vectors), queries)
+    q = normalize_rows(vectors[picks]) + noise * rng.standard_normal((queries, EMBEDDING_DIM)) / np.sqrt(EMBEDDING_DIM)
+    return vectors, user_ids, face_ids, q.astype(np.float32)
+
+
+def exact(vectors: np.ndarray, user_ids: np.ndarray, q: np.ndarray) -> Tuple[np.ndarray, float]:
+    order = np.argsort(user_ids, kind="stable")
+    matrix = normalize_rows(vectors[order])
+    ids, offsets = np.unique(user_ids[order], return_index=True)
+    found, samples = [], []
+    for row in q:
+        t0 = time.perf_counter()
+        m = match_faces(row[None, :], matrix, ids, THRESHOLD, top_k=1, offsets=offsets)[0]
+        samples.append((time.perf_counter() - t0) * 1000)
+        found.append(-1 if m.user_id is None else m.user_id)
+    return np.asarray(found), statistics.median(samples)
+
+
+def approx(index: IVFIndex, q: np.ndarray, nprobe: int) -> Tuple[np.ndarray, float]:
+    found, samples = [], []
+    for row in q:
+        t0 = time.perf_counter()
+        m = index.match(row[None, :], THRESHOLD, top_k=1, nprobe=nprobe)[0]
+        samples.append((time.perf_counter() - t0) * 1000)
+        found.append(-1 if m.user_id is None else m.user_id)
+    return np.asarray(found), statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=20_000)
+    parser.add_argument("--templates", type=int, default=2)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=0.8)
+    parser.add_argument("--nlist", type=int, default=0, help="0 = ~sqrt(N)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--from-db", action="store_true")
+    args = parser.parse_args()
+
+    if args.from_db:
+        vectors, user_ids, face_ids, q = from_db(args.queries, args.noise)
+    else:
+        vectors, user_ids, face_ids, q = synthetic(args.students, args.templates, args.queries, args.noise)
+    print(f"{len(vectors)} encodages, {len(np.unique(user_ids))} étudiants, {len(q)} requêtes")
+
+    t0 = time.perf_counter()
+    index = IVFIndex.build(vectors, user_ids, face_ids, nlist=args.nlist)
+    print(f"construction: {time.perf_counter() - t0:.2f}s, {index.nlist} listes")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "face_ann.npz"
+        t0 = time.perf_counter()
+        index.save(path)
+        t_save = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        IVFIndex.load(path)
+        print(f"sauvegarde: {t_save:.2f}s, chargement: {time.perf_counter() - t0:.2f}s, "
+              f"{path.stat().st_size / 1e6:.1f} Mo")
+
+    truth, t_exact = exact(vectors, user_ids, q)
+    print(f"\nexact: {t_exact:.2f} ms/requête, reconnus {np.mean(truth >= 0):.1%}")
+    print(f"{'nprobe':>7} {'rappel@1':>9} {'ms/req':>8} {'accél.':>7}")
+    for nprobe in args.nprobe:
+        found, t = approx(index, q, nprobe)
+        recall = float(np.mean(found == truth))
+        print(f"{nprobe:>7} {recall:>9.1%} {t:>8.2f} {t_exact / max(t, 1e-6):>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Compare le décodage d'image actuel (cv2 réduit) à l'ancien chemin PIL.
+
+Usage:
+    python -m benchmarks.decode [images ou dossiers ...] [--repeat 10] [--max-size 1280]
+
+Sans argument, génère des JPEG synthétiques 12 MP (avec et sans orientation EXIF).
+"""
+import argparse
+import io
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+from app.services.face_image import MAX_SIZE, decode_image, decode_image_legacy
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png"}
+
+
+def _synthetic_jpegs() -> List[Tuple[str, bytes]]:
+    rng = np.random.default_rng(0)
+    h, w = 3000, 4000
+    yy, xx = np.mgrid[0:h, 0:w]
+    base = np.stack([(xx * 255 // w), (yy * 255 // h), ((xx + yy) * 255 // (w + h))], axis=-1).astype(np.uint8)
+    noisy = np.clip(base.astype(np.int16) + rng.integers(-20, 20, base.shape), 0, 255).astype(np.uint8)
+
+    out = []
+    for name, orientation in (("synthetic_12mp.jpg", None), ("synthetic_12mp_exif6.jpg", 6)):
+        buf = io.BytesIO()
+        img = Image.fromarray(noisy)
+        if orientation:
+            exif = Image.Exif()
+            exif[0x0112] = orientation
+            img.save(buf, format="JPEG", quality=90, exif=exif)
+        else:
+            img.save(buf, format="JPEG", quality=90)
+        out.append((name, buf.getvalue()))
+    return out
+
+
+def _collect(paths: List[str]) -> List[Tuple[str, bytes]]:
+    files: List[Path] = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            files.extend(sorted(f for f in p.rglob("*") if f.suffix.lower() in IMAGE_EXTS))
+        else:
+            files.append(p)
+    return [(str(f), f.read_bytes()) for f in files]
+
+
+def _time(fn: Callable[[bytes, int], np.ndarray], data: bytes, max_size: int, repeat: int) -> Tuple[float, np.ndarray]:
+    out = fn(data, max_size)  # échauffement
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(data, max_size)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples), out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--max-size", type=int, default=MAX_SIZE)
+    args = parser.parse_args()
+
+    images = _collect(args.paths) if args.paths else _synthetic_jpegs()
+    if not images:
+        parser.error("aucune image trouvée")
+
+    totals: Dict[str, float] = {"legacy": 0.0, "fast": 0.0}
+    print(f"{'image':40s} {'legacy ms':>10s} {'fast ms':>10s} {'speedup':>8s}  shape / écart moyen")
+    for name, data in images:
+        t_old, img_old = _time(decode_image_legacy, data, args.max_size, args.repeat)
+        t_new, img_new = _time(decode_image, data, args.max_size, args.repeat)
+        totals["legacy"] += t_old
+        totals["fast"] += t_new
+
+        if img_old.shape == img_new.shape:
+            diff = f"{np.abs(img_old.astype(np.int16) - img_new.astype(np.int16)).mean():.2f}"
+        else:
+            diff = f"shapes {img_old.shape} vs {img_new.shape}"
+        print(f"{Path(name).name[:40]:40s} {t_old:10.1f} {t_new:10.1f} {t_old / t_new:7.1f}x  {img_new.shape} / {diff}")
+
+    print(f"{'TOTAL':40s} {totals['legacy']:10.1f} {totals['fast']:10.1f} {totals['legacy'] / totals['fast']:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Génère un jeu de données synthétique volumineux (insertions en masse), pour les benchmarks.
+
+Usage:
+    python -m benchmarks.generate --url sqlite:///bench_small.db --scale small
+    python -m benchmarks.generate --url mysql+pymysql://root:@localhost/bench --scale large
+    python -m benchmarks.generate --url ... --groups 500 --students 20000 --weeks 26
+
+Échelles prédéfinies (modifiables par option):
+    small   20 groupes,   1 000 étudiants, 12 semaines
+    medium  200 groupes, 10 000 étudiants, 26 semaines
+    large   2 000 groupes, 100 000 étudiants, 104 semaines
+
+Les tables sont recréées: --url doit désigner une base dédiée (jamais DATABASE_URL).
+Comptes créés: bench-admin@bench.local et teacherN@bench.local (mot de passe --password).
+Même --seed = mêmes données.
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.security import hash_password
+from app.db.migrations import run_migrations
+from app.db.session import Base
+from app import models  # noqa: F401
+from app.models.attendance import Attendance, AttendanceStatus
+from app.models.group import Group
+from app.models.session import Session as SessionModel
+from app.models.student_face import StudentFace
+from app.models.user import User, RoleEnum
+from app.models.user_group import UserGroup
+from app.services.face_embedding import EMBEDDING_DIM, encode_embedding
+
+BATCH = 10_000
+ADMIN_EMAIL = "bench-admin@bench.local"
+DEFAULT_PASSWORD = "bench123"
+
+SCALES: Dict[str, Dict[str, int]] = {
+    "small": {"groups": 20, "students": 1_000, "teachers": 10, "weeks": 12},
+    "medium": {"groups": 200, "students": 10_000, "teachers": 50, "weeks": 26},
+    "large": {"groups": 2_000, "students": 100_000, "teachers": 200, "weeks": 104},
+}
+
+
+def insert_batches(conn, table, rows: Iterable[dict], batch: int = BATCH) -> int:
+    """executemany par lots: mémoire bornée même pour des millions de lignes."""
+    n = 0
+    chunk: List[dict] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= batch:
+            conn.execute(table.insert(), chunk)
+            n += len(chunk)
+            chunk = []
+    if chunk:
+        conn.execute(table.insert(), chunk)
+        n += len(chunk)
+    return n
+
+
+def _users(n_students: int, n_teachers: int, password_hash: str) -> Iterator[dict]:
+    yield {"id": 1, "first_name": "Bench", "last_name": "Admin", "email": ADMIN_EMAIL,
+           "role": RoleEnum.ADMIN, "is_active": True, "hashed_password": password_hash}
+    for t in range(n_teachers):
+        yield {"id": 2 + t, "first_name": f"Teacher{t + 1}", "last_name": "Bench", "email": f"teacher{t + 1}@bench.local",
+               "role": RoleEnum.TEACHER, "is_active": True, "hashed_password": password_hash}
+    first = 2 + n_teachers
+    for s in range(n_students):
+        yield {"id": first + s, "first_name": f"Student{s + 1}", "last_name": f"Bench{s % 997}",
+               "email": f"student{s + 1}@bench.local", "role": RoleEnum.STUDENT, "is_active": True,
+               "hashed_password": None}
+
+
+def _faces(rng: np.random.Generator, student_ids: np.ndarray, templates: int, dtype: str) -> Iterator[dict]:
+    now = datetime.utcnow()
+    for start in range(0, len(student_ids), BATCH):
+        ids = student_ids[start:start + BATCH]
+        centers = rng.standard_normal((len(ids), EMBEDDING_DIM)).astype(np.float32)
+        for t in range(templates):
+            # modèles d'un même étudiant: centre + bruit (similarité ~0.6-0.8, comme SFace)
+            feats = centers + 0.8 * rng.standard_normal(centers.shape).astype(np.float32)
+            for uid, feat in zip(ids, feats):
+                yield {"user_id": int(uid), "embedding": encode_embedding(feat, dtype), "created_at": now}
+
+
+def _week_sessions(rng: np.random.Generator, week: int, first_id: int, n_groups: int, teacher_ids: List,
+                   per_week: int, start: datetime) -> List[dict]:
+    out = []
+    for g in range(n_groups):
+        slots = rng.choice(5 * 4, min(per_week, 20), replace=False)  # 5 jours x 4 créneaux
+        for slot in sorted(slots):
+            sid = first_id + len(out)
+            t = start + timedelta(weeks=week, days=int(slot // 4), hours=8 + 2 * int(slot % 4))
+            out.append({"id": sid, "group_id": g + 1, "teacher_id": teacher_ids[sid % len(teacher_ids)],
+                        "start_time": t, "end_time": t + timedelta(hours=2)})
+    return out
+
+
+def _attendance(rng: np.random.Generator, sessions: Iterable[dict], members: Dict[int, np.ndarray],
+                presence: float) -> Iterator[dict]:
+    for sess in sessions:
+        group_students = members[sess["group_id"]]
+        present = group_students[rng.random(len(group_students)) < presence]
+        for uid in present:
+            yield {"session_id": sess["id"], "user_id": int(uid), "status": AttendanceStatus.PRESENT,
+                   "timestamp": sess["start_time"] + timedelta(minutes=int(rng.integers(0, 15)))}
+
+
+def generate(
+    engine: Engine,
+    *,
+    groups: int,
+    students: int,
+    teachers: int,
+    weeks: int,
+    sessions_per_week: int = 3,
+    presence: float = 0.85,
+    templates: int = 1,
+    dtype: str = "float32",
+    password: str = DEFAULT_PASSWORD,
+    seed: int = 42,
+    start: datetime = datetime(2024, 9, 2, 0, 0),
+) -> Dict[str, int]:
+    rng = np.random.default_rng(seed)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    run_migrations(engine)
+
+    # un seul hash bcrypt pour tous les comptes (le coût bcrypt est mesuré au login, pas ici)
+    password_hash = hash_password(password)
+    teacher_ids = list(range(2, 2 + teachers)) or [None]
+    student_ids = np.arange(2 + teachers, 2 + teachers + students)
+    group_of = np.arange(students) % groups + 1
+    members = {g: student_ids[group_of == g] for g in range(1, groups + 1)}
+
+    counts: Dict[str, int] = {}
+    with engine.begin() as conn:
+        counts["groups"] = insert_batches(conn, Group.__table__, ({"id": g, "name": f"BENCH-{g}"} for g in range(1, groups + 1)))
+        counts["users"] = insert_batches(conn, User.__table__, _users(students, teachers, password_hash))
+        counts["user_groups"] = insert_batches(conn, UserGroup.__table__, (
+            {"user_id": int(uid), "group_id": int(g), "created_at": None} for uid, g in zip(student_ids, group_of)
+        ))
+        counts["student_faces"] = insert_batches(conn, StudentFace.__table__, _faces(rng, student_ids, templates, dtype))
+
+    # une transaction par semaine: mémoire et journal bornés sur les gros volumes
+    counts["sessions"] = counts["attendance"] = 0
+    for week in range(weeks):
+        sessions = _week_sessions(rng, week, counts["sessions"] + 1, groups, teacher_ids, sessions_per_week, start)
+        with engine.begin() as conn:
+            counts["sessions"] += insert_batches(conn, SessionModel.__table__, sessions)
+            counts["attendance"] += insert_batches(
+                conn, Attendance.__table__, _attendance(rng, sessions, members, presence)
+            )
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", required=True)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--groups", type=int)
+    parser.add_argument("--students", type=int)
+    parser.add_argument("--teachers", type=int)
+    parser.add_argument("--weeks", type=int)
+    parser.add_argument("--sessions-per-week", type=int, default=3)
+    parser.add_argument("--presence", type=float, default=0.85)
+    parser.add_argument("--templates", type=int, default=1, help="modèles de visage par étudiant")
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.url == settings.DATABASE_URL:
+        parser.error("--url doit pointer vers une base dédiée au benchmark (les tables sont recréées)")
+    sizes = dict(SCALES[args.scale])
+    for key in sizes:
+        if getattr(args, key) is not None:
+            sizes[key] = getattr(args, key)
+
+    t0 = time.perf_counter()
+    counts = generate(
+        create_engine(args.url), **sizes,
+        sessions_per_week=args.sessions_per_week, presence=args.presence,
+        templates=args.templates, dtype=args.dtype, password=args.password, seed=args.seed,
+    )
+    elapsed = time.perf_counter() - t0
+    total = sum(counts.values())
+    print(f"{total} lignes en {elapsed:.1f}s ({total / max(elapsed, 1e-6):,.0f} lignes/s): {counts}")
+
+
+if __name__ == "__main__":
+    main()
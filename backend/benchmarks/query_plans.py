@@ -0,0 +1,185 @@
+"""Plans d'exécution et temps des requêtes chaudes, sans puis avec les index de migration.
+
+Usage:
+    python -m benchmarks.query_plans [--url sqlite:///bench_query_plans.db] [--attendance 1000000] [--repeat 5]
+
+Génère un jeu de données (~1M lignes attendance par défaut) dans une base
+dédiée (jamais DATABASE_URL), mesure sans les index HOT_QUERY_INDEXES, les
+recrée via la migration puis mesure à nouveau. MySQL: les index restent en
+place (une FK peut s'appuyer dessus), la première mesure les écarte par
+IGNORE INDEX; ailleurs ils sont supprimés puis recréés.
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.db.migrations import HOT_QUERY_INDEXES, create_hot_query_indexes, drop_index
+from app.db.session import Base
+from app import models  # noqa: F401
+from app.models.attendance import Attendance, AttendanceStatus
+from app.models.group import Group
+from app.models.session import Session as SessionModel
+from app.models.user import User, RoleEnum
+from app.models.user_group import UserGroup
+from app.services.attendance_matrix import attendance_matrix_query
+
+BATCH = 10_000
+
+
+def _insert(conn, table, rows: List[dict]) -> None:
+    for i in range(0, len(rows), BATCH):
+        conn.execute(table.insert(), rows[i:i + BATCH])
+
+
+def generate(engine: Engine, n_attendance: int, students_per_group: int = 40, presence: float = 0.85) -> Dict[str, int]:
+    rng = random.Random(42)
+    # nb de séances pour atteindre ~n_attendance présences
+    n_sessions = max(1, int(n_attendance / (students_per_group * presence)))
+    n_groups = max(1, n_sessions // 60)
+    n_students = n_groups * students_per_group
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    start = datetime(2024, 9, 1, 8, 0)
+
+    with engine.begin() as conn:
+        _insert(conn, Group.__table__, [{"id": g + 1, "name": f"G{g + 1}"} for g in range(n_groups)])
+        _insert(conn, User.__table__, [
+            {"id": u + 1, "first_name": f"S{u + 1}", "last_name": "Bench", "email": f"s{u + 1}@bench.local",
+             "role": RoleEnum.STUDENT, "is_active": True}
+            for u in range(n_students)
+        ])
+        _insert(conn, UserGroup.__table__, [
+            {"user_id": u + 1, "group_id": u // students_per_group + 1} for u in range(n_students)
+        ])
+
+        sessions = []
+        for s in range(n_sessions):
+            t = start + timedelta(hours=2 * s // n_groups, minutes=rng.randint(0, 59))
+            sessions.append({"id": s + 1, "group_id": rng.randint(1, n_groups), "start_time": t,
+                             "end_time": t + timedelta(hours=1)})
+        _insert(conn, SessionModel.__table__, sessions)
+
+        rows: List[dict] = []
+        aid = 0
+        for sess in sessions:
+            first = (sess["group_id"] - 1) * students_per_group + 1
+            for uid in range(first, first + students_per_group):
+                if rng.random() < presence:
+                    aid += 1
+                    rows.append({"id": aid, "session_id": sess["id"], "user_id": uid,
+                                 "status": AttendanceStatus.PRESENT, "timestamp": sess["start_time"]})
+            if len(rows) >= BATCH:
+                _insert(conn, Attendance.__table__, rows)
+                rows = []
+        _insert(conn, Attendance.__table__, rows)
+
+    return {"groups": n_groups, "students": n_students, "sessions": n_sessions, "attendance": aid}
+
+
+def _ignore_hot_indexes(table: str) -> Optional[str]:
+    names = [name for name, t, _ in HOT_QUERY_INDEXES if t == table]
+    return f"IGNORE INDEX ({', '.join(names)})" if names else None
+
+
+def _queries(engine: Engine, group_id: int, session_id: int, ignore: bool = False) -> List[Tuple[str, str, dict]]:
+    """ignore: requêtes MySQL avec IGNORE INDEX sur les index HOT_QUERY_INDEXES."""
+    def hint(table: str) -> str:
+        return f"{table} {_ignore_hot_indexes(table)}" if ignore and _ignore_hot_indexes(table) else table
+
+    matrix = attendance_matrix_query(group_id=group_id)
+    if ignore:
+        for model in (SessionModel, UserGroup):
+            matrix = matrix.with_hint(model, _ignore_hot_indexes(model.__tablename__), "mysql")
+    matrix = matrix.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    return [
+        ("user_groups par groupe", f"SELECT user_id FROM {hint('user_groups')} WHERE group_id = :g", {"g": group_id}),
+        ("séances d'un groupe par date",
+         f"SELECT id, start_time FROM {hint('sessions')} WHERE group_id = :g ORDER BY start_time", {"g": group_id}),
+        ("liste séances récentes", f"SELECT id FROM {hint('sessions')} ORDER BY start_time DESC LIMIT 100", {}),
+        ("présences d'une séance", "SELECT user_id FROM attendance WHERE session_id = :s", {"s": session_id}),
+        ("matrice de présence (export groupe)", str(matrix), {}),
+    ]
+
+
+def _explain(conn, sql: str, params: dict) -> List[str]:
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    return [" | ".join(str(c) for c in row) for row in conn.execute(text(prefix + sql), params)]
+
+
+def measure(
+    engine: Engine, group_id: int, session_id: int, repeat: int, ignore: bool = False
+) -> Dict[str, Tuple[float, List[str]]]:
+    out = {}
+    with engine.connect() as conn:
+        for label, sql, params in _queries(engine, group_id, session_id, ignore):
+            conn.execute(text(sql), params).fetchall()  # échauffement du cache
+            samples = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                conn.execute(text(sql), params).fetchall()
+                samples.append((time.perf_counter() - t0) * 1000)
+            out[label] = (statistics.median(samples), _explain(conn, sql, params))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///bench_query_plans.db")
+    parser.add_argument("--attendance", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--reuse", action="store_true", help="ne régénère pas les données")
+    args = parser.parse_args()
+
+    if args.url == settings.DATABASE_URL:
+        parser.error("--url doit pointer vers une base dédiée au benchmark (les tables sont recréées)")
+    engine = create_engine(args.url)
+    if not args.reuse:
+        t0 = time.perf_counter()
+        counts = generate(engine, args.attendance)
+        print(f"données générées en {time.perf_counter() - t0:.1f}s: {counts}")
+
+    with engine.connect() as conn:
+        group_id = conn.execute(text("SELECT group_id FROM sessions GROUP BY group_id ORDER BY COUNT(*) DESC LIMIT 1")).scalar()
+        session_id = conn.execute(text("SELECT MAX(id) FROM sessions WHERE group_id = :g"), {"g": group_id}).scalar()
+
+    if engine.dialect.name == "mysql":
+        # jamais de DROP INDEX: ix_user_groups_group_user peut porter la FK group_id
+        with engine.begin() as conn:
+            create_hot_query_indexes(conn)
+        before = measure(engine, group_id, session_id, args.repeat, ignore=True)
+    else:
+        with engine.begin() as conn:
+            for name, table, _ in HOT_QUERY_INDEXES:
+                drop_index(conn, name, table)
+            if conn.dialect.name == "sqlite":
+                conn.execute(text("ANALYZE"))
+        before = measure(engine, group_id, session_id, args.repeat)
+
+        with engine.begin() as conn:
+            create_hot_query_indexes(conn)
+            if conn.dialect.name == "sqlite":
+                conn.execute(text("ANALYZE"))
+    after = measure(engine, group_id, session_id, args.repeat)
+
+    for label in before:
+        t_before, plan_before = before[label]
+        t_after, plan_after = after[label]
+        print(f"\n== {label}: {t_before:.2f} ms -> {t_after:.2f} ms ({t_before / max(t_after, 1e-6):.1f}x)")
+        print("   sans index:")
+        for line in plan_before:
+            print("     ", line)
+        print("   avec index:")
+        for line in plan_after:
+            print("     ", line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Suite de benchmarks à plusieurs échelles, rapport JSON comparable d'une version à l'autre.
+
+Usage:
+    python -m benchmarks.run --scales small medium --generate --out bench_report.json
+    python -m benchmarks.run --scales small --baseline bench_report.json   # compare, code 1 si régression
+    python -m benchmarks.run --url mysql+pymysql://root:@localhost/bench --out mysql.json
+
+Chaque échelle tourne dans son propre process, sur sqlite:///bench_<échelle>.db
+(créée par benchmarks.generate avec --generate) ou sur --url. Mesures:
+matching visage (galerie de groupe, index ANN), export CSV d'un groupe, login
+(bcrypt compris), listes paginées. Les endpoints sont appelés directement,
+sans la couche HTTP.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+SUITE_VERSION = 1
+
+
+def _timeit(fn: Callable[[], object], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    samples: List[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 3),
+        "min_ms": round(samples[0], 3),
+        "n": len(samples),
+    }
+
+
+def run_suite(url: str, repeat: int) -> Dict:
+    """Exécute les mesures sur `url`. À appeler dans un process où `app` n'est pas encore importé."""
+    os.environ["DATABASE_URL"] = url
+    os.environ.pop("DATABASE_READ_URL", None)
+    os.environ["DB_AUTO_MIGRATE"] = "false"
+
+    import asyncio
+
+    import numpy as np
+    from fastapi import Response
+    from fastapi.security import OAuth2PasswordRequestForm
+    from sqlalchemy import func
+
+    from app.api.v1.attendance import _stream_csv
+    from app.api.v1.auth import login
+    from app.api.v1.groups import list_groups
+    from app.api.v1.sessions import list_sessions
+    from app.api.v1.users import list_users
+    from app.db.session import SessionLocal
+    from app.models.attendance import Attendance
+    from app.models.group import Group
+    from app.models.session import Session as SessionModel
+    from app.models.student_face import StudentFace
+    from app.models.user import User
+    from app.models.user_group import UserGroup
+    from app.services.attendance_matrix import iter_attendance_matrix
+    from app.services.face_ann import IVFIndex, _face_rows
+    from app.services.face_gallery import build_gallery
+    from app.services.face_matching import match_faces
+    from app.services.pagination import DEFAULT_LIMIT
+    from benchmarks.generate import ADMIN_EMAIL, DEFAULT_PASSWORD
+
+    threshold = 0.40
+    rng = np.random.default_rng(0)
+    results: Dict[str, Dict] = {}
+    db = SessionLocal()
+    try:
+        counts = {
+            model.__tablename__: db.query(func.count()).select_from(model).scalar()
+            for model in (User, Group, UserGroup, SessionModel, Attendance, StudentFace)
+        }
+        group_id = (
+            db.query(UserGroup.group_id).group_by(UserGroup.group_id)
+            .order_by(func.count().desc()).limit(1).scalar()
+        )
+        if group_id is None:
+            raise SystemExit(f"{url}: base vide, lancer benchmarks.generate d'abord")
+
+        # --- visage: galerie d'un groupe puis matching d'une photo de 30 visages
+        results["face.build_gallery"] = _timeit(lambda: build_gallery(db, group_id), repeat)
+        gallery = build_gallery(db, group_id)
+        picks = gallery.matrix[rng.integers(0, gallery.matrix.shape[0], 30)]
+        queries = picks + 0.05 * rng.standard_normal(picks.shape).astype(np.float32)
+        results["face.match_group_30"] = _timeit(
+            lambda: match_faces(queries, gallery.matrix, gallery.user_ids, threshold, offsets=gallery.offsets), repeat
+        )
+        results["face.match_group_30"]["gallery_size"] = len(gallery)
+
+        # --- visage: index ANN sur tous les encodages
+        vectors, uids, fids = _face_rows(db)
+        t0 = time.perf_counter()
+        index = IVFIndex.build(vectors, uids, fids)
+        results["face.ann_build"] = {"median_ms": round((time.perf_counter() - t0) * 1000, 3), "n": 1,
+                                     "rows": len(index), "nlist": index.nlist}
+        results["face.ann_identify_30"] = _timeit(lambda: index.match(queries, threshold), repeat)
+
+        # --- export CSV complet d'un groupe (matrice séances x étudiants)
+        def export():
+            return sum(len(chunk) for chunk in _stream_csv(iter_attendance_matrix(db, group_id=group_id)))
+        results["export.csv_group"] = _timeit(export, max(1, repeat // 2))
+        results["export.csv_group"]["bytes"] = export()
+
+        # --- login (requête utilisateur + vérification bcrypt)
+        form = OAuth2PasswordRequestForm(username=ADMIN_EMAIL, password=DEFAULT_PASSWORD)
+        results["auth.login"] = _timeit(lambda: asyncio.run(login(form, db)), repeat)
+
+        # --- listes (appel direct des endpoints: tous les paramètres sont explicites)
+        user_args = dict(role=None, group_id=None, is_active=None, q=None, fields=None, cursor=None, limit=DEFAULT_LIMIT)
+        results["users.list_first_page"] = _timeit(lambda: list_users(Response(), db, None, **user_args), repeat)
+        results["users.list_projection"] = _timeit(
+            lambda: list_users(Response(), db, None, **{**user_args, "fields": "id,first_name,last_name"}), repeat
+        )
+        # page profonde: curseur obtenu après 50 pages
+        deep, response = None, Response()
+        for _ in range(50):
+            list_users(response, db, None, **{**user_args, "cursor": deep})
+            deep = response.headers.get("X-Next-Cursor")
+            response = Response()
+            if not deep:
+                break
+        results["users.list_page_50"] = _timeit(
+            lambda: list_users(Response(), db, None, **{**user_args, "cursor": deep}), repeat
+        )
+        results["users.list_by_group"] = _timeit(
+            lambda: list_users(Response(), db, None, **{**user_args, "group_id": group_id}), repeat
+        )
+        results["sessions.list_by_group"] = _timeit(
+            lambda: list_sessions(Response(), db, None, group_id=group_id, teacher_id=None, date_from=None,
+                                  date_to=None, fields=None, cursor=None, limit=DEFAULT_LIMIT), repeat
+        )
+        results["groups.list_first_page"] = _timeit(
+            lambda: list_groups(Response(), db, None, q=None, student_id=None, fields=None, cursor=None,
+                                limit=DEFAULT_LIMIT), repeat
+        )
+    finally:
+        db.close()
+
+    return {"url": url.split("@")[-1], "counts": counts, "results": results}
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Affiche les écarts de médiane; retourne les mesures en régression au-delà de `tolerance`."""
+    regressions = []
+    print(f"\n{'échelle':<8} {'mesure':<26} {'base ms':>10} {'actuel ms':>10} {'ratio':>7}")
+    for scale, suite in report["scales"].items():
+        base = baseline.get("scales", {}).get(scale)
+        if not base:
+            continue
+        for name, res in suite["results"].items():
+            old = base["results"].get(name)
+            if not old or not old.get("median_ms"):
+                continue
+            ratio = res["median_ms"] / old["median_ms"]
+            flag = ""
+            if ratio > 1 + tolerance:
+                flag = "  <- régression"
+                regressions.append(f"{scale}/{name}")
+            print(f"{scale:<8} {name:<26} {old['median_ms']:>10.2f} {res['median_ms']:>10.2f} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", nargs="+", default=["small"])
+    parser.add_argument("--url", help="base déjà générée (une seule échelle)")
+    parser.add_argument("--generate", action="store_true", help="(re)génère les bases sqlite:///bench_<échelle>.db")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--out", default="bench_report.json")
+    parser.add_argument("--baseline", help="rapport précédent à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="régression si médiane > base x (1 + tolérance)")
+    parser.add_argument("--suite-json", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.suite_json:
+        # process enfant: une seule base
+        with open(args.suite_json, "w", encoding="utf-8") as f:
+            json.dump(run_suite(args.url, args.repeat), f)
+        return
+    if args.url and len(args.scales) > 1:
+        parser.error("--url ne s'utilise qu'avec une seule échelle")
+    baseline = None
+    if args.baseline:
+        # lu avant d'écrire --out (qui peut être le même fichier)
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    report = {
+        "suite_version": SUITE_VERSION,
+        "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scales": {},
+    }
+    for scale in args.scales:
+        url = args.url or f"sqlite:///bench_{scale}.db"
+        if args.generate:
+            subprocess.run([sys.executable, "-m", "benchmarks.generate", "--url", url, "--scale", scale], check=True)
+        fd, tmp = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.run", "--url", url, "--repeat", str(args.repeat), "--suite-json", tmp],
+                check=True,
+            )
+            with open(tmp, encoding="utf-8") as f:
+                report["scales"][scale] = json.load(f)
+        finally:
+            os.unlink(tmp)
+
+        print(f"\n== {scale}: {report['scales'][scale]['counts']}")
+        for name, res in report["scales"][scale]["results"].items():
+            print(f"   {name:<26} {res['median_ms']:>10.2f} ms")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nrapport: {args.out}")
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} régression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Convertit StudentFace.encoding (JSON) vers StudentFace.embedding (binaire).
+
+Applique d'abord les migrations de schéma (app/db/migrations.py).
+
+Usage:
+    python migrate_face_encodings.py [--chunk-size 1000] [--dtype float32|float16] [--keep-json]
+
+Idempotent: seules les lignes sans `embedding` sont converties.
+"""
+import argparse
+
+from sqlalchemy import inspect, select, update
+
+from app.db.migrations import run_migrations
+from app.db.session import SessionLocal, Base, engine
+from app.models.student_face import StudentFace
+from app.services.face_embedding import decode_legacy_encoding, encode_embedding
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--dtype", choices=["float32", "float16"], default=None)
+    parser.add_argument("--keep-json", action="store_true", help="ne vide pas l'ancienne colonne encoding")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    for name in run_migrations(engine):
+        print(f"+ migration appliquée: {name}")
+    encoding_nullable = next(
+        c["nullable"] for c in inspect(engine).get_columns("student_faces") if c["name"] == "encoding"
+    )
+    clear_json = encoding_nullable and not args.keep_json
+
+    db = SessionLocal()
+    converted = 0
+    invalid = 0
+    last_id = 0
+    try:
+        while True:
+            rows = db.execute(
+                select(StudentFace.id, StudentFace.encoding)
+                .where(
+                    StudentFace.id > last_id,
+                    StudentFace.embedding.is_(None),
+                    StudentFace.encoding.is_not(None),
+                )
+                .order_by(StudentFace.id)
+                .limit(args.chunk_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            params = []
+            for row in rows:
+                v = decode_legacy_encoding(row.encoding)
+                if v is None:
+                    invalid += 1
+                    continue
+                p = {"id": row.id, "embedding": encode_embedding(v, args.dtype)}
+                if clear_json:
+                    p["encoding"] = None
+                params.append(p)
+
+            if params:
+                # UPDATE groupé par clé primaire (executemany)
+                db.execute(update(StudentFace), params)
+            db.commit()
+            converted += len(params)
+            print(f"  {converted} encodages convertis...")
+    finally:
+        db.close()
+
+    print(f"✅ Migration terminée: {converted} convertis, {invalid} invalides ignorés.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Recalcule la table attendance_stats depuis attendance (reprise, ou après mise à jour du schéma).
+
+Applique d'abord les migrations de schéma (app/db/migrations.py), puis clôture
+les séances terminées (closed_at = end_time) avant de recalculer.
+
+Usage:
+    python rebuild_attendance_stats.py [--group-id 12] [--no-close]
+
+Idempotent: les agrégats des groupes traités sont effacés puis recalculés,
+un groupe par transaction.
+"""
+import argparse
+import time
+from datetime import datetime
+
+from sqlalchemy import update
+
+from app.db.migrations import run_migrations
+from app.db.session import SessionLocal, Base, engine
+from app.models.group import Group
+from app.models.session import Session as SessionModel
+from app.services.attendance_stats import rebuild_group
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--group-id", type=int, action="append", help="groupe(s) à recalculer (défaut: tous)")
+    parser.add_argument("--no-close", action="store_true", help="ne clôture pas les séances terminées")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    for name in run_migrations(engine):
+        print(f"+ migration appliquée: {name}")
+
+    db = SessionLocal()
+    t0 = time.perf_counter()
+    try:
+        if not args.no_close:
+            # sans passer par close_session: les agrégats sont recalculés juste après
+            closed = db.execute(
+                update(SessionModel)
+                .where(SessionModel.closed_at.is_(None), SessionModel.end_time <= datetime.utcnow())
+                .values(closed_at=SessionModel.end_time)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            print(f"{closed} séance(s) clôturée(s)")
+
+        group_ids = args.group_id or [gid for (gid,) in db.query(Group.id).order_by(Group.id)]
+        rows = 0
+        for i, gid in enumerate(group_ids, 1):
+            rows += rebuild_group(db, gid)
+            db.commit()
+            if i % 100 == 0:
+                print(f"  {i}/{len(group_ids)} groupes")
+        print(f"✅ {rows} ligne(s) attendance_stats pour {len(group_ids)} groupe(s) en {time.perf_counter() - t0:.1f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Vide la file de reconnaissance (mark-attendance?mode=async) hors du process API.
+
+Usage:
+    python recognition_worker.py --workers 4
+
+À utiliser avec FACE_JOB_WORKERS=0 côté API pour garder l'inférence hors des
+workers uvicorn. Plusieurs instances peuvent tourner en même temps.
+"""
+import argparse
+import logging
+import signal
+import threading
+
+from app.db.session import Base, engine
+from app import models  # noqa: F401
+from app.api.v1.face import run_mark_job
+from app.core.config import settings
+from app.services.face_inference import shutdown_backend
+from app.services.recognition_jobs import JobWorkers
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=max(1, settings.FACE_JOB_WORKERS))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    Base.metadata.create_all(bind=engine)
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    workers = JobWorkers(concurrency=args.workers, poll_interval=settings.FACE_JOB_POLL_INTERVAL)
+    workers.start(run_mark_job)
+    try:
+        # attente par pas: Ctrl+C reste pris en compte sous Windows
+        while not stop.wait(1.0):
+            pass
+    finally:
+        workers.stop()
+        shutdown_backend()
+
+if __name__ == "__main__":
+    main()
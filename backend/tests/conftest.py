@@ -0,0 +1,52 @@
+"""Base SQLite temporaire: DATABASE_URL est fixé avant tout import de app (jamais la base de .env)."""
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+_tmpdir = tempfile.mkdtemp(prefix="auto_absence_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'test.db')}"
+os.environ.pop("DATABASE_READ_URL", None)
+
+import pytest  # noqa: E402
+
+from app.db.session import Base, SessionLocal, engine  # noqa: E402
+from app import models  # noqa: E402,F401
+from app.models.group import Group  # noqa: E402
+from app.models.session import Session as SessionModel  # noqa: E402
+from app.models.user import RoleEnum, User  # noqa: E402
+from app.models.user_group import UserGroup  # noqa: E402
+
+T0 = datetime(2026, 1, 5, 8, 0)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    engine.dispose()
+    shutil.rmtree(_tmpdir, ignore_errors=True)
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def group(db):
+    """Groupe 1: étudiants 1-3 membres d'origine (created_at NULL), séances 1-4 terminées (un jour d'écart)."""
+    db.add(Group(id=1, name="G1"))
+    for uid in range(1, 4):
+        db.add(User(id=uid, first_name="Etu", last_name=str(uid), email=f"etu{uid}@test.local", role=RoleEnum.STUDENT))
+    db.flush()
+    # insert Core: l'ORM remplacerait created_at=None par le défaut
+    db.execute(UserGroup.__table__.insert(), [{"user_id": uid, "group_id": 1, "created_at": None} for uid in range(1, 4)])
+    for k in range(4):
+        start = T0 + timedelta(days=k)
+        db.add(SessionModel(id=k + 1, group_id=1, start_time=start, end_time=start + timedelta(hours=2)))
+    db.commit()
+    return 1
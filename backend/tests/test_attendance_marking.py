@@ -0,0 +1,70 @@
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.dialects import mysql
+
+from app.db.session import engine
+from app.models.attendance import Attendance, AttendanceStatus
+from app.services.attendance_marking import _existing_stmt, _insert_locked, _lock_session_stmt, mark_present
+
+T0 = datetime(2026, 1, 5, 8, 0)
+
+
+def test_returns_only_newly_marked(db, group):
+    assert mark_present(db, 1, [2, 1, 1]) == [1, 2]
+    db.commit()
+
+    assert mark_present(db, 1, [1, 2, 3]) == [3]
+    assert mark_present(db, 1, [1, 2, 3]) == []
+    db.commit()
+
+    rows = db.query(Attendance.user_id).filter(Attendance.session_id == 1).all()
+    assert sorted(uid for (uid,) in rows) == [1, 2, 3]
+
+
+def test_empty_input(db, group):
+    assert mark_present(db, 1, []) == []
+    assert db.query(Attendance).count() == 0
+
+
+def test_sessions_are_independent(db, group):
+    assert mark_present(db, 1, [1]) == [1]
+    assert mark_present(db, 2, [1]) == [1]
+    db.commit()
+    assert db.query(Attendance).filter(Attendance.user_id == 1).count() == 2
+
+
+def test_locked_path_used_on_mysql(db, group):
+    # même code que la branche MySQL; SQLite ignore FOR UPDATE
+    rows = [{"session_id": 1, "user_id": uid, "status": AttendanceStatus.PRESENT, "timestamp": T0}
+            for uid in (1, 2)]
+    assert _insert_locked(db, 1, rows) == [1, 2]
+    assert _insert_locked(db, 1, rows + [dict(rows[0], user_id=3)]) == [3]
+    db.commit()
+    assert db.query(Attendance).filter(Attendance.session_id == 1).count() == 3
+
+
+def test_mysql_statements():
+    dialect = mysql.dialect()
+    assert str(_lock_session_stmt(1).compile(dialect=dialect)).endswith("FOR UPDATE")
+    assert str(_existing_stmt(1, [1, 2], lock=True).compile(dialect=dialect)).endswith("LOCK IN SHARE MODE")
+    insert = Attendance.__table__.insert().values(
+        [{"session_id": 1, "user_id": uid, "status": AttendanceStatus.PRESENT, "timestamp": T0} for uid in (1, 2)]
+    )
+    sql = str(insert.compile(dialect=dialect))
+    # une seule requête multi-lignes, sans IGNORE
+    assert "IGNORE" not in sql
+    assert sql.count("(%s, %s, %s, %s)") == 2
+
+
+def test_locked_path_round_trips_do_not_grow(db, group):
+    statements = []
+    listener = lambda conn, cursor, sql, params, context, many: statements.append(sql)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        rows = [{"session_id": 2, "user_id": uid, "status": AttendanceStatus.PRESENT, "timestamp": T0}
+                for uid in (1, 2, 3)]
+        _insert_locked(db, 2, rows)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert len(statements) == 3
@@ -0,0 +1,26 @@
+from app.services.attendance_marking import mark_present
+from app.services.attendance_matrix import attendance_matrix_query
+
+
+def test_one_row_per_session_and_student(db, group):
+    mark_present(db, 1, [1, 3])
+    mark_present(db, 2, [2])
+    db.commit()
+
+    rows = db.execute(attendance_matrix_query(group_id=group)).all()
+
+    assert len(rows) == 4 * 3
+    status = {(r.session_id, r.student_id): r.status for r in rows}
+    assert status[(1, 1)] == "PRESENT"
+    assert status[(1, 2)] == "ABSENT"
+    assert status[(2, 2)] == "PRESENT"
+    assert status[(4, 3)] == "ABSENT"
+
+
+def test_filter_on_session(db, group):
+    mark_present(db, 3, [1])
+    db.commit()
+
+    rows = db.execute(attendance_matrix_query(session_id=3)).all()
+
+    assert [(r.student_id, r.status) for r in rows] == [(1, "PRESENT"), (2, "ABSENT"), (3, "ABSENT")]
@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects import mysql, postgresql
+
+from app.models.attendance_stat import AttendanceStat
+from app.models.session import Session as SessionModel
+from app.models.user import RoleEnum, User
+from app.models.user_group import UserGroup
+from app.services.attendance_marking import mark_present
+from app.services.attendance_stats import (
+    _ensure_rows,
+    _insert_stats_stmt,
+    _present_stmt,
+    _session_stmt,
+    close_ended_sessions,
+    close_session,
+    rebuild_group,
+)
+
+
+def _stats(db):
+    """user_id -> (séances, présences, absences, série d'absences)"""
+    return {
+        s.user_id: (s.sessions_held, s.presences, s.absences, s.current_streak)
+        for s in db.query(AttendanceStat).order_by(AttendanceStat.user_id)
+    }
+
+
+def _rebuilt(db, group_id):
+    rebuild_group(db, group_id)
+    db.commit()
+    return _stats(db)
+
+
+def test_close_session_counts_presences_and_absences(db, group):
+    mark_present(db, 1, [1, 2])
+    assert close_session(db, 1) == 3
+    assert close_session(db, 1) == 0  # déjà clôturée
+    mark_present(db, 2, [1])
+    close_session(db, 2)
+    db.commit()
+
+    assert _stats(db) == {1: (2, 2, 0, 0), 2: (2, 1, 1, 1), 3: (2, 0, 2, 2)}
+
+
+def test_late_mark_turns_absence_into_presence(db, group):
+    for sid in (1, 2, 3):
+        close_session(db, sid)
+    db.commit()
+    assert _stats(db)[3] == (3, 0, 3, 3)
+
+    # présence ajoutée après la clôture de la séance 2: la série repart de la séance 3
+    mark_present(db, 2, [3])
+    db.commit()
+
+    assert _stats(db)[3] == (3, 1, 2, 1)
+    incremental = _stats(db)
+    assert _rebuilt(db, group) == incremental
+
+
+def test_out_of_order_close_matches_rebuild(db, group):
+    mark_present(db, 2, [2])
+    mark_present(db, 4, [1])
+    for sid in (1, 4, 2, 3):
+        close_session(db, sid)
+    db.commit()
+
+    incremental = _stats(db)
+    assert incremental[2] == (4, 1, 3, 2)
+    assert _rebuilt(db, group) == incremental
+
+
+def test_mid_term_student_counts_from_join_date(db, group):
+    close_session(db, 1)
+    close_session(db, 2)
+    db.add(User(id=4, first_name="Etu", last_name="4", email="etu4@test.local", role=RoleEnum.STUDENT))
+    # entré dans le groupe après la fin de la séance 2
+    db.add(UserGroup(user_id=4, group_id=group, created_at=db.get(SessionModel, 2).end_time + timedelta(hours=1)))
+    db.commit()
+    assert _rebuilt(db, group)[4] == (0, 0, 0, 0)
+
+    mark_present(db, 3, [4])
+    close_session(db, 3)
+    close_session(db, 4)
+    db.commit()
+
+    incremental = _stats(db)
+    assert incremental[4] == (2, 1, 1, 1)
+    assert _rebuilt(db, group) == incremental
+
+
+def test_close_ended_sessions_skips_future_sessions(db, group):
+    start = datetime.utcnow() + timedelta(days=1)
+    db.add(SessionModel(id=5, group_id=group, start_time=start, end_time=start + timedelta(hours=2)))
+    db.commit()
+
+    assert close_ended_sessions(db, limit=2) == 2
+    assert close_ended_sessions(db) == 2
+    assert close_ended_sessions(db) == 0
+    db.commit()
+
+    open_ids = [sid for (sid,) in db.query(SessionModel.id).filter(SessionModel.closed_at.is_(None))]
+    assert open_ids == [5]
+    assert _stats(db)[1] == (4, 0, 4, 4)
+
+
+def test_ensure_rows_tolerates_rows_created_concurrently(db, group):
+    close_session(db, 1)
+    db.commit()
+    before = _stats(db)
+
+    # deux clôtures simultanées du groupe: la seconde insère des lignes déjà créées
+    now = datetime.utcnow()
+    rows = [{"user_id": uid, "group_id": group, "sessions_held": 0, "presences": 0, "absences": 0,
+             "current_streak": 0, "updated_at": now} for uid in (1, 2, 3)]
+    db.execute(_insert_stats_stmt(db.get_bind().dialect.name, rows))
+    _ensure_rows(db, group, [1, 2, 3], now)
+    db.commit()
+    assert _stats(db) == before
+
+
+def test_locking_statements():
+    for dialect, shared in ((mysql.dialect(), "LOCK IN SHARE MODE"), (postgresql.dialect(), "FOR SHARE")):
+        assert str(_session_stmt(1).compile(dialect=dialect)).endswith("FOR UPDATE")
+        assert str(_present_stmt([1], [1, 2], lock=True).compile(dialect=dialect)).endswith(shared)
+    rows = [{"user_id": 1, "group_id": 1, "sessions_held": 0, "presences": 0, "absences": 0,
+             "current_streak": 0, "updated_at": datetime(2026, 1, 5)}]
+    assert "ON DUPLICATE KEY UPDATE" in str(_insert_stats_stmt("mysql", rows).compile(dialect=mysql.dialect()))
+    assert "IGNORE" not in str(_insert_stats_stmt("mysql", rows).compile(dialect=mysql.dialect()))
+    assert "ON CONFLICT" in str(_insert_stats_stmt("postgresql", rows).compile(dialect=postgresql.dialect()))
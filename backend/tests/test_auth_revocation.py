@@ -0,0 +1,66 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from app.api.deps import authenticate_token
+from app.api.v1.users import update_user
+from app.core.config import settings
+from app.core.security import ALGORITHM, create_access_token
+from app.models.user import RoleEnum, User
+from app.schemas.user import UserUpdate
+from app.services.user_cache import user_cache
+
+
+@pytest.fixture
+def teacher(db):
+    user_cache.clear()
+    db.add(User(id=1, first_name="Prof", last_name="1", email="prof@test.local", role=RoleEnum.TEACHER))
+    db.commit()
+    yield db.get(User, 1)
+    user_cache.clear()
+
+
+def _token(user, issued_ago=0.0):
+    claims = {"uid": user.id, "role": user.role.value}
+    token = create_access_token(subject=user.email, claims=claims)
+    if issued_ago:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+        payload["iat"] = int(time.time() - issued_ago)
+        token = jwt.encode(payload, settings.SECRET_KEY, algorithm=ALGORITHM)
+    return token
+
+
+def test_deactivation_and_demotion_take_effect_despite_cache(db, teacher):
+    token = _token(teacher)
+    assert authenticate_token(db, token).role == RoleEnum.TEACHER  # désormais en cache
+
+    update_user(teacher.id, UserUpdate(role=RoleEnum.STUDENT), db, None)
+    assert authenticate_token(db, token).role == RoleEnum.STUDENT
+
+    update_user(teacher.id, UserUpdate(is_active=False), db, None)
+    with pytest.raises(HTTPException) as exc:
+        authenticate_token(db, token)
+    assert exc.value.status_code == 401
+
+
+def test_update_ignores_unset_fields(db, teacher):
+    out = update_user(teacher.id, UserUpdate(first_name="Nouveau"), db, None)
+    assert (out.first_name, out.role, out.is_active) == ("Nouveau", RoleEnum.TEACHER, True)
+    with pytest.raises(HTTPException):
+        update_user(999, UserUpdate(is_active=False), db, None)
+
+
+def test_stateless_claims_only_while_fresh(db, teacher, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_STATELESS_CLAIMS", True)
+    monkeypatch.setattr(settings, "AUTH_STATELESS_MAX_AGE_MINUTES", 5)
+    fresh, old = _token(teacher), _token(teacher, issued_ago=600)
+    teacher.is_active = False
+    db.commit()
+
+    # token récent: claims crus sans accès base (fenêtre de révocation bornée)
+    assert authenticate_token(db, fresh).id == teacher.id
+    # au-delà de AUTH_STATELESS_MAX_AGE_MINUTES: vérification en base
+    with pytest.raises(HTTPException):
+        authenticate_token(db, old)
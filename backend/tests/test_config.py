@@ -0,0 +1,21 @@
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import Settings
+
+
+@pytest.mark.parametrize("name, value", [
+    ("DB_PRE_PING", "Always"),
+    ("FACE_INFERENCE_MODE", "processes"),
+    ("FACE_TEMPLATE_MODE", "average"),
+    ("FACE_DETECTION_MODE", "tile"),
+    ("FACE_EMBEDDING_DTYPE", "fp16"),
+])
+def test_mode_typos_fail_at_startup(name, value):
+    with pytest.raises(ValidationError):
+        Settings(**{name: value})
+
+
+def test_valid_modes():
+    s = Settings(DB_PRE_PING="always", FACE_INFERENCE_MODE="process", FACE_TEMPLATE_MODE="mean")
+    assert (s.DB_PRE_PING, s.FACE_INFERENCE_MODE, s.FACE_TEMPLATE_MODE) == ("always", "process", "mean")
@@ -0,0 +1,140 @@
+import threading
+
+import numpy as np
+from sqlalchemy import event
+
+from app.db.session import SessionLocal, engine
+from app.models.student_face import StudentFace
+from app.services.face_ann import FaceIndexManager, IVFIndex
+from app.services.face_embedding import EMBEDDING_DIM, encode_embedding
+
+THRESHOLD = 0.5
+
+
+def _gallery(n_users=20, per_user=2, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n_users * per_user, EMBEDDING_DIM)).astype(np.float32)
+    user_ids = np.repeat(np.arange(1, n_users + 1), per_user)
+    face_ids = np.arange(1, len(vectors) + 1)
+    return vectors, user_ids, face_ids
+
+
+def test_match_finds_owner_of_each_face():
+    vectors, user_ids, face_ids = _gallery()
+    index = IVFIndex.build(vectors, user_ids, face_ids, nlist=4, nprobe=4)
+
+    matches = index.match(vectors[[0, 7, 21]], THRESHOLD)
+
+    assert [m.user_id for m in matches] == [1, 4, 11]
+    assert all(m.similarity > 0.99 for m in matches)
+
+
+def test_with_faces_returns_new_index():
+    vectors, user_ids, face_ids = _gallery()
+    index = IVFIndex.build(vectors, user_ids, face_ids, nlist=4, nprobe=4)
+    new_face = np.random.default_rng(1).standard_normal((1, EMBEDDING_DIM)).astype(np.float32)
+
+    grown = index.with_faces(new_face, [99], [1000])
+
+    assert len(grown) == len(index) + 1
+    assert len(index) == len(vectors)
+    assert 1000 not in index.face_ids
+    assert grown.match(new_face, THRESHOLD)[0].user_id == 99
+    assert index.match(new_face, THRESHOLD)[0].user_id is None
+
+
+def test_without_users_and_faces():
+    vectors, user_ids, face_ids = _gallery()
+    index = IVFIndex.build(vectors, user_ids, face_ids, nlist=4, nprobe=4)
+
+    no_user = index.without_users([1])
+    assert len(no_user) == len(index) - 2
+    assert no_user.match(vectors[:1], THRESHOLD)[0].user_id is None
+    assert index.match(vectors[:1], THRESHOLD)[0].user_id == 1
+
+    # l'autre modèle de l'étudiant 1 suffit encore à le reconnaître
+    one_face = index.without_faces([1])
+    assert len(one_face) == len(index) - 1
+    assert one_face.match(vectors[1:2], THRESHOLD)[0].user_id == 1
+
+    assert index.without_users([]) is index
+    assert index.without_faces([12345]) is index
+
+
+def test_save_load_round_trip(tmp_path):
+    vectors, user_ids, face_ids = _gallery()
+    index = IVFIndex.build(vectors, user_ids, face_ids, nlist=4, nprobe=4)
+    path = tmp_path / "ann.npz"
+
+    index.save(path)
+    loaded = IVFIndex.load(path, nprobe=4)
+
+    assert loaded is not None
+    np.testing.assert_array_equal(loaded.face_ids, index.face_ids)
+    assert [m.user_id for m in loaded.match(vectors[[3, 8]], THRESHOLD)] == [2, 5]
+
+
+def _add_face(db, user_id, seed):
+    face = StudentFace(user_id=user_id, embedding=encode_embedding(
+        np.random.default_rng(seed).standard_normal(EMBEDDING_DIM).astype(np.float32)))
+    db.add(face)
+    db.commit()
+    return face.id
+
+
+def test_sync_reads_database_outside_lock(db, group, tmp_path):
+    _add_face(db, 1, 1)
+    manager = FaceIndexManager(tmp_path / "ann.npz", nlist=1, nprobe=1, sync_interval=0)
+    assert len(manager.get(db)) == 1
+    new_id = _add_face(db, 2, 2)
+
+    free = []
+
+    def try_lock():
+        acquired = manager._lock.acquire(blocking=False)
+        if acquired:
+            manager._lock.release()
+        free.append(acquired)
+
+    def lock_is_free(conn, cursor, statement, parameters, context, executemany):
+        if "student_faces" in statement:
+            # un autre thread (requête d'identification) prendrait le verrou sans attendre
+            t = threading.Thread(target=try_lock)
+            t.start()
+            t.join()
+
+    event.listen(engine, "before_cursor_execute", lock_is_free)
+    try:
+        manager._synced_at = 0.0
+        index = manager.get(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", lock_is_free)
+
+    assert free and all(free)
+    assert new_id in index.face_ids and manager.version == 2
+
+
+def test_sync_result_dropped_if_index_changed_meanwhile(db, group, tmp_path):
+    _add_face(db, 1, 1)
+    manager = FaceIndexManager(tmp_path / "ann.npz", nlist=1, nprobe=1, sync_interval=-1)
+    manager.get(db)
+    _add_face(db, 2, 2)
+
+    done = []
+
+    def refresh_during_sync(conn, cursor, statement, parameters, context, executemany):
+        if not done:
+            done.append(True)
+            with SessionLocal() as other:
+                manager.refresh_students(other, [1])
+
+    event.listen(engine, "before_cursor_execute", refresh_during_sync)
+    try:
+        manager.sync(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", refresh_during_sync)
+
+    # l'index modifié par refresh_students n'est pas écrasé; le diff sera repris
+    assert len(manager._index) == 1 and manager.version == 2
+    manager.sync(db)
+    assert len(manager._index) == 2 and manager.version == 3
@@ -0,0 +1,50 @@
+import json
+import logging
+
+import numpy as np
+import pytest
+
+from app.services.face_embedding import EMBEDDING_DIM, decode_embedding, encode_embedding, load_embedding
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_round_trip(dtype):
+    v = np.random.default_rng(0).standard_normal(EMBEDDING_DIM).astype(np.float32)
+    out = decode_embedding(encode_embedding(v, dtype))
+    np.testing.assert_allclose(out, v, rtol=1e-3, atol=1e-3)
+
+
+@pytest.mark.parametrize("cut", [1, 2, 3, 100])
+def test_truncated_blob_is_unreadable(cut):
+    blob = encode_embedding(np.ones(EMBEDDING_DIM), "float32")
+    assert decode_embedding(blob[:-cut]) is None
+    assert decode_embedding(blob + b"\0" * cut) is None
+
+
+def test_bad_header():
+    blob = encode_embedding(np.ones(EMBEDDING_DIM), "float32")
+    assert decode_embedding(b"XX" + blob[2:]) is None
+    assert decode_embedding(blob[:2] + b"\x09" + blob[3:]) is None
+    assert decode_embedding(b"") is None
+
+
+def test_legacy_json_fallback():
+    v = load_embedding(None, json.dumps([0.5] * EMBEDDING_DIM))
+    assert v.shape == (EMBEDDING_DIM,)
+    assert load_embedding(None, "[1, 2]") is None
+
+
+def test_unreadable_blob_falls_back_to_json_and_warns_once(caplog):
+    blob = encode_embedding(np.ones(EMBEDDING_DIM), "float32")[:-4]
+    legacy = json.dumps([0.25] * EMBEDDING_DIM)
+
+    with caplog.at_level(logging.WARNING, logger="app.services.face_embedding"):
+        for _ in range(3):
+            v = load_embedding(blob, legacy, face_id=4242)
+            assert v is not None and v[0] == 0.25
+        assert load_embedding(blob, None, face_id=4243) is None
+
+    warned = [r.getMessage() for r in caplog.records]
+    assert len(warned) == 2
+    assert "id=4242" in warned[0] and "repli sur encoding" in warned[0]
+    assert "id=4243" in warned[1]
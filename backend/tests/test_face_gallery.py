@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from app.models.student_face import StudentFace
+from app.services import face_gallery
+from app.services.face_embedding import EMBEDDING_DIM, encode_embedding
+from app.services.face_gallery import GalleryCache, gallery_from_rows
+
+
+def _vec(seed):
+    return np.random.default_rng(seed).standard_normal(EMBEDDING_DIM).astype(np.float32)
+
+
+@pytest.fixture
+def faces(db, group):
+    for uid in (1, 2):
+        db.add(StudentFace(user_id=uid, embedding=encode_embedding(_vec(uid))))
+    db.commit()
+    return group
+
+
+def test_cached_until_invalidated(db, faces):
+    cache = GalleryCache(max_entries=4, ttl_seconds=0)
+    first = cache.get(db, faces)
+    assert len(first) == 2
+    assert cache.get(db, faces) is first
+
+    db.add(StudentFace(user_id=3, embedding=encode_embedding(_vec(3))))
+    db.commit()
+    assert cache.get(db, faces) is first
+
+    cache.invalidate_group(faces)
+    rebuilt = cache.get(db, faces)
+    assert rebuilt is not first
+    assert len(rebuilt) == 3
+    assert rebuilt.version != first.version
+
+
+def test_build_racing_an_invalidation_is_not_cached(db, faces, monkeypatch):
+    cache = GalleryCache(max_entries=4, ttl_seconds=0)
+    build = face_gallery.build_gallery
+
+    def build_then_invalidate(session, group_id):
+        gallery = build(session, group_id)
+        # encodages modifiés pendant la construction
+        cache.invalidate_group(group_id)
+        return gallery
+
+    monkeypatch.setattr(face_gallery, "build_gallery", build_then_invalidate)
+    stale = cache.get(db, faces)
+    monkeypatch.setattr(face_gallery, "build_gallery", build)
+
+    assert cache.get(db, faces) is not stale
+
+
+def test_ttl_and_lru_eviction(db, faces, monkeypatch):
+    cache = GalleryCache(max_entries=1, ttl_seconds=0)
+    first = cache.get(db, faces)
+    cache.get(db, 999)  # autre groupe: évince le premier
+    assert cache.get(db, faces) is not first
+
+    expiring = GalleryCache(max_entries=4, ttl_seconds=60)
+    gallery = expiring.get(db, faces)
+    monkeypatch.setattr(face_gallery.time, "monotonic", lambda: gallery.built_at + 61)
+    assert expiring.get(db, faces) is not gallery
+
+
+def test_template_modes():
+    rows = [(1, 1, encode_embedding(_vec(1)), None), (2, 1, encode_embedding(_vec(2)), None),
+            (3, 2, encode_embedding(_vec(3)), None)]
+
+    every = gallery_from_rows(1, rows, mode="all")
+    assert every.matrix.shape == (3, EMBEDDING_DIM)
+    assert every.offsets.tolist() == [0, 2]
+
+    mean = gallery_from_rows(1, rows, mode="mean")
+    assert mean.matrix.shape == (2, EMBEDDING_DIM)
+    assert mean.offsets is None
+    np.testing.assert_allclose(np.linalg.norm(mean.matrix, axis=1), 1.0, rtol=1e-5)
+    assert not mean.matrix.flags.writeable
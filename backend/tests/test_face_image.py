@@ -0,0 +1,43 @@
+import cv2
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services import face_image
+from app.services.face_image import ImageDecodeError, decode_image, decode_image_legacy
+
+
+def _encoded(ext, w, h):
+    return cv2.imencode(ext, np.full((h, w, 3), 128, dtype=np.uint8))[1].tobytes()
+
+
+def test_reduced_jpeg_decode_fits_max_size():
+    bgr = decode_image(_encoded(".jpg", 2000, 1000), max_size=500)
+    assert bgr.shape == (250, 500, 3)
+    assert bgr.flags.c_contiguous
+
+
+@pytest.mark.parametrize("ext", [".jpg", ".png"])
+def test_too_many_pixels_rejected_before_decoding(ext, monkeypatch):
+    monkeypatch.setattr(settings, "FACE_IMAGE_MAX_PIXELS", 100 * 100)
+
+    def no_decode(*args):
+        raise AssertionError("imdecode appelé")
+
+    monkeypatch.setattr(face_image.cv2, "imdecode", no_decode)
+    with pytest.raises(ImageDecodeError, match="trop grande"):
+        decode_image(_encoded(ext, 101, 100))
+    with pytest.raises(ImageDecodeError, match="trop grande"):
+        decode_image_legacy(_encoded(ext, 101, 100))
+
+
+def test_pixel_limit_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "FACE_IMAGE_MAX_PIXELS", 0)
+    assert decode_image(_encoded(".png", 300, 200), max_size=1280).shape == (200, 300, 3)
+
+
+def test_invalid_data():
+    with pytest.raises(ImageDecodeError):
+        decode_image(b"")
+    with pytest.raises(ImageDecodeError):
+        decode_image(b"pas une image")
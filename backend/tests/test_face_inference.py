@@ -0,0 +1,53 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.services.face_inference import InferenceUnavailable, ProcessPoolBackend
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    # pool sans modèles ONNX: les tests n'exécutent que des fonctions de la bibliothèque standard
+    monkeypatch.setattr(
+        ProcessPoolBackend, "_new_executor",
+        lambda self: ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")),
+    )
+    b = ProcessPoolBackend(workers=1, queue_size=0, timeout=30)
+    yield b
+    b.shutdown()
+
+
+def _break(executor):
+    with pytest.raises(BrokenProcessPool):
+        executor.submit(os._exit, 1).result(timeout=30)
+
+
+def test_worker_dying_during_call_resets_pool(backend):
+    broken = backend._executor
+    with pytest.raises(InferenceUnavailable):
+        backend._run(os._exit, 1)
+    assert backend._executor is not broken
+    assert backend._run(abs, -3) == 3
+
+
+def test_pool_broken_before_submit_is_reset(backend):
+    broken = backend._executor
+    _break(broken)
+
+    # submit lève BrokenProcessPool: 503, slot rendu, pool remplacé
+    with pytest.raises(InferenceUnavailable):
+        backend._run(abs, -1)
+    assert backend._executor is not broken
+    assert backend._run(abs, -2) == 2
+    assert backend._run(abs, -4) == 4
+
+
+def test_reset_replaces_a_broken_pool_once(backend):
+    broken = backend._executor
+    backend._reset(broken)
+    fresh = backend._executor
+    backend._reset(broken)
+    assert backend._executor is fresh
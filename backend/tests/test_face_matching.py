@@ -0,0 +1,63 @@
+import numpy as np
+
+from app.services.face_matching import _assign_one_to_one, match_faces, normalize_rows
+
+
+def _unit(*coords):
+    return normalize_rows(np.array(coords, dtype=np.float32))
+
+
+def test_assign_one_to_one_greedy_by_similarity():
+    sims = np.array([
+        [0.9, 0.8],
+        [0.95, 0.1],
+        [0.2, 0.3],
+    ])
+    # le visage 1 prend l'étudiant 0 (0.95), le visage 0 se rabat sur l'étudiant 1, le visage 2 est sous le seuil
+    assert _assign_one_to_one(sims, 0.5).tolist() == [1, 0, -1]
+
+
+def test_assign_more_faces_than_students():
+    sims = np.array([[0.9], [0.8]])
+    assert _assign_one_to_one(sims, 0.5).tolist() == [0, -1]
+
+
+def test_one_to_one_vs_independent():
+    gallery = _unit([1, 0, 0], [0, 1, 0])
+    ids = np.array([10, 20])
+    queries = _unit([1, 0.1, 0], [1, 0.2, 0])
+
+    one = match_faces(queries, gallery, ids, 0.5)
+    assert [m.user_id for m in one] == [10, None]
+
+    free = match_faces(queries, gallery, ids, 0.5, one_to_one=False)
+    assert [m.user_id for m in free] == [10, 10]
+
+
+def test_offsets_take_best_template_per_student():
+    # étudiant 10: deux modèles (lignes 0-1), étudiant 20: un modèle (ligne 2)
+    gallery = _unit([1, 0, 0], [0, 0, 1], [0, 1, 0])
+    ids = np.array([10, 20])
+    offsets = np.array([0, 2])
+
+    matches = match_faces(_unit([0, 0.1, 1], [0, 1, 0]), gallery, ids, 0.5, offsets=offsets)
+
+    assert [m.user_id for m in matches] == [10, 20]
+    assert matches[0].similarity > 0.99
+    assert [uid for uid, _ in matches[0].candidates] == [10, 20]
+
+
+def test_single_query_as_1d_vector():
+    gallery = _unit([1, 0, 0], [0, 1, 0])
+    matches = match_faces(np.array([0, 2, 0], dtype=np.float32), gallery, np.array([10, 20]), 0.5, top_k=1)
+
+    assert len(matches) == 1
+    assert matches[0].user_id == 20
+    assert len(matches[0].candidates) == 1
+
+
+def test_empty_inputs():
+    ids = np.array([10])
+    assert match_faces(np.empty((0, 3), dtype=np.float32), _unit([1, 0, 0]), ids, 0.5) == []
+    no_gallery = match_faces(_unit([1, 0, 0]), np.empty((0, 3), dtype=np.float32), np.array([]), 0.5)
+    assert [(m.user_id, m.candidates) for m in no_gallery] == [(None, [])]
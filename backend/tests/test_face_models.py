@@ -0,0 +1,34 @@
+import pytest
+
+from app.services import face_models
+from app.services.face_models import ModelPool, ModelPoolTimeout
+
+
+@pytest.fixture
+def cv_threads(monkeypatch):
+    calls = []
+    monkeypatch.setattr(face_models.cv2, "setNumThreads", calls.append)
+    monkeypatch.setattr(face_models, "FaceModels", object)
+    return calls
+
+
+def test_parallel_pool_limits_opencv_threads(cv_threads):
+    pool = ModelPool(size=4, timeout=0.01)
+    first = pool.acquire()
+    pool.acquire()
+    assert cv_threads == [1]
+    pool.release(first)
+    assert pool.acquire() is first
+
+
+def test_single_instance_keeps_opencv_default(cv_threads):
+    pool = ModelPool(size=1, timeout=0.01)
+    pool.acquire()
+    assert cv_threads == []
+    with pytest.raises(ModelPoolTimeout):
+        pool.acquire()
+
+
+def test_configured_thread_count(cv_threads):
+    ModelPool(size=1, timeout=0.01, cv_threads=2).acquire()
+    assert cv_threads == [2]
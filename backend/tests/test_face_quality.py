@@ -0,0 +1,59 @@
+import numpy as np
+
+from app.core.config import settings
+from app.services.face_quality import assess_faces, filter_faces
+
+
+def _face(x, y, size, score=0.95, yaw=0.0):
+    """Ligne YuNet de face: yeux, nez (décalé de `yaw` écarts d'yeux), coins de la bouche."""
+    eye_y, mouth_y = y + 0.35 * size, y + 0.75 * size
+    re, le = x + 0.3 * size, x + 0.7 * size
+    nose_x = x + 0.5 * size + yaw * (le - re)
+    nose_y = eye_y + 0.55 * (mouth_y - eye_y)
+    return np.array(
+        [x, y, size, size, re, eye_y, le, eye_y, nose_x, nose_y, x + 0.35 * size, mouth_y, x + 0.65 * size, mouth_y, score],
+        dtype=np.float32,
+    )
+
+
+def _textured(h=400, w=400):
+    return np.random.default_rng(0).integers(0, 256, (h, w, 3), dtype=np.uint8)
+
+
+def test_reasons_per_face():
+    faces = np.array([
+        _face(10, 10, 120),
+        _face(200, 10, 20),
+        _face(10, 200, 120, score=0.8),
+        _face(200, 200, 120, yaw=0.8),
+    ])
+    assert assess_faces(_textured(), faces) == [[], ["too_small"], ["low_score"], ["pose"]]
+
+
+def test_blurry_face():
+    flat = np.full((400, 400, 3), 128, dtype=np.uint8)
+    assert assess_faces(flat, np.array([_face(10, 10, 120)])) == [["blurry"]]
+
+
+def test_low_score_never_below_detection_threshold(monkeypatch):
+    # détecteur abaissé pour le contrôle: un seuil qualité plus bas ne laisse pas passer un visage peu sûr
+    monkeypatch.setattr(settings, "FACE_QUALITY_MIN_SCORE", 0.5)
+    monkeypatch.setattr(settings, "FACE_DETECTION_SCORE_THRESHOLD", 0.9)
+    assert assess_faces(_textured(), np.array([_face(10, 10, 120, score=0.8)])) == [["low_score"]]
+
+
+def test_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "FACE_QUALITY_ENABLED", False)
+    faces = np.array([_face(10, 10, 20, score=0.1)])
+    assert assess_faces(_textured(), faces) == [[]]
+
+
+def test_filter_faces_splits_accepted_and_rejected():
+    faces = np.array([_face(10, 10, 120), _face(200, 10, 20)])
+
+    kept, rejected = filter_faces(_textured(), faces)
+
+    assert kept.shape == (1, 15)
+    assert rejected == [{"box": [200.0, 10.0, 20.0, 20.0], "score": 0.95, "reasons": ["too_small"]}]
+    empty, none = filter_faces(_textured(), np.empty((0, 15), dtype=np.float32))
+    assert len(empty) == 0 and none == []
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from app.api.v1 import face
+from app.models.session import Session as SessionModel
+from app.models.student_face import StudentFace
+from app.services import face_result_cache
+from app.services.face_embedding import EMBEDDING_DIM, encode_embedding
+from app.services.face_gallery import gallery_cache
+from app.services.face_result_cache import TTLCache, content_digest, embedding_cache, result_cache
+
+
+def _vec(seed):
+    return np.random.default_rng(seed).standard_normal(EMBEDDING_DIM).astype(np.float32)
+
+
+def test_ttl_cache_lru_and_expiry(monkeypatch):
+    cache = TTLCache("test", max_entries=2, ttl_seconds=10)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # évince "b", le moins récemment lu
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    now = face_result_cache.time.monotonic()
+    monkeypatch.setattr(face_result_cache.time, "monotonic", lambda: now + 11)
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+    disabled = TTLCache("off", max_entries=0, ttl_seconds=10)
+    disabled.put("a", 1)
+    assert disabled.get("a") is None
+
+
+def test_cached_analysis_is_read_only():
+    faces, feats = np.zeros((1, 15), dtype=np.float32), np.zeros((1, EMBEDDING_DIM), dtype=np.float32)
+    face_result_cache.put_analysis("digest", False, (faces, feats, []))
+    cached = face_result_cache.get_analysis("digest", False)
+    assert not cached[0].flags.writeable and not cached[1].flags.writeable
+    assert face_result_cache.get_analysis("digest", True) is None
+
+
+@pytest.fixture
+def recognize(db, group, monkeypatch):
+    """_recognize avec une analyse d'image factice: la photo contient le visage de l'étudiant 1."""
+    for cache in (gallery_cache, result_cache, embedding_cache):
+        cache.clear()
+    for uid in (1, 2):
+        db.add(StudentFace(user_id=uid, embedding=encode_embedding(_vec(uid))))
+    db.commit()
+
+    calls = []
+
+    def fake_analyze(data, endpoint, tiled, digest):
+        calls.append(digest)
+        return np.zeros((1, 15), dtype=np.float32), _vec(1).reshape(1, -1), []
+
+    monkeypatch.setattr(face, "_analyze_upload", fake_analyze)
+
+    def run(session_id, data=b"photo"):
+        return face._recognize(db, db.get(SessionModel, session_id), data, "group", False)
+
+    run.calls = calls
+    yield run
+    for cache in (gallery_cache, result_cache):
+        cache.clear()
+
+
+def test_resubmitted_photo_served_from_cache(recognize):
+    first = recognize(1)
+    assert first["cached"] is False and first["newly_marked"] == [1]
+
+    again = recognize(1)
+    assert again["cached"] is True
+    assert again["recognized"] == first["recognized"]
+    assert again["newly_marked"] == []
+    assert recognize.calls == [content_digest(b"photo")]
+
+
+def test_cache_key_includes_session_and_content(recognize):
+    recognize(1)
+    assert recognize(2)["cached"] is False
+    assert recognize(1, b"autre photo")["cached"] is False
+    assert len(recognize.calls) == 3
+
+
+def test_gallery_rebuild_invalidates_results(recognize):
+    recognize(1)
+    # nouvel encodage enregistré: galerie reconstruite, nouvelle version
+    gallery_cache.invalidate_group(1)
+    assert recognize(1)["cached"] is False
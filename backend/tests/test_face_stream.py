@@ -0,0 +1,68 @@
+import asyncio
+
+import cv2
+import numpy as np
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.api.v1 import face_stream
+from app.models.student_face import StudentFace
+from app.services.face_embedding import EMBEDDING_DIM, encode_embedding
+from app.services.face_gallery import gallery_cache
+from app.services.face_tracking import FaceTracker
+
+
+def _vec(seed):
+    return np.random.default_rng(seed).standard_normal(EMBEDDING_DIM).astype(np.float32)
+
+
+class FakeBackend:
+    """Une image = un visage, celui de l'étudiant 3."""
+
+    def detect(self, bgr):
+        face = np.zeros((1, 15), dtype=np.float32)
+        face[0, :4] = (10, 10, 40, 40)
+        face[0, 14] = 0.95
+        return face
+
+    def features(self, bgr, faces):
+        return np.tile(_vec(3), (len(faces), 1))
+
+
+@pytest.fixture
+def frame(db, group, monkeypatch):
+    gallery_cache.clear()
+    monkeypatch.setattr(face_stream, "get_backend", lambda: FakeBackend())
+    monkeypatch.setattr(face_stream, "assess_faces", lambda bgr, faces: [[] for _ in faces])
+    yield cv2.imencode(".png", np.zeros((64, 64, 3), dtype=np.uint8))[1].tobytes()
+    gallery_cache.clear()
+
+
+def test_student_registered_during_stream_is_recognized(db, frame):
+    db.add(StudentFace(user_id=1, embedding=encode_embedding(_vec(1))))
+    db.commit()
+    tracker = FaceTracker(confirm_votes=1, reembed_every=1)
+
+    info, confirmed = face_stream._process_frame(tracker, 1, frame)
+    assert info["tracks"][0]["candidate"] is None and confirmed == []
+
+    # enregistrement pendant le flux: la galerie est relue à l'image suivante
+    db.add(StudentFace(user_id=3, embedding=encode_embedding(_vec(3))))
+    db.commit()
+    gallery_cache.invalidate_group(1)
+
+    votes = [face_stream._process_frame(tracker, 1, frame)[1] for _ in range(2)]
+    assert votes == [[], [3]]  # majorité: 2 votes pour 3 contre 1 inconnu
+
+
+class ClosedSocket:
+    def __init__(self, exc):
+        self.exc = exc
+
+    async def send_json(self, payload):
+        raise self.exc
+
+
+@pytest.mark.parametrize("exc", [RuntimeError("closed"), WebSocketDisconnect(1006)])
+def test_send_to_departed_client_returns_false(exc):
+    assert asyncio.run(face_stream._send(ClosedSocket(exc), {"event": "frame"})) is False
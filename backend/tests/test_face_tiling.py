@@ -0,0 +1,61 @@
+import numpy as np
+
+from app.services.face_tiling import detect_tiled, merge_detections, tile_grid
+
+
+def _face(x, y, w, h, score=0.95):
+    row = np.zeros(15, dtype=np.float32)
+    row[:4] = [x, y, w, h]
+    # 5 points au centre de la boîte
+    row[4:14] = np.tile([x + w / 2, y + h / 2], 5)
+    row[14] = score
+    return row
+
+
+def test_tile_grid_covers_image_with_overlap():
+    regions = tile_grid(2000, 1000, tile=960, overlap=160)
+
+    assert regions[0] == (0, 0, 960, 960)
+    assert max(x1 for _, _, x1, _ in regions) == 2000
+    assert max(y1 for _, _, _, y1 in regions) == 1000
+    assert all(x1 - x0 == 960 and y1 - y0 == 960 for x0, y0, x1, y1 in regions)
+    xs = sorted({x0 for x0, _, _, _ in regions})
+    assert all(b - a <= 960 - 160 for a, b in zip(xs, xs[1:]))
+
+
+def test_tile_grid_small_image_is_one_tile():
+    assert tile_grid(640, 480, tile=960, overlap=160) == [(0, 0, 640, 480)]
+
+
+def test_merge_detections_suppresses_duplicates():
+    a = np.array([_face(100, 100, 50, 50, 0.9)])
+    b = np.array([_face(102, 101, 50, 50, 0.95), _face(400, 400, 40, 40)])
+
+    merged = merge_detections([a, b, np.empty((0, 15), dtype=np.float32)], nms_threshold=0.3)
+
+    assert len(merged) == 2
+    # le doublon le plus sûr est gardé
+    assert merged[:, 0].tolist() == [102, 400]
+    assert len(merge_detections([], 0.3)) == 0
+
+
+def _bright_square_detector(img):
+    """Faux YuNet: la boîte englobante des pixels blancs, si elle n'est pas vide."""
+    ys, xs = np.nonzero(img[:, :, 0] > 127)
+    if len(xs) == 0:
+        return np.empty((0, 15), dtype=np.float32)
+    x, y = xs.min(), ys.min()
+    return np.array([_face(x, y, xs.max() - x + 1, ys.max() - y + 1)])
+
+
+def test_detect_tiled_maps_tile_detections_back_to_image():
+    img = np.zeros((1200, 2400, 3), dtype=np.uint8)
+    # visage à cheval sur deux tuiles (chevauchement 200 px)
+    img[400:460, 780:840] = 255
+
+    faces = detect_tiled(_bright_square_detector, img, tile=1000, overlap=200, workers=2, coarse_size=600)
+
+    assert len(faces) == 1
+    x, y, w, h = faces[0, :4]
+    assert abs(x - 780) <= 4 and abs(y - 400) <= 4
+    assert abs(w - 60) <= 8 and abs(h - 60) <= 8
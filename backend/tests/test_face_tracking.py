@@ -0,0 +1,74 @@
+import numpy as np
+
+from app.services.face_tracking import FaceTracker, iou_matrix
+
+
+def _faces(*boxes):
+    rows = np.zeros((len(boxes), 15), dtype=np.float32)
+    for i, box in enumerate(boxes):
+        rows[i, :4] = box
+        rows[i, 14] = 0.95
+    return rows
+
+
+def test_iou_matrix():
+    a = np.array([[0, 0, 10, 10]], dtype=np.float32)
+    b = np.array([[0, 0, 10, 10], [5, 0, 10, 10], [50, 50, 10, 10]], dtype=np.float32)
+    assert np.allclose(iou_matrix(a, b), [[1.0, 50 / 150, 0.0]])
+    assert iou_matrix(a, np.empty((0, 4), dtype=np.float32)).shape == (1, 0)
+
+
+def test_track_kept_across_frames_and_new_track_for_distant_face():
+    tracker = FaceTracker()
+    (first,) = tracker.update(_faces((100, 100, 50, 50)))
+    same, other = tracker.update(_faces((104, 102, 50, 50), (400, 100, 50, 50)))
+
+    assert same is first and same.hits == 2
+    assert other.track_id != first.track_id
+    assert len(tracker.tracks) == 2
+
+
+def test_track_expires_after_max_missed():
+    tracker = FaceTracker(max_missed=2)
+    (track,) = tracker.update(_faces((100, 100, 50, 50)))
+    for _ in range(2):
+        tracker.update(_faces())
+    assert tracker.tracks == [track]
+    tracker.update(_faces())
+    assert tracker.tracks == []
+    (again,) = tracker.update(_faces((100, 100, 50, 50)))
+    assert again.track_id != track.track_id
+
+
+def test_confirmation_by_majority_then_no_reembedding():
+    tracker = FaceTracker(confirm_votes=3, reembed_every=2)
+    box = (100, 100, 50, 50)
+    (track,) = tracker.update(_faces(box))
+    assert tracker.needs_embedding(track)
+
+    confirmed = []
+    for user_id in (7, None, 7, 7):
+        while not tracker.needs_embedding(track):
+            tracker.update(_faces(box))
+        confirmed.append(tracker.add_vote(track, user_id, 0.6))
+        # cadence: pas de nouvel encodage à l'image suivante
+        assert not tracker.needs_embedding(track)
+
+    assert confirmed == [False, False, False, True]
+    assert track.user_id == 7 and track.best_similarity == {7: 0.6}
+    tracker.update(_faces(box))
+    tracker.update(_faces(box))
+    assert not tracker.needs_embedding(track)
+
+
+def test_no_majority_gives_up_after_max_embeds():
+    tracker = FaceTracker(confirm_votes=3, reembed_every=1, max_embeds=4)
+    box = (100, 100, 50, 50)
+    (track,) = tracker.update(_faces(box))
+    for user_id in (1, 2, 1, 2):
+        assert tracker.needs_embedding(track)
+        assert not tracker.add_vote(track, user_id, 0.5)
+        tracker.update(_faces(box))
+
+    assert track.gave_up and not track.confirmed
+    assert not tracker.needs_embedding(track)
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from jose import jwt
+from sqlalchemy import event
+
+from app.api.v1 import auth
+from app.core.config import settings
+from app.core.security import ALGORITHM
+from app.db.session import engine
+from app.models.user import RoleEnum, User
+from app.services import login_limiter
+from app.services.login_limiter import LoginRateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(login_limiter.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_blocks_after_max_failures_until_window_passes(clock):
+    limiter = LoginRateLimiter(max_failures=3, window_seconds=60)
+    for _ in range(3):
+        assert limiter.retry_after("Prof@Test.local ") == 0
+        limiter.record_failure("prof@test.local")
+
+    assert limiter.retry_after("PROF@test.local") == 60
+    clock[0] += 45
+    assert limiter.retry_after("prof@test.local") == 15
+    clock[0] += 15
+    assert limiter.retry_after("prof@test.local") == 0
+
+
+def test_reset_and_disabled(clock):
+    limiter = LoginRateLimiter(max_failures=1, window_seconds=60)
+    limiter.record_failure("a@test.local")
+    assert limiter.retry_after("a@test.local") > 0
+    assert limiter.retry_after("b@test.local") == 0
+    limiter.reset("a@test.local")
+    assert limiter.retry_after("a@test.local") == 0
+
+    off = LoginRateLimiter(max_failures=0, window_seconds=60)
+    off.record_failure("a@test.local")
+    assert off.retry_after("a@test.local") == 0
+
+
+def test_tracked_accounts_are_bounded(clock):
+    limiter = LoginRateLimiter(max_failures=2, window_seconds=60, max_tracked=2)
+    limiter.record_failure("a")
+    limiter.record_failure("b")
+    clock[0] += 61
+    limiter.record_failure("c")  # fenêtres de a et b écoulées: purgées
+    assert sorted(limiter._failures) == ["c"]
+
+
+def test_rehash_on_login_reads_user_off_the_event_loop(db, monkeypatch):
+    db.add(User(id=1, first_name="Prof", last_name="1", email="prof@test.local",
+                role=RoleEnum.TEACHER, hashed_password="ancien"))
+    db.commit()
+    auth.login_limiter.reset("prof@test.local")
+    monkeypatch.setattr(settings, "AUTH_STATELESS_CLAIMS", True)
+
+    async def verify(plain, hashed):
+        return plain == "secret", "rehashed"
+
+    monkeypatch.setattr(auth, "verify_and_update_password", verify)
+    loop_thread = threading.get_ident()
+    on_loop = []
+    listener = lambda conn, cursor, sql, params, context, many: on_loop.append(  # noqa: E731
+        threading.get_ident() == loop_thread)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        form = OAuth2PasswordRequestForm(username="prof@test.local", password="secret")
+        token = asyncio.run(auth.login(form, db)).access_token
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+    assert (payload["sub"], payload["uid"], payload["role"]) == ("prof@test.local", 1, RoleEnum.TEACHER.value)
+    assert on_loop and not any(on_loop)
+    db.expire_all()
+    assert db.get(User, 1).hashed_password == "rehashed"
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(auth.login(OAuth2PasswordRequestForm(username="prof@test.local", password="faux"), db))
+    assert exc.value.status_code == 401
@@ -0,0 +1,35 @@
+from sqlalchemy import create_engine, inspect, text
+
+from app.db.migrations import MIGRATIONS, run_migrations
+from app.db.session import Base
+
+
+def test_fresh_database_records_every_step(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    Base.metadata.create_all(engine)
+
+    assert len(run_migrations(engine)) == len(MIGRATIONS)
+    assert run_migrations(engine) == []
+
+
+def test_sqlite_upgrade_rebuilds_student_faces(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        # schéma d'origine: un encodage JSON obligatoire, un seul visage par étudiant
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, first_name VARCHAR(100) NOT NULL,"
+                          " last_name VARCHAR(100) NOT NULL, email VARCHAR(150) NOT NULL, hashed_password VARCHAR(255),"
+                          " role VARCHAR(7) NOT NULL, is_active BOOLEAN)"))
+        conn.execute(text("CREATE TABLE student_faces (id INTEGER PRIMARY KEY,"
+                          " user_id INTEGER NOT NULL UNIQUE REFERENCES users(id), encoding TEXT NOT NULL)"))
+        conn.execute(text("INSERT INTO users VALUES (1, 'Etu', '1', 'etu1@test.local', NULL, 'STUDENT', 1)"))
+        conn.execute(text("INSERT INTO student_faces (id, user_id, encoding) VALUES (1, 1, '[0.5]')"))
+    Base.metadata.create_all(engine)
+
+    run_migrations(engine)
+
+    cols = {c["name"]: c for c in inspect(engine).get_columns("student_faces")}
+    assert cols["encoding"]["nullable"]
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO student_faces (user_id, embedding) VALUES (1, x'00'), (1, x'01')"))
+        rows = conn.execute(text("SELECT id, user_id, encoding FROM student_faces ORDER BY id")).all()
+    assert rows == [(1, 1, "[0.5]"), (2, 1, None), (3, 1, None)]
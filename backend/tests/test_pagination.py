@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.session import Session as SessionModel
+from app.models.user import RoleEnum, User
+from app.services.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_page
+
+SESSION_SORT = [(SessionModel.start_time, True), (SessionModel.id, True)]
+USER_SORT = [(User.id, False)]
+
+
+def test_cursor_round_trip_keeps_datetimes():
+    values = [datetime(2026, 3, 2, 14, 30, 15), 42]
+    assert decode_cursor(encode_cursor(values), SESSION_SORT) == values
+
+
+@pytest.mark.parametrize("cursor", ["pas-un-curseur", encode_cursor([1, 2]), encode_cursor([1])[:-2] + "!!"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, USER_SORT)
+
+
+def test_keyset_pages_cover_all_rows_once(db):
+    for uid in range(1, 26):
+        db.add(User(id=uid, first_name="U", last_name=str(uid), email=f"u{uid}@test.local", role=RoleEnum.STUDENT))
+    db.commit()
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = keyset_page(db.query(User), USER_SORT, cursor, 10)
+        seen.extend(u.id for u in rows)
+        if cursor is None:
+            break
+    assert seen == list(range(1, 26))
+
+
+def test_keyset_descending_with_ties(db, group):
+    # séances à la même heure: départagées par id décroissant
+    for sid in range(10, 13):
+        db.add(SessionModel(id=sid, group_id=group, start_time=datetime(2026, 2, 1, 8),
+                            end_time=datetime(2026, 2, 1, 8) + timedelta(hours=1)))
+    db.commit()
+
+    first, cursor = keyset_page(db.query(SessionModel), SESSION_SORT, None, 2)
+    rest, last = keyset_page(db.query(SessionModel), SESSION_SORT, cursor, None)
+
+    assert [s.id for s in first] == [12, 11]
+    assert [s.id for s in rest] == [10, 4, 3, 2, 1]
+    assert last is None
+
+
+def test_no_limit_returns_everything(db, group):
+    rows, cursor = keyset_page(db.query(SessionModel), SESSION_SORT, None, None)
+    assert len(rows) == 4 and cursor is None
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.db.session import SessionLocal, engine
+from app.models.recognition_job import JobStatus, RecognitionJob
+from app.services import recognition_jobs as jobs
+
+T0 = datetime(2026, 1, 5, 8, 0)
+
+
+def _enqueue(db, session_id, hours=0):
+    return jobs.enqueue(db, session_id, T0 + timedelta(hours=hours), b"img", "group", None, None)
+
+
+def test_claims_oldest_session_first(db, group):
+    late = _enqueue(db, 2, hours=24)
+    early = _enqueue(db, 1)
+
+    first = jobs.claim_next(db)
+    assert first.id == early.id
+    assert first.status == JobStatus.RUNNING and first.attempts == 1
+    assert jobs.claim_next(db).id == late.id
+    assert jobs.claim_next(db) is None
+
+
+def test_queue_limit(db, group, monkeypatch):
+    monkeypatch.setattr(settings, "FACE_JOB_MAX_QUEUED", 1)
+    _enqueue(db, 1)
+    with pytest.raises(jobs.QueueFull):
+        _enqueue(db, 1)
+
+
+def test_job_taken_between_select_and_update_is_skipped(db, group):
+    taken = _enqueue(db, 1)
+    other = _enqueue(db, 2)
+
+    raced = []
+
+    def other_worker_claims_first(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("UPDATE") and not raced:
+            raced.append(True)
+            with SessionLocal() as rival:
+                assert jobs.claim_next(rival).id == taken.id
+
+    event.listen(engine, "before_cursor_execute", other_worker_claims_first)
+    try:
+        claimed = jobs.claim_next(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", other_worker_claims_first)
+
+    assert raced
+    assert claimed.id == other.id
+    db.refresh(taken)
+    assert taken.attempts == 1
+
+
+def test_release_and_requeue_stale(db, group, monkeypatch):
+    monkeypatch.setattr(settings, "FACE_JOB_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(settings, "FACE_JOB_STALE_SECONDS", 60)
+    job = _enqueue(db, 1)
+    jobs.claim_next(db)
+
+    jobs.release(db, job, 503, "occupé")
+    assert job.status == JobStatus.QUEUED
+
+    jobs.claim_next(db)
+    jobs.release(db, job, 503, "occupé")
+    assert job.status == JobStatus.FAILED and job.error_status == 503
+
+    stale = _enqueue(db, 1)
+    dead = _enqueue(db, 2)
+    jobs.claim_next(db)
+    jobs.claim_next(db)
+    old = datetime.utcnow() - timedelta(minutes=5)
+    db.query(RecognitionJob).filter(RecognitionJob.id.in_([stale.id, dead.id])).update(
+        {"started_at": old}, synchronize_session=False
+    )
+    db.query(RecognitionJob).filter(RecognitionJob.id == dead.id).update({"attempts": 2}, synchronize_session=False)
+    db.commit()
+
+    assert jobs.requeue_stale(db) == 2
+    db.expire_all()
+    assert db.get(RecognitionJob, stale.id).status == JobStatus.QUEUED
+    assert db.get(RecognitionJob, dead.id).status == JobStatus.FAILED
+    assert db.get(RecognitionJob, dead.id).image is None
+
+
+def test_purge_finished(db, group, monkeypatch):
+    monkeypatch.setattr(settings, "FACE_JOB_RETENTION_HOURS", 1)
+    job = _enqueue(db, 1)
+    jobs.claim_next(db)
+    jobs.complete(db, job, {"ok": True})
+    assert jobs.job_to_dict(db, job)["result"] == {"ok": True}
+
+    assert jobs.purge_finished(db) == 0
+    job.finished_at = datetime.utcnow() - timedelta(hours=2)
+    db.commit()
+    assert jobs.purge_finished(db) == 1